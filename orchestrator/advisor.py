@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import math
+import os
+import shlex
+import sqlite3
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .catalog import catalog_meta, open_catalog
+from .dbclient import SYSTEM_SCHEMAS
+
+ADVICE_DIR = "config_advice"
+PROFILES = ("bulk_load", "production")
+MB = 1 << 20
+_LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+# Same name and meaning on MariaDB; copied when the source sets them explicitly.
+_CARRY = (
+    "max_allowed_packet", "sort_buffer_size", "join_buffer_size", "read_buffer_size", "read_rnd_buffer_size",
+    "innodb_lock_wait_timeout", "lock_wait_timeout", "wait_timeout", "interactive_timeout", "long_query_time",
+    "slow_query_log", "character_set_server", "collation_server", "lower_case_table_names", "sql_mode",
+    "innodb_flush_neighbors", "innodb_adaptive_hash_index", "innodb_autoinc_lock_mode",
+    "innodb_print_all_deadlocks", "innodb_file_per_table", "innodb_strict_mode", "innodb_lru_scan_depth",
+    "innodb_page_size", "innodb_default_row_format", "innodb_stats_persistent", "binlog_format",
+    "binlog_row_image", "binlog_cache_size", "max_binlog_size", "expire_logs_days", "binlog_expire_logs_seconds",
+    "log_bin_trust_function_creators", "skip_name_resolve", "local_infile", "event_scheduler",
+    "explicit_defaults_for_timestamp", "group_concat_max_len", "max_connect_errors", "open_files_limit",
+    "performance_schema", "innodb_numa_interleave", "innodb_undo_log_truncate", "transaction_isolation",
+)
+
+# MySQL name -> MariaDB name.
+_RENAMED = {
+    "tx_isolation": "transaction_isolation",
+    "log_replica_updates": "log_slave_updates",
+    "replica_parallel_workers": "slave_parallel_threads",
+    "slave_parallel_workers": "slave_parallel_threads",
+    "replica_skip_errors": "slave_skip_errors",
+    "replica_net_timeout": "slave_net_timeout",
+}
+
+_DROPPED = {
+    "innodb_buffer_pool_instances": "MariaDB 10.5+ has a single buffer pool instance",
+    "innodb_log_files_in_group": "MariaDB has a single redo log file; folded into innodb_log_file_size",
+    "innodb_redo_log_capacity": "folded into innodb_log_file_size",
+    "innodb_dedicated_server": "no MariaDB equivalent; memory and redo are sized explicitly in this file",
+    "innodb_flush_method": "MariaDB 10.6+ uses O_DIRECT by default and 11.0 deprecates the variable",
+    "innodb_parallel_read_threads": "no MariaDB equivalent",
+    "innodb_log_writer_threads": "no MariaDB equivalent",
+    "innodb_ddl_threads": "no MariaDB equivalent",
+    "innodb_ddl_buffer_size": "no MariaDB equivalent",
+    "internal_tmp_mem_storage_engine": "MariaDB has no TempTable engine; in-memory temp tables use tmp_table_size",
+    "temptable_max_ram": "MariaDB has no TempTable engine; in-memory temp tables use tmp_table_size",
+    "temptable_max_mmap": "MariaDB has no TempTable engine",
+    "temptable_use_mmap": "MariaDB has no TempTable engine",
+    "default_authentication_plugin": "MariaDB sets the plugin per account",
+    "authentication_policy": "MariaDB sets the plugin per account",
+    "gtid_mode": "MariaDB GTIDs are always on (see gtid_strict_mode)",
+    "enforce_gtid_consistency": "MariaDB GTIDs are always on (see gtid_strict_mode)",
+    "binlog_transaction_dependency_tracking": "MariaDB parallel replication uses slave_parallel_mode",
+    "transaction_write_set_extraction": "MariaDB parallel replication uses slave_parallel_mode",
+    "replica_parallel_type": "MariaDB parallel replication uses slave_parallel_mode",
+    "slave_parallel_type": "MariaDB parallel replication uses slave_parallel_mode",
+    "replica_preserve_commit_order": "MariaDB parallel replication always commits in order",
+    "slave_preserve_commit_order": "MariaDB parallel replication always commits in order",
+    "default_collation_for_utf8mb4": "MariaDB 11.2+ uses character_set_collations",
+    "log_error_verbosity": "MariaDB uses log_warnings",
+    "binlog_encryption": "MariaDB encrypts binlogs through an encryption plugin (encrypt_binlog)",
+    "innodb_redo_log_encrypt": "MariaDB encrypts redo through an encryption plugin",
+    "default_table_encryption": "MariaDB encrypts tables through an encryption plugin",
+    "admin_address": "MariaDB uses extra_port for a separate admin listener",
+    "admin_port": "MariaDB uses extra_port for a separate admin listener",
+}
+_DROPPED_PREFIXES = ("group_replication_", "mysqlx", "caching_sha2_", "sha256_password_", "clone_")
+
+# Sized below from the workload and the target host rather than copied.
+_SIZED = (
+    "innodb_buffer_pool_size", "innodb_log_file_size", "innodb_log_buffer_size", "innodb_io_capacity",
+    "innodb_io_capacity_max", "innodb_flush_log_at_trx_commit", "sync_binlog", "innodb_doublewrite",
+    "innodb_read_io_threads", "innodb_write_io_threads", "max_connections", "thread_cache_size",
+    "table_open_cache", "table_definition_cache", "tmp_table_size", "max_heap_table_size",
+)
+
+# Paths, identities and listeners belong to the target host, not to the source.
+_HOST_SPECIFIC = (
+    "bind_address", "port", "socket", "server_id", "server_uuid", "hostname", "report_host", "log_bin",
+    "secure_file_priv", "default_time_zone", "time_zone", "mysqlx_port", "mysqlx_socket",
+)
+_HOST_SUFFIXES = ("dir", "_file", "_path", "_basename", "_index", "_home")
+
+
+@dataclass
+class Setting:
+    name: str
+    value: str
+    reason: str
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return None
+
+
+def _mem_mb() -> Optional[int]:
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // MB)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def target_host(env: Mapping[str, str], log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """CPU count and memory of the target host.
+
+    TGT_CPUS / TGT_MEMORY_MB win; otherwise the host is read over ssh
+    (TGT_SSH_HOST) or locally when TGT_HOST is this machine.
+    """
+    host: Dict[str, Any] = {"cpus": _int(env.get("TGT_CPUS")), "memory_mb": _int(env.get("TGT_MEMORY_MB")),
+                            "detected_by": "env"}
+    if host["cpus"] and host["memory_mb"]:
+        return host
+    ssh_host = str(env.get("TGT_SSH_HOST", "")).strip()
+    cpus: Optional[int] = None
+    mem: Optional[int] = None
+    if ssh_host:
+        user = str(env.get("TGT_SSH_USER", "root")).strip() or "root"
+        cmd = ["ssh", *shlex.split(str(env.get("TGT_SSH_OPTS", ""))), f"{user}@{ssh_host}",
+               "nproc; awk '/^MemTotal:/ {print $2}' /proc/meminfo"]
+        try:
+            p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30,
+                               stdin=subprocess.DEVNULL)
+            lines = p.stdout.split()
+            if p.returncode == 0 and len(lines) >= 2:
+                cpus, mem = _int(lines[0]), (_int(lines[1]) or 0) // 1024 or None
+            elif log:
+                log(f"WARN: could not read target host size over ssh ({user}@{ssh_host}): {p.stderr.strip()[:200]}")
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            if log:
+                log(f"WARN: could not read target host size over ssh ({user}@{ssh_host}): {exc}")
+        detected = "ssh"
+    elif str(env.get("TGT_HOST", "")).strip() in _LOCAL_HOSTS:
+        cpus, mem, detected = os.cpu_count(), _mem_mb(), "local"
+    else:
+        detected = "unknown"
+    if cpus or mem:
+        host["detected_by"] = detected if not (host["cpus"] or host["memory_mb"]) else f"env+{detected}"
+    else:
+        host["detected_by"] = "env" if (host["cpus"] or host["memory_mb"]) else "unknown"
+    host["cpus"] = host["cpus"] or cpus
+    host["memory_mb"] = host["memory_mb"] or mem
+    return host
+
+
+def _load(catalog_path: Path) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str], Dict[str, int]]:
+    db = open_catalog(catalog_path)
+    try:
+        variables = {str(n).lower(): v or "" for n, v in db.execute("SELECT variable_name, variable_value FROM variables")}
+        try:
+            status = {str(n).lower(): v or "" for n, v in db.execute("SELECT variable_name, variable_value FROM status")}
+            info = {str(n).lower(): s or "" for n, s in db.execute("SELECT variable_name, variable_source FROM variables_info")}
+        except sqlite3.OperationalError:
+            # Snapshot taken before status/variables_info were part of the catalog.
+            status, info = {}, {}
+        system = ", ".join(f"'{s}'" for s in SYSTEM_SCHEMAS)
+        count, size = db.execute(
+            "SELECT COUNT(*), SUM(CAST(COALESCE(data_length, 0) AS INTEGER) + CAST(COALESCE(index_length, 0) AS INTEGER)) "
+            f"FROM tables WHERE table_type = 'BASE TABLE' AND table_schema NOT IN ({system})"
+        ).fetchone()
+    finally:
+        db.close()
+    return variables, status, info, {"tables": int(count or 0), "data_mb": int((size or 0) // MB)}
+
+
+def workload(variables: Mapping[str, str], status: Mapping[str, str], data: Mapping[str, int]) -> Dict[str, Any]:
+    """Rates and ratios from the source's global status, averaged over its uptime."""
+    s = {k: _int(v) or 0 for k, v in status.items()}
+    uptime = max(1, s.get("uptime", 0))
+    requests = s.get("innodb_buffer_pool_read_requests", 0)
+    tmp = s.get("created_tmp_tables", 0)
+    connections = s.get("connections", 0)
+    return {
+        "uptime_s": uptime,
+        "buffer_pool_mb": (_int(variables.get("innodb_buffer_pool_size")) or 0) // MB,
+        "buffer_pool_hit_rate": round(1 - s.get("innodb_buffer_pool_reads", 0) / requests, 5) if requests else None,
+        "redo_bytes_per_s": round(s.get("innodb_os_log_written", 0) / uptime, 1),
+        "pages_flushed_per_s": round(s.get("innodb_buffer_pool_pages_flushed", 0) / uptime, 1),
+        "tmp_tables_per_s": round(tmp / uptime, 3),
+        "tmp_disk_spill_rate": round(s.get("created_tmp_disk_tables", 0) / tmp, 4) if tmp else None,
+        "max_used_connections": s.get("max_used_connections", 0),
+        "thread_create_rate": round(s.get("threads_created", 0) / connections, 4) if connections else None,
+        "opened_tables_per_s": round(s.get("opened_tables", 0) / uptime, 3),
+        "tables": data.get("tables", 0),
+        "data_mb": data.get("data_mb", 0),
+    }
+
+
+def _size(mb: int) -> str:
+    return f"{mb // 1024}G" if mb >= 1024 and mb % 1024 == 0 else f"{mb}M"
+
+
+def _round_up(value: float, step: int) -> int:
+    return int(math.ceil(value / step) * step)
+
+
+def _version(text: str) -> Tuple[int, int]:
+    parts = [_int(p) for p in str(text).split(".")[:2]]
+    if len(parts) == 2 and parts[0] is not None and parts[1] is not None:
+        return parts[0], parts[1]
+    return (11, 4)
+
+
+def _mapped(variables: Mapping[str, str], info: Mapping[str, str], target: Tuple[int, int]) -> Tuple[
+        List[Setting], List[Dict[str, str]], List[str]]:
+    """Translate the source's explicitly set variables; returns (settings, dropped, review)."""
+    # variables_info (MySQL 8.0+) tells configured values apart from compiled-in defaults.
+    explicit = {n for n, src in info.items() if src.upper() != "COMPILED"} if info else set(_CARRY) | set(_RENAMED)
+    settings: List[Setting] = []
+    dropped: List[Dict[str, str]] = []
+    review: List[str] = []
+    for name in sorted(explicit):
+        if name not in variables or name in _SIZED:
+            continue
+        value = variables[name]
+        if name in _DROPPED or name.startswith(_DROPPED_PREFIXES):
+            dropped.append({"name": name, "value": value,
+                            "reason": _DROPPED.get(name, "MySQL-only plugin or feature")})
+        elif name in _RENAMED or name in _CARRY:
+            new = _RENAMED.get(name, name)
+            reason = "source setting" if new == name else f"source {name}"
+            if new == "transaction_isolation" and target < (11, 1):
+                new = "tx_isolation"
+            if name in ("collation_server",) and "_0900_" in value:
+                value = value.replace("_0900_as_cs", "_uca1400_as_cs").replace("_0900_ai_ci", "_uca1400_ai_ci")
+                value = value.replace("_0900_bin", "_bin")
+                reason = f"source {variables[name]}; MariaDB's UCA 14.0 collation"
+                if target < (10, 10) and "_uca1400_" in value:
+                    value, reason = "utf8mb4_unicode_520_ci", f"source {variables[name]}; closest collation before 10.10"
+            settings.append(Setting(new, value, reason))
+        elif not (name in _HOST_SPECIFIC or name.endswith(_HOST_SUFFIXES) or name.startswith(("ssl_", "tls_"))):
+            review.append(name)
+    if "replica_parallel_workers" in explicit or "slave_parallel_workers" in explicit:
+        settings.append(Setting("slave_parallel_mode", "optimistic", "source runs parallel replication"))
+    return settings, dropped, review
+
+
+def _sized(variables: Mapping[str, str], w: Mapping[str, Any], host: Mapping[str, Any]) -> Tuple[
+        Dict[str, Dict[str, Setting]], List[str]]:
+    """Memory, redo, I/O and connection settings per profile."""
+    notes: List[str] = []
+    v = {k: _int(val) for k, val in variables.items()}
+    mem = host.get("memory_mb")
+    if not mem:
+        mem = max(1024, int(w["buffer_pool_mb"] / 0.75))
+        notes.append(f"Target memory unknown (set TGT_MEMORY_MB); assumed {mem} MB from the source buffer pool.")
+    cpus = host.get("cpus") or 0
+    if not cpus:
+        notes.append("Target CPU count unknown (set TGT_CPUS); I/O threads left at their defaults.")
+
+    common: Dict[str, Setting] = {}
+    max_used = int(w["max_used_connections"] or 0)
+    src_max = v.get("max_connections") or 151
+    max_conn = max(src_max, _round_up(max_used * 1.25, 10))
+    common["max_connections"] = Setting(
+        "max_connections", str(max_conn),
+        f"source max_connections={src_max}, peak {max_used} used" + ("; raised for headroom" if max_conn > src_max else ""))
+
+    per_session = sum((v.get(k) or 0) for k in ("sort_buffer_size", "join_buffer_size", "read_buffer_size",
+                                                 "read_rnd_buffer_size", "thread_stack")) // MB + 1
+    reserve = max(1024, int(mem * 0.05)) + max_used * per_session
+    cap = int(min(mem * 0.8, mem - reserve))
+    pool = cap
+    reason = (f"{mem} MB host: 80% of memory, minus {reserve} MB for the OS and "
+              f"{max_used} peak sessions x {per_session} MB of per-session buffers")
+    if w["data_mb"] and w["data_mb"] * 1.5 < cap:
+        pool = max(1024, int(w["data_mb"] * 1.5))
+        reason = f"data and indexes are {w['data_mb']} MB; 1.5x that leaves room for growth"
+    pool = max(128, pool // 1024 * 1024 if pool >= 8192 else pool // 128 * 128)
+    hit = w["buffer_pool_hit_rate"]
+    if hit is not None:
+        reason += f"; source hit rate {hit:.2%} with a {w['buffer_pool_mb']} MB pool"
+        if hit < 0.99 and pool <= w["buffer_pool_mb"]:
+            notes.append(f"Source buffer pool hit rate is {hit:.2%}; the target pool is not larger, expect disk reads.")
+    common["innodb_buffer_pool_size"] = Setting("innodb_buffer_pool_size", _size(pool), reason)
+
+    # One hour of average redo keeps checkpoints infrequent without making crash recovery slow.
+    redo_mb = w["redo_bytes_per_s"] * 3600 / MB
+    src_redo = (v.get("innodb_redo_log_capacity") or
+                (v.get("innodb_log_file_size") or 0) * (v.get("innodb_log_files_in_group") or 1)) // MB
+    log_mb = min(max(_round_up(redo_mb, 256), src_redo, 1024 if pool >= 4096 else 256), max(pool, 256))
+    bulk_log_mb = max(log_mb, min(pool, 8192) // 256 * 256)
+
+    flush_rate = w["pages_flushed_per_s"]
+    io = min(20000, max(200, v.get("innodb_io_capacity") or 200, _round_up(flush_rate * 2, 100)))
+
+    spill = w["tmp_disk_spill_rate"]
+    tmp_mb = max((v.get("tmp_table_size") or 16 * MB), (v.get("max_heap_table_size") or 16 * MB)) // MB
+    tmp_reason = f"source value; {spill:.1%} of temp tables went to disk" if spill is not None else "source value"
+    if spill is not None and spill > 0.1 and w["tmp_tables_per_s"] >= 0.1:
+        raised = min(max(tmp_mb * 2, 64), 1024, max(16, mem // 50))
+        if raised > tmp_mb:
+            tmp_reason = f"{spill:.1%} of the source's temp tables spilled to disk; raised from {tmp_mb} MB"
+            tmp_mb = raised
+    common["tmp_table_size"] = Setting("tmp_table_size", _size(tmp_mb), tmp_reason)
+    common["max_heap_table_size"] = Setting("max_heap_table_size", _size(tmp_mb), "kept equal to tmp_table_size")
+
+    tables = int(w["tables"] or 0)
+    toc = max(v.get("table_open_cache") or 2000, min(65536, _round_up(tables * 1.2, 100)))
+    common["table_open_cache"] = Setting(
+        "table_open_cache", str(toc), f"{tables} tables; source opened {w['opened_tables_per_s']}/s")
+    common["table_definition_cache"] = Setting(
+        "table_definition_cache", str(max(v.get("table_definition_cache") or 400, min(65536, tables + 400))),
+        f"{tables} tables plus headroom")
+    churn = w["thread_create_rate"]
+    if churn is not None and churn > 0.01:
+        common["thread_cache_size"] = Setting(
+            "thread_cache_size", str(min(1000, max(v.get("thread_cache_size") or 0, max_used))),
+            f"{churn:.1%} of source connections created a new thread")
+    if cpus:
+        threads = min(64, max(4, cpus // 2))
+        common["innodb_read_io_threads"] = Setting("innodb_read_io_threads", str(threads), f"{cpus} CPUs")
+        common["innodb_write_io_threads"] = Setting("innodb_write_io_threads", str(threads), f"{cpus} CPUs")
+
+    production = dict(common)
+    production.update({
+        "innodb_log_file_size": Setting(
+            "innodb_log_file_size", _size(log_mb),
+            f"about one hour of the source's average redo ({w['redo_bytes_per_s'] / MB:.2f} MB/s); source had {src_redo} MB"),
+        "innodb_io_capacity": Setting(
+            "innodb_io_capacity", str(io), f"source flushed {flush_rate} pages/s on average"),
+        "innodb_io_capacity_max": Setting("innodb_io_capacity_max", str(max(2000, io * 2)), "2x innodb_io_capacity"),
+        "innodb_flush_log_at_trx_commit": Setting(
+            "innodb_flush_log_at_trx_commit", str(v.get("innodb_flush_log_at_trx_commit") if
+                                                  v.get("innodb_flush_log_at_trx_commit") is not None else 1),
+            "source durability setting"),
+        "sync_binlog": Setting("sync_binlog", str(v.get("sync_binlog") if v.get("sync_binlog") is not None else 1),
+                               "source durability setting"),
+        "innodb_doublewrite": Setting("innodb_doublewrite", "ON", "restores torn-page protection after the load"),
+        "innodb_log_buffer_size": Setting(
+            "innodb_log_buffer_size", _size(max(16, (v.get("innodb_log_buffer_size") or 0) // MB)), "source value"),
+    })
+    bulk = dict(common)
+    bulk.update({
+        "innodb_log_file_size": Setting(
+            "innodb_log_file_size", _size(bulk_log_mb), "large redo so the load is not throttled by checkpoints"),
+        "innodb_log_buffer_size": Setting("innodb_log_buffer_size", "256M", "large transactions during the load"),
+        "innodb_io_capacity": Setting("innodb_io_capacity", str(max(io, 2000)), "flush faster during the load"),
+        "innodb_io_capacity_max": Setting("innodb_io_capacity_max", str(max(io, 2000) * 2), "2x innodb_io_capacity"),
+        "innodb_flush_log_at_trx_commit": Setting(
+            "innodb_flush_log_at_trx_commit", "2", "no fsync per commit; a crash means reloading anyway"),
+        "sync_binlog": Setting("sync_binlog", "0", "no binlog fsync during the load"),
+        "innodb_doublewrite": Setting("innodb_doublewrite", "OFF", "halves page writes; switch back for production"),
+    })
+    if cpus:
+        bulk["innodb_write_io_threads"] = Setting(
+            "innodb_write_io_threads", str(min(64, max(4, cpus))), f"{cpus} CPUs; the load is write-bound")
+    return {"bulk_load": bulk, "production": production}, notes
+
+
+def advise(
+    catalog_path: Path,
+    host: Mapping[str, Any],
+    target_version: str = "",
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Build bulk-load and production my.cnf advice from a catalog snapshot and the target host size."""
+    variables, status, info, data = _load(catalog_path)
+    if not variables:
+        raise RuntimeError(f"catalog has no global variables: {catalog_path}")
+    if not status and log:
+        log("WARN: catalog has no global status (older snapshot); workload-based sizing uses defaults")
+    w = workload(variables, status, data)
+    mapped, dropped, review = _mapped(variables, info, _version(target_version))
+    sized, notes = _sized(variables, w, host)
+    profiles: Dict[str, Any] = {}
+    for profile in PROFILES:
+        settings = {s.name: s for s in mapped}
+        settings.update(sized[profile])
+        profiles[profile] = {
+            "file": f"{ADVICE_DIR}/{profile}.cnf",
+            "settings": [{"name": s.name, "value": s.value, "reason": s.reason} for s in settings.values()],
+        }
+    if log:
+        log(f"CONFIG advice: {len(mapped)} setting(s) mapped, {len(dropped)} dropped, {len(review)} to review")
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "source": {"label": catalog_meta(catalog_path).get("source", ""), "version": variables.get("version", ""),
+                   "explicit_settings_known": bool(info)},
+        "target": {"version": target_version, "host": dict(host)},
+        "workload": w,
+        "profiles": profiles,
+        "dropped": dropped,
+        "review": review,
+        "notes": notes,
+    }
+
+
+def render(advice: Mapping[str, Any], profile: str) -> str:
+    host = advice["target"]["host"]
+    lines = [
+        f"# Target configuration advice: {profile} profile",
+        f"# Source {advice['source']['label']} (MySQL {advice['source']['version']}); "
+        f"target host {host.get('cpus') or '?'} CPUs, {host.get('memory_mb') or '?'} MB ({host.get('detected_by')})",
+        f"# Generated {advice['generated_at']} by migrationctl config-advice. Review before use.",
+    ]
+    for note in advice.get("notes", []):
+        lines.append(f"# NOTE: {note}")
+    if advice.get("dropped"):
+        lines.append("# Source settings with no MariaDB equivalent:")
+        for d in advice["dropped"]:
+            lines.append(f"#   {d['name']} = {d['value']}  ({d['reason']})")
+    if advice.get("review"):
+        lines.append(f"# Also set on the source, review by hand: {', '.join(advice['review'])}")
+    lines += ["", "[mariadb]"]
+    for s in advice["profiles"][profile]["settings"]:
+        lines.append(f"# {s['reason']}")
+        lines.append(f"{s['name']} = {s['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_advice(advice: Mapping[str, Any], out_dir: Path) -> List[Path]:
+    d = out_dir / ADVICE_DIR
+    d.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for profile in PROFILES:
+        path = out_dir / advice["profiles"][profile]["file"]
+        path.write_text(render(advice, profile), encoding="utf-8")
+        paths.append(path)
+    return paths
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Mapping
+
+try:  # optional: faster/denser than gzip when installed
+    import zstandard
+except ImportError:  # pragma: no cover - depends on host packages
+    zstandard = None
+
+INDEX_FILE = "index.sqlite"
+CHUNK_BYTES = 1 << 20
+# The gzip fallback is single-threaded and sits on the binlog seed's critical
+# path, so it trades ratio for speed (level 1 is several times faster than 6).
+GZIP_LEVEL = 1
+# Unfinished puts older than this are treated as abandoned by gc().
+STALE_TMP_SECONDS = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+  digest TEXT PRIMARY KEY,
+  codec TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  stored_size INTEGER NOT NULL,
+  created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+  run_id TEXT PRIMARY KEY,
+  mode TEXT,
+  created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+  run_id TEXT NOT NULL,
+  name TEXT NOT NULL,
+  digest TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS artifacts_digest ON artifacts (digest);
+"""
+
+
+def default_codec() -> str:
+    return "zstd" if zstandard is not None else "gzip"
+
+
+@dataclass
+class RetentionPolicy:
+    """Which runs to keep; 0 disables a limit. The newest run is always kept."""
+
+    keep_runs: int = 10
+    max_age_days: int = 0
+    max_bytes: int = 0
+
+
+def retention_from_env(env: Mapping[str, str]) -> RetentionPolicy:
+    def _int(key: str, default: int) -> int:
+        value = str(env.get(key, "")).strip()
+        return int(value) if value.isdigit() else default
+
+    return RetentionPolicy(
+        keep_runs=_int("ARTIFACT_KEEP_RUNS", 10),
+        max_age_days=_int("ARTIFACT_MAX_AGE_DAYS", 0),
+        max_bytes=_int("ARTIFACT_MAX_BYTES", 0),
+    )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _ObjectReader:
+    """Wrap a compressed-object reader so callers get plain bytes."""
+
+    def __init__(self, fh: BinaryIO, inner: BinaryIO) -> None:
+        self._fh = fh
+        self._inner = inner
+
+    def read(self, n: int = -1) -> bytes:
+        return self._inner.read(n)
+
+    def close(self) -> None:
+        try:
+            self._inner.close()
+        finally:
+            self._fh.close()
+
+    def __enter__(self) -> "_ObjectReader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+@dataclass
+class ArtifactStore:
+    """Content-addressed, compressed artifact store with a run -> artifact index.
+
+    Layout under root:
+      objects/<aa>/<sha256>.<codec>   compressed content, one file per distinct payload
+      tmp/                            in-flight puts
+      index.sqlite                    objects, runs and artifacts(run_id, name -> digest)
+    """
+
+    root: Path
+    codec: str = ""
+
+    def __post_init__(self) -> None:
+        self.root = Path(self.root)
+        self.codec = self.codec or default_codec()
+        if self.codec == "zstd" and zstandard is None:
+            raise RuntimeError("zstd codec requested but the 'zstandard' package is not installed")
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        (self.root / "tmp").mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.root / INDEX_FILE), timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _object_path(self, digest: str, codec: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.{codec}"
+
+    def register_run(self, run_id: str, mode: str = "") -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, mode, created_at) VALUES (?, ?, ?)",
+                (run_id, mode, _now()),
+            )
+
+    def put_stream(self, run_id: str, name: str, stream: BinaryIO) -> Dict[str, Any]:
+        """Compress a stream into the store while hashing it; identical content is stored once."""
+        tmp = self.root / "tmp" / f"{os.getpid()}_{time.time_ns()}.{self.codec}"
+        sha = hashlib.sha256()
+        size = 0
+        try:
+            with tmp.open("wb") as raw:
+                if self.codec == "zstd":
+                    writer = zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(raw, closefd=False)
+                else:
+                    writer = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0)
+                with writer:
+                    while True:
+                        chunk = stream.read(CHUNK_BYTES)
+                        if not chunk:
+                            break
+                        sha.update(chunk)
+                        size += len(chunk)
+                        writer.write(chunk)
+            digest = sha.hexdigest()
+            with self._connect() as conn:
+                row = conn.execute("SELECT codec, stored_size FROM objects WHERE digest=?", (digest,)).fetchone()
+                if row and self._object_path(digest, row[0]).exists():
+                    tmp.unlink()
+                    codec, stored_size, deduplicated = row[0], row[1], True
+                else:
+                    dest = self._object_path(digest, self.codec)
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp, dest)
+                    codec, stored_size, deduplicated = self.codec, dest.stat().st_size, False
+                    conn.execute(
+                        "INSERT OR REPLACE INTO objects (digest, codec, size, stored_size, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (digest, codec, size, stored_size, _now()),
+                    )
+                conn.execute(
+                    "INSERT OR IGNORE INTO runs (run_id, mode, created_at) VALUES (?, '', ?)",
+                    (run_id, _now()),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO artifacts (run_id, name, digest, created_at) VALUES (?, ?, ?, ?)",
+                    (run_id, name, digest, _now()),
+                )
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return {
+            "run_id": run_id,
+            "name": name,
+            "digest": digest,
+            "codec": codec,
+            "size": size,
+            "stored_size": stored_size,
+            "deduplicated": deduplicated,
+        }
+
+    def put_file(self, run_id: str, name: str, path: Path) -> Dict[str, Any]:
+        with Path(path).open("rb") as fh:
+            return self.put_stream(run_id, name, fh)
+
+    def resolve(self, run_id: str = "", name: str = "", digest: str = "") -> Dict[str, Any]:
+        """Find an object by digest, or by (run, name); run may be omitted to take the newest."""
+        with self._connect() as conn:
+            if digest:
+                row = conn.execute(
+                    "SELECT digest, codec, size FROM objects WHERE digest=?", (digest,)
+                ).fetchone()
+            elif run_id:
+                row = conn.execute(
+                    "SELECT o.digest, o.codec, o.size FROM artifacts a JOIN objects o ON o.digest=a.digest "
+                    "WHERE a.run_id=? AND a.name=?",
+                    (run_id, name),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT o.digest, o.codec, o.size FROM artifacts a JOIN objects o ON o.digest=a.digest "
+                    "WHERE a.name=? ORDER BY a.created_at DESC LIMIT 1",
+                    (name,),
+                ).fetchone()
+        if not row:
+            what = digest or f"{run_id or '<latest>'}/{name}"
+            raise KeyError(f"artifact not found: {what}")
+        return {"digest": row[0], "codec": row[1], "size": row[2]}
+
+    def open(self, run_id: str = "", name: str = "", digest: str = "") -> _ObjectReader:
+        obj = self.resolve(run_id=run_id, name=name, digest=digest)
+        path = self._object_path(obj["digest"], obj["codec"])
+        fh = path.open("rb")
+        if obj["codec"] == "zstd":
+            if zstandard is None:
+                fh.close()
+                raise RuntimeError(f"{path} is zstd-compressed but the 'zstandard' package is not installed")
+            inner = zstandard.ZstdDecompressor().stream_reader(fh, closefd=False)
+        else:
+            inner = gzip.GzipFile(fileobj=fh, mode="rb")
+        return _ObjectReader(fh, inner)
+
+    def iter_bytes(self, run_id: str = "", name: str = "", digest: str = "") -> Iterator[bytes]:
+        with self.open(run_id=run_id, name=name, digest=digest) as reader:
+            while True:
+                chunk = reader.read(CHUNK_BYTES)
+                if not chunk:
+                    return
+                yield chunk
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT r.run_id, r.mode, r.created_at, COUNT(a.name), COALESCE(SUM(o.size), 0), "
+                "COALESCE(SUM(o.stored_size), 0) "
+                "FROM runs r LEFT JOIN artifacts a ON a.run_id=r.run_id "
+                "LEFT JOIN objects o ON o.digest=a.digest "
+                "GROUP BY r.run_id ORDER BY r.created_at DESC"
+            ).fetchall()
+        return [
+            {"run_id": r[0], "mode": r[1], "created_at": r[2], "artifacts": r[3], "size": r[4], "stored_size": r[5]}
+            for r in rows
+        ]
+
+    def list_artifacts(self, run_id: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT a.name, a.digest, o.codec, o.size, o.stored_size, a.created_at "
+                "FROM artifacts a JOIN objects o ON o.digest=a.digest WHERE a.run_id=? ORDER BY a.name",
+                (run_id,),
+            ).fetchall()
+        return [
+            {"name": r[0], "digest": r[1], "codec": r[2], "size": r[3], "stored_size": r[4], "created_at": r[5]}
+            for r in rows
+        ]
+
+    def usage(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            objects, size, stored = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM objects"
+            ).fetchone()
+            logical = conn.execute(
+                "SELECT COALESCE(SUM(o.size), 0) FROM artifacts a JOIN objects o ON o.digest=a.digest"
+            ).fetchone()[0]
+        return {"objects": objects, "size": size, "stored_size": stored, "logical_size": logical}
+
+    def gc(self, policy: RetentionPolicy, dry_run: bool = False) -> Dict[str, Any]:
+        """Drop runs outside the retention policy, then delete objects no run references."""
+        with self._connect() as conn:
+            runs = conn.execute("SELECT run_id, created_at FROM runs ORDER BY created_at DESC").fetchall()
+            keep = [r[0] for r in runs]
+            if policy.keep_runs > 0:
+                keep = keep[: policy.keep_runs]
+            if policy.max_age_days > 0:
+                cutoff = (datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)).isoformat()
+                created = dict(runs)
+                keep = [r for i, r in enumerate(keep) if i == 0 or created[r] >= cutoff]
+            if policy.max_bytes > 0:
+                sized: List[str] = []
+                seen: set = set()
+                total = 0
+                for i, run_id in enumerate(keep):
+                    run_objects = conn.execute(
+                        "SELECT DISTINCT o.digest, o.stored_size FROM artifacts a "
+                        "JOIN objects o ON o.digest=a.digest WHERE a.run_id=?",
+                        (run_id,),
+                    ).fetchall()
+                    extra = sum(s for d, s in run_objects if d not in seen)
+                    if i > 0 and total + extra > policy.max_bytes:
+                        break
+                    total += extra
+                    seen.update(d for d, _ in run_objects)
+                    sized.append(run_id)
+                keep = sized
+            drop = [r[0] for r in runs if r[0] not in set(keep)]
+
+            if not dry_run and drop:
+                conn.executemany("DELETE FROM artifacts WHERE run_id=?", [(r,) for r in drop])
+                conn.executemany("DELETE FROM runs WHERE run_id=?", [(r,) for r in drop])
+            if dry_run:
+                orphans = conn.execute(
+                    "SELECT digest, codec, stored_size FROM objects WHERE digest NOT IN "
+                    "(SELECT digest FROM artifacts WHERE run_id NOT IN (%s))" % ",".join("?" * len(drop)),
+                    drop,
+                ).fetchall()
+            else:
+                orphans = conn.execute(
+                    "SELECT digest, codec, stored_size FROM objects "
+                    "WHERE digest NOT IN (SELECT digest FROM artifacts)"
+                ).fetchall()
+                conn.executemany("DELETE FROM objects WHERE digest=?", [(o[0],) for o in orphans])
+
+        freed = 0
+        for digest, codec, stored_size in orphans:
+            freed += stored_size
+            if not dry_run:
+                path = self._object_path(digest, codec)
+                if path.exists():
+                    path.unlink()
+        if not dry_run:
+            horizon = time.time() - STALE_TMP_SECONDS
+            for tmp in (self.root / "tmp").iterdir():
+                if tmp.stat().st_mtime < horizon:
+                    tmp.unlink()
+        return {"runs_dropped": drop, "objects_deleted": len(orphans), "bytes_freed": freed, "dry_run": dry_run}
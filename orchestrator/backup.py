@@ -0,0 +1,732 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .dbclient import SYSTEM_SCHEMAS, Endpoint, query, query_value, sql_quote
+from .governor import Governor, govern_stream
+
+BACKUP_MANIFEST = "manifest.json"
+BACKUP_REPORT = "backup.json"
+CHUNK = 1 << 20
+# Both mysqldump and mariadb-dump end a complete dump with this comment.
+_DUMP_TRAILER = b"-- Dump completed"
+# (compress argv, decompress argv, suffix); {threads} is filled per job.
+COMPRESSORS: Dict[str, Tuple[List[str], List[str], str]] = {
+    "zstd": (["zstd", "-q", "-c", "-T{threads}"], ["zstd", "-q", "-dc"], ".zst"),
+    "pigz": (["pigz", "-c", "-p", "{threads}"], ["pigz", "-dc"], ".gz"),
+    "gzip": (["gzip", "-c"], ["gzip", "-dc"], ".gz"),
+    "none": ([], [], ""),
+}
+_PREFERRED = ("zstd", "pigz", "gzip")
+_SAFE = re.compile(r"[^A-Za-z0-9_$-]")
+# Datadir entries below this size are archived together.
+_SMALL_ENTRY = 64 << 20
+_CONFIG_PATHS = ("/etc/mysql", "/etc/my.cnf", "/etc/my.cnf.d")
+
+
+@dataclass
+class BackupFile:
+    name: str
+    contents: List[str]
+    est_bytes: int = 0
+    size: int = 0
+    sha256: str = ""
+    raw_bytes: int = 0
+    seconds: float = 0.0
+    verified: Optional[bool] = None
+    warning: str = ""
+    error: str = ""
+
+
+def _safe(name: str) -> str:
+    return _SAFE.sub(lambda m: "@%04x" % ord(m.group(0)), name)
+
+
+def pick_compressor(preferred: str, available: Callable[[str], bool]) -> str:
+    """Resolve `auto` to the fastest installed compressor; reject unknown or missing ones."""
+    if preferred in ("", "auto"):
+        return next((c for c in _PREFERRED if available(c)), "none")
+    if preferred not in COMPRESSORS:
+        raise ValueError(f"unknown compressor {preferred} (expected auto, {', '.join(COMPRESSORS)})")
+    if preferred != "none" and not available(preferred):
+        raise RuntimeError(f"compressor not found: {preferred}")
+    return preferred
+
+
+def _argv(compressor: str, which: int, threads: int) -> List[str]:
+    return [a.replace("{threads}", str(max(1, threads))) for a in COMPRESSORS[compressor][which]]
+
+
+def _balance(items: Sequence[Tuple[str, int]], buckets: int) -> List[List[Tuple[str, int]]]:
+    """Largest-first assignment to the least loaded bucket."""
+    out: List[List[Tuple[str, int]]] = [[] for _ in range(max(1, buckets))]
+    load = [0] * len(out)
+    for item in sorted(items, key=lambda x: -x[1]):
+        i = load.index(min(load))
+        out[i].append(item)
+        load[i] += item[1]
+    return [b for b in out if b]
+
+
+def _run_pool(files: List[BackupFile], threads: int, work: Callable[[BackupFile], None]) -> None:
+    """Run work() over files, largest first, on at most `threads` threads; errors land on the file."""
+    pending = sorted(files, key=lambda f: -f.est_bytes)
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if not pending:
+                    return
+                f = pending.pop(0)
+            try:
+                work(f)
+            except (OSError, RuntimeError, ValueError) as exc:
+                f.error = str(exc)
+
+    pool = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(threads, len(files))))]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+class _SnapshotLock:
+    """A global read lock held only while the dump workers open their snapshots."""
+
+    def __init__(self, ep: Endpoint, wait_s: int):
+        try:
+            self.proc = subprocess.Popen(
+                ep.argv("--batch", "--skip-column-names", "--unbuffered"),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, env=ep.env(),
+            )
+        except FileNotFoundError:
+            raise RuntimeError(f"client not found: {ep.client_bin}")
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        self.proc.stdin.write(
+            f"SET SESSION lock_wait_timeout={int(wait_s)};\nFLUSH TABLES WITH READ LOCK;\nSELECT CONNECTION_ID();\n"
+        )
+        self.proc.stdin.flush()
+        line = self.proc.stdout.readline().strip()
+        if not line.isdigit():
+            self.proc.kill()
+            err = self.proc.stderr.read().strip().replace("\n", " ") if self.proc.stderr else ""
+            self.proc.wait()
+            raise RuntimeError(f"FLUSH TABLES WITH READ LOCK failed on {ep.label()}: {err[:240]}")
+        self.connection_id = int(line)
+
+    def release(self) -> None:
+        if self.proc.poll() is None:
+            try:
+                self.proc.stdin.write("UNLOCK TABLES;\n")
+                self.proc.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+
+def _wait_for_snapshots(ep: Endpoint, after_id: int, procs: List[subprocess.Popen], wait_s: int,
+                        log: Optional[Callable[[str], None]] = None) -> bool:
+    """Wait until every dump worker has an open InnoDB snapshot; False on timeout or failure.
+
+    Sessions are matched on the `_pid` connection attribute, which mysqldump and
+    mariadb-dump send, so other transactions of the same user do not count. A
+    worker that already exited 0 took its whole dump under the lock and counts.
+    """
+    log = log or (lambda _msg: None)
+    deadline = time.time() + wait_s
+    while time.time() < deadline:
+        if any(p.poll() not in (None, 0) for p in procs):
+            return False
+        live = [p for p in procs if p.poll() is None]
+        if not live:
+            return True
+        pids = ", ".join(sql_quote(str(p.pid)) for p in live)
+        sql = (
+            "SELECT COUNT(DISTINCT t.trx_mysql_thread_id) FROM information_schema.INNODB_TRX t "
+            "JOIN performance_schema.session_connect_attrs a ON a.PROCESSLIST_ID = t.trx_mysql_thread_id "
+            f"WHERE a.PROCESSLIST_ID > {after_id} AND a.ATTR_NAME = '_pid' AND a.ATTR_VALUE IN ({pids})"
+        )
+        try:
+            opened = int(query_value(ep, sql) or 0)
+        except RuntimeError as exc:
+            log(f"WARN: cannot match dump sessions (performance_schema.session_connect_attrs): {exc}")
+            return False
+        if opened >= len(live):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def _options_file(ignore: Sequence[str]) -> Path:
+    """Write --ignore-table entries to an option file; one per line keeps argv small for any table count."""
+    fd, name = tempfile.mkstemp(prefix="backup_", suffix=".cnf")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        # [mysqldump] is read by both mysqldump and mariadb-dump.
+        fh.write("[mysqldump]\n")
+        for t in ignore:
+            fh.write('ignore-table="' + t.replace("\\", "\\\\").replace("\n", "\\n") + '"\n')
+    return Path(name)
+
+
+def _pump(stream: BinaryIO, sink: BinaryIO, gov: Governor) -> None:
+    """Copy one worker's dump into its compressor (or file pipe) under the governor."""
+    try:
+        govern_stream(stream, sink, gov)
+    except OSError:
+        pass
+    finally:
+        stream.close()
+        try:
+            sink.close()
+        except OSError:
+            pass
+
+
+def _start_dump(dump: Endpoint, args: List[str], compressor: str, threads: int, path: Path,
+                ignore: Sequence[str] = (), gov: Optional[Governor] = None) -> Dict[str, Any]:
+    cmd = dump.argv(*args)
+    options = None
+    if ignore:
+        # --defaults-extra-file must come first; the dump client runs locally.
+        options = _options_file(ignore)
+        cmd.insert(1, f"--defaults-extra-file={options}")
+    errors = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors, env=dump.env())
+    except FileNotFoundError:
+        errors.close()
+        if options is not None:
+            options.unlink()
+        raise RuntimeError(f"dump client not found: {dump.client_bin}")
+    job: Dict[str, Any] = {"dump": proc, "comp": None, "errors": errors, "path": path, "options": options,
+                           "stream": None, "pump": None}
+    if gov is not None:
+        # dump -> governor -> compressor (or a pipe to the file writer), so the
+        # dump client blocks on write whenever the source needs relief.
+        if compressor != "none":
+            job["comp"] = subprocess.Popen(
+                _argv(compressor, 0, threads), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=errors
+            )
+            sink = job["comp"].stdin
+        else:
+            r, w = os.pipe()
+            job["stream"], sink = os.fdopen(r, "rb"), os.fdopen(w, "wb")
+        job["pump"] = threading.Thread(target=_pump, args=(proc.stdout, sink, gov), daemon=True)
+        job["pump"].start()
+    elif compressor != "none":
+        job["comp"] = subprocess.Popen(
+            _argv(compressor, 0, threads), stdin=proc.stdout, stdout=subprocess.PIPE, stderr=errors
+        )
+        proc.stdout.close()
+    return job
+
+
+def _finish_dump(job: Dict[str, Any], f: BackupFile) -> None:
+    """Write the (compressed) stream to disk, hashing it on the way."""
+    out = job["stream"] or (job["comp"] or job["dump"]).stdout
+    digest = hashlib.sha256()
+    tmp = job["path"].with_name(job["path"].name + ".part")
+    size = 0
+    try:
+        with tmp.open("wb") as fh:
+            for chunk in iter(lambda: out.read(CHUNK), b""):
+                digest.update(chunk)
+                fh.write(chunk)
+                size += len(chunk)
+        out.close()
+        if job["pump"] is not None:
+            job["pump"].join()
+        rcs = [job["dump"].wait()] + ([job["comp"].wait()] if job["comp"] else [])
+        if any(rcs):
+            job["errors"].seek(0)
+            err = job["errors"].read().decode("utf-8", "replace").strip().replace("\n", " ")
+            raise RuntimeError(f"dump failed rc={rcs}: {err[-240:]}")
+        tmp.replace(job["path"])
+    finally:
+        _release(job)
+        if tmp.exists():
+            tmp.unlink()
+    f.size, f.sha256 = size, digest.hexdigest()
+
+
+def _release(job: Dict[str, Any]) -> None:
+    """Close a dump job's error file, kill what is still running and drop its option file."""
+    job["errors"].close()
+    for p in (job["dump"], job["comp"]):
+        if p is not None and p.poll() is None:
+            p.kill()
+            p.wait()
+    if job["stream"] is not None:
+        job["stream"].close()
+    if job["options"] is not None and job["options"].exists():
+        job["options"].unlink()
+
+
+def _verify_local(path: Path, f: BackupFile, compressor: str) -> None:
+    """Re-read one file: checksum, decompress as a stream, and check the dump trailer."""
+    digest = hashlib.sha256()
+    tail = b""
+    raw = 0
+    if compressor == "none":
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(CHUNK), b""):
+                digest.update(chunk)
+                tail = (tail + chunk)[-4096:]
+                raw += len(chunk)
+        rc = 0
+    else:
+        proc = subprocess.Popen(_argv(compressor, 1, 1), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL)
+
+        def feed() -> None:
+            try:
+                with path.open("rb") as fh:
+                    for chunk in iter(lambda: fh.read(CHUNK), b""):
+                        digest.update(chunk)
+                        proc.stdin.write(chunk)
+            except BrokenPipeError:
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        for chunk in iter(lambda: proc.stdout.read(CHUNK), b""):
+            tail = (tail + chunk)[-4096:]
+            raw += len(chunk)
+        feeder.join()
+        proc.stdout.close()
+        rc = proc.wait()
+    f.raw_bytes = raw
+    problems = []
+    if digest.hexdigest() != f.sha256:
+        problems.append("checksum mismatch")
+    if rc != 0:
+        problems.append(f"decompression failed rc={rc}")
+    if _DUMP_TRAILER not in tail:
+        problems.append("dump is truncated (no completion trailer)")
+    f.verified = not problems
+    if problems:
+        f.error = "; ".join(problems)
+
+
+def _manifest(kind: str, location: str, source: str, compressor: str, consistency: str,
+              files: List[BackupFile], started: float) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "location": location,
+        "source": source,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "compressor": compressor,
+        "consistency": consistency,
+        "duration_s": round(time.time() - started, 1),
+        "total_bytes": sum(f.size for f in files),
+        "raw_bytes": sum(f.raw_bytes for f in files),
+        "verified": all(f.verified for f in files),
+        "ok": all(not f.error for f in files),
+        "files": [dataclasses.asdict(f) for f in files],
+    }
+
+
+def logical_backup(
+    src: Endpoint,
+    dump_bin: str,
+    backup_dir: Path,
+    schemas: Sequence[str] = (),
+    threads: int = 4,
+    compressor: str = "auto",
+    consistent: bool = True,
+    lock_wait_s: int = 30,
+    gov: Optional[Governor] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Dump the source with parallel workers, one compressed file each, and verify every file.
+
+    Tables are spread over `threads` workers by size. Each worker is one dump
+    process in one --single-transaction snapshot; with `consistent`, a global
+    read lock is held only until every worker has opened its snapshot, so all
+    files describe the same point in time. The schema (with routines and
+    events), the triggers and the mysql system schema are dumped by their own
+    workers; triggers are kept out of the schema file so that loading the data
+    does not fire them. The manifest records the order to restore in. With
+    `gov`, every worker's stream passes through the governor, which shares
+    its byte/row budgets between them and pauses them all on bad source health.
+    """
+    log = log or (lambda _msg: None)
+    started = time.time()
+    compressor = pick_compressor(compressor, lambda c: shutil.which(c) is not None)
+    suffix = COMPRESSORS[compressor][2]
+    wanted = [s.strip() for s in schemas if s.strip()]
+    where = f"TABLE_SCHEMA NOT IN ({', '.join(sql_quote(s) for s in SYSTEM_SCHEMAS)})"
+    if wanted:
+        where += f" AND TABLE_SCHEMA IN ({', '.join(sql_quote(s) for s in wanted)})"
+    dbs = [r[0] for r in query(src, f"SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE "
+                                    f"{where.replace('TABLE_SCHEMA', 'SCHEMA_NAME')} ORDER BY SCHEMA_NAME")]
+    if not dbs:
+        raise RuntimeError("no schemas to back up")
+    tables = [
+        (f"{r[0]}.{r[1]}", int(r[2] or 0))
+        for r in query(src, "SELECT TABLE_SCHEMA, TABLE_NAME, COALESCE(DATA_LENGTH, 0) + COALESCE(INDEX_LENGTH, 0) "
+                            f"FROM information_schema.TABLES WHERE TABLE_TYPE = 'BASE TABLE' AND {where}")
+    ]
+    dump = dataclasses.replace(src, client_bin=dump_bin)
+    common = ["--single-transaction", "--quick", "--no-tablespaces", "--default-character-set=utf8mb4"]
+    if Path(dump_bin).name == "mysqldump":
+        common.append("--set-gtid-purged=OFF")
+
+    # (file, dump arguments, tables to skip); the skip list goes into an option
+    # file, since a schema with tens of thousands of tables would overflow argv.
+    plans: List[Tuple[BackupFile, List[str], List[str]]] = [(
+        BackupFile(f"schema.sql{suffix}", [f"{d} (schema)" for d in dbs]),
+        common + ["--no-data", "--routines", "--events", "--skip-triggers", "--databases", *dbs],
+        [],
+    )]
+    if not wanted:
+        plans.append((BackupFile(f"mysql.sql{suffix}", ["mysql"]), common + ["--databases", "mysql"], []))
+    buckets = _balance(tables, threads)
+    for i, bucket in enumerate(buckets):
+        names = {t for t, _ in bucket}
+        bucket_dbs = sorted({t.split(".", 1)[0] for t in names})
+        ignore = [t for t, _ in tables if t.split(".", 1)[0] in bucket_dbs and t not in names]
+        plans.append((
+            BackupFile(f"data.{i + 1:03d}.sql{suffix}", sorted(names), est_bytes=sum(s for _, s in bucket)),
+            common + ["--no-create-info", "--no-create-db", "--skip-triggers", "--databases", *bucket_dbs],
+            ignore,
+        ))
+    plans.append((
+        BackupFile(f"triggers.sql{suffix}", [f"{d} (triggers)" for d in dbs]),
+        common + ["--no-data", "--no-create-info", "--no-create-db", "--skip-routines", "--skip-events",
+                  "--triggers", "--databases", *dbs],
+        [],
+    ))
+
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    comp_threads = max(1, (os.cpu_count() or 1) // len(plans))
+    log(f"BACKUP {len(tables)} table(s) in {len(dbs)} schema(s) -> {len(plans)} file(s), {compressor}, {backup_dir}")
+    lock: Optional[_SnapshotLock] = None
+    consistency = "per_file"
+    locked_at = time.time()
+    if consistent:
+        try:
+            lock = _SnapshotLock(src, lock_wait_s)
+        except RuntimeError as exc:
+            log(f"WARN: {exc}; files are each consistent but not with one another")
+    jobs: List[Dict[str, Any]] = []
+    try:
+        for f, args, ignore in plans:
+            jobs.append(_start_dump(dump, args, compressor, comp_threads, backup_dir / f.name, ignore, gov))
+        if lock is not None:
+            if _wait_for_snapshots(src, lock.connection_id, [j["dump"] for j in jobs], lock_wait_s, log):
+                consistency = "snapshot"
+            else:
+                log("WARN: not every dump worker opened its snapshot in time; files may differ in point in time")
+    except BaseException:
+        for j in jobs:
+            _release(j)
+        raise
+    finally:
+        if lock is not None:
+            lock.release()
+            log(f"BACKUP global read lock held {time.time() - locked_at:.1f}s")
+
+    threads_out = [threading.Thread(target=_collect, args=(j, p[0]), daemon=True) for j, p in zip(jobs, plans)]
+    for t in threads_out:
+        t.start()
+    for t in threads_out:
+        t.join()
+    files = [p[0] for p in plans]
+    for f in files:
+        if not f.error:
+            log(f"BACKUP {f.name}: {f.size} bytes in {f.seconds:.1f}s")
+    verify_files(backup_dir, files, compressor, threads, log)
+    manifest = _manifest("logical", str(backup_dir), src.label(), compressor, consistency, files, started)
+    manifest["restore_order"] = _restore_order([f.name for f in files])
+    (backup_dir / BACKUP_MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _restore_order(names: Sequence[str]) -> List[List[str]]:
+    """Restore phases: schema, mysql, the data files (any order, in parallel), then triggers."""
+    phases: List[List[str]] = [[], [], [], []]
+    for name in names:
+        prefix = name.split(".", 1)[0]
+        phases[{"schema": 0, "mysql": 1, "triggers": 3}.get(prefix, 2)].append(name)
+    return [p for p in phases if p]
+
+
+def _collect(job: Dict[str, Any], f: BackupFile) -> None:
+    started = time.time()
+    try:
+        _finish_dump(job, f)
+    except (OSError, RuntimeError) as exc:
+        f.error = str(exc)
+    f.seconds = round(time.time() - started, 1)
+
+
+def verify_files(backup_dir: Path, files: List[BackupFile], compressor: str, threads: int,
+                 log: Optional[Callable[[str], None]] = None) -> None:
+    log = log or (lambda _msg: None)
+    todo = [f for f in files if not f.error]
+    _run_pool(todo, threads, lambda f: _verify_local(backup_dir / f.name, f, compressor))
+    for f in todo:
+        log(f"VERIFY {f.name}: {'OK' if f.verified else 'FAILED ' + f.error}")
+
+
+def verify_manifest(path: Path, threads: int = 4, log: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Re-check a logical backup against its manifest; returns the manifest with fresh results."""
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("kind") != "logical":
+        raise ValueError(f"{path} is a {manifest.get('kind')} backup; datadir archives are verified on the host")
+    files = [BackupFile(**{**f, "verified": None, "error": ""}) for f in manifest["files"]]
+    missing = [f for f in files if not (path.parent / f.name).exists()]
+    for f in missing:
+        f.error = "file missing"
+    verify_files(path.parent, files, manifest["compressor"], threads, log)
+    manifest["files"] = [dataclasses.asdict(f) for f in files]
+    manifest["verified"] = all(f.verified for f in files)
+    manifest["ok"] = all(not f.error for f in files)
+    manifest["verified_at"] = datetime.now(timezone.utc).isoformat()
+    return manifest
+
+
+def _load_file(path: Path, compressor: str, tgt: Endpoint) -> None:
+    """Stream one dump file through the decompressor into the client."""
+    errors = tempfile.TemporaryFile()
+    procs: List[subprocess.Popen] = []
+    try:
+        with path.open("rb") as fh:
+            feed: Any = fh
+            if compressor != "none":
+                procs.append(subprocess.Popen(_argv(compressor, 1, 1), stdin=fh, stdout=subprocess.PIPE, stderr=errors))
+                feed = procs[0].stdout
+            try:
+                procs.append(subprocess.Popen(tgt.argv("--binary-mode"), stdin=feed, stdout=subprocess.DEVNULL,
+                                              stderr=errors, env=tgt.env()))
+            except FileNotFoundError:
+                raise RuntimeError(f"client not found: {tgt.client_bin}")
+            finally:
+                if feed is not fh:
+                    feed.close()
+            rcs = [p.wait() for p in procs]
+        if any(rcs):
+            errors.seek(0)
+            err = errors.read().decode("utf-8", "replace").strip().replace("\n", " ")
+            raise RuntimeError(f"restore failed rc={rcs}: {err[-240:]}")
+    finally:
+        errors.close()
+        for p in procs:
+            if p.poll() is None:
+                p.kill()
+                p.wait()
+
+
+def restore_manifest(
+    path: Path,
+    tgt: Endpoint,
+    threads: int = 4,
+    skip_mysql: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Verify a logical backup, then load it into `tgt` in the manifest's restore order.
+
+    Each phase finishes before the next starts, and the data files of one
+    phase load in parallel. Nothing is loaded unless every file verifies, and
+    a failed phase stops the restore so triggers never land on partial data.
+    Manifests written before restore_order existed load file by file.
+    """
+    log = log or (lambda _msg: None)
+    started = time.time()
+    manifest = verify_manifest(path, threads, log)
+    if not (manifest["ok"] and manifest["verified"]):
+        raise RuntimeError(f"{path} failed verification; nothing restored")
+    sizes = {f["name"]: int(f["raw_bytes"] or f["size"] or 0) for f in manifest["files"]}
+    phases = manifest.get("restore_order") or [[f["name"]] for f in manifest["files"]]
+
+    def load(f: BackupFile) -> None:
+        begun = time.time()
+        try:
+            _load_file(path.parent / f.name, manifest["compressor"], tgt)
+        finally:
+            f.seconds = round(time.time() - begun, 1)
+
+    files: List[BackupFile] = []
+    ok = True
+    for phase in phases:
+        todo = [BackupFile(n, [], est_bytes=sizes.get(n, 0)) for n in phase
+                if not (skip_mysql and n.startswith("mysql."))]
+        if not todo:
+            continue
+        _run_pool(todo, threads, load)
+        for f in todo:
+            log(f"RESTORE {f.name}: {'FAILED ' + f.error if f.error else 'OK'} in {f.seconds}s")
+        files.extend(todo)
+        if any(f.error for f in todo):
+            ok = False
+            break
+    return {
+        "manifest": str(path),
+        "target": tgt.label(),
+        "restore_order": phases,
+        "duration_s": round(time.time() - started, 1),
+        "files": [{"name": f.name, "seconds": f.seconds, "error": f.error} for f in files],
+        "ok": ok,
+    }
+
+
+class _Host:
+    """Runs bash scripts on the target host over ssh (optionally under sudo)."""
+
+    def __init__(self, env: Mapping[str, str], sudo: str):
+        host = str(env.get("TGT_SSH_HOST", "")).strip()
+        if not host:
+            raise RuntimeError("TGT_SSH_HOST is required for a datadir backup")
+        user = str(env.get("TGT_SSH_USER", "root")).strip() or "root"
+        self.label = f"{user}@{host}"
+        self.ssh = ["ssh", *shlex.split(str(env.get("TGT_SSH_OPTS", ""))), self.label]
+        self.sudo = sudo.strip()
+
+    def run(self, script: str, stdin: Optional[str] = None, timeout: Optional[float] = None) -> List[str]:
+        remote = f"bash -c {shlex.quote(script)}"
+        if self.sudo:
+            remote = f"{self.sudo} {remote}"
+        try:
+            p = subprocess.run(self.ssh + [remote], input=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, timeout=timeout)
+        except FileNotFoundError:
+            raise RuntimeError("ssh client not found")
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"command timed out on {self.label}")
+        if p.returncode != 0:
+            raise RuntimeError(f"command failed on {self.label} rc={p.returncode}: {p.stderr.strip()[-240:]}")
+        return p.stdout.splitlines()
+
+
+def datadir_backup(
+    env: Mapping[str, str],
+    backup_dir: str,
+    datadir: str = "/var/lib/mysql",
+    threads: int = 4,
+    compressor: str = "auto",
+    sudo: str = "sudo",
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Archive the target host's datadir as parallel compressed tar files, then verify them.
+
+    Each database directory (and the server files, grouped) becomes its own
+    archive, so `threads` archives are written at once; the checksum is taken
+    from the stream as it is written. Verification decompresses and lists each
+    archive without extracting it. The manifest is written next to the archives.
+    """
+    log = log or (lambda _msg: None)
+    started = time.time()
+    host = _Host(env, sudo)
+    q = shlex.quote
+    found = set(host.run("for c in " + " ".join(_PREFERRED) + '; do command -v "$c" >/dev/null && echo "$c"; done || true'))
+    compressor = pick_compressor(compressor, lambda c: c in found)
+    suffix = COMPRESSORS[compressor][2]
+    entries: List[Tuple[str, int]] = []
+    for line in host.run(f"cd {q(datadir)} && du -s -B1 -- * 2>/dev/null || true", timeout=600):
+        size, _, name = line.partition("\t")
+        if name and size.isdigit():
+            entries.append((name, int(size)))
+    if not entries:
+        raise RuntimeError(f"datadir {datadir} is empty or unreadable on {host.label}")
+    config = host.run("for p in " + " ".join(_CONFIG_PATHS) + '; do [ -e "$p" ] && echo "${p#/}"; done || true')
+
+    files: List[BackupFile] = []
+    small = [e for e in entries if e[1] < _SMALL_ENTRY]
+    for name, size in entries:
+        if size >= _SMALL_ENTRY:
+            files.append(BackupFile(f"datadir.{_safe(name)}.tar{suffix}", [name], est_bytes=size))
+    if small:
+        files.append(BackupFile(f"datadir._small.tar{suffix}", [n for n, _ in small], est_bytes=sum(s for _, s in small)))
+    if config:
+        files.append(BackupFile(f"config.tar{suffix}", [f"/{p}" for p in config]))
+    total = sum(f.est_bytes for f in files)
+    host.run(f"mkdir -p {q(backup_dir)}")
+    avail = host.run(f"df -P -B1 {q(backup_dir)} | awk 'NR==2 {{print $4}}'")
+    if avail and avail[0].isdigit() and int(avail[0]) < total // 2:
+        log(f"WARN: {backup_dir} has {int(avail[0]) >> 20} MB free for a {total >> 20} MB datadir")
+    cpus = host.run("nproc || echo 1")
+    comp_threads = max(1, int(cpus[0]) // max(1, threads)) if cpus and cpus[0].isdigit() else 1
+    compress = " ".join(q(a) for a in _argv(compressor, 0, comp_threads)) or "cat"
+    decompress = " ".join(q(a) for a in _argv(compressor, 1, 1)) or "cat"
+    log(f"BACKUP datadir {datadir} on {host.label}: {total >> 20} MB in {len(files)} archive(s), {compressor}")
+
+    def archive(f: BackupFile) -> None:
+        begun = time.time()
+        out = q(f"{backup_dir.rstrip('/')}/{f.name}")
+        if f.name.startswith("config."):
+            src = "-C / " + " ".join(q(p.lstrip("/")) for p in f.contents)
+        else:
+            src = f"-C {q(datadir)} " + " ".join(q(n) for n in f.contents)
+        lines = host.run(
+            f"tar -cf - {src} | {compress} | tee {out} | sha256sum; s=(\"${{PIPESTATUS[@]}}\"); "
+            f"echo \"rc ${{s[*]}}\"; stat -c %s {out}"
+        )
+        if len(lines) < 3:
+            raise RuntimeError(f"unexpected output: {lines}")
+        rcs = [int(x) for x in lines[1].split()[1:]]
+        if rcs[0] == 1:
+            f.warning = "files changed while being archived"
+        if rcs[0] > 1 or any(rcs[1:]):
+            raise RuntimeError(f"archive failed rc={rcs}")
+        f.sha256, f.size = lines[0].split()[0], int(lines[2])
+        f.seconds = round(time.time() - begun, 1)
+        log(f"BACKUP {f.name}: {f.size} bytes{' (' + f.warning + ')' if f.warning else ''}")
+
+    def verify(f: BackupFile) -> None:
+        out = q(f"{backup_dir.rstrip('/')}/{f.name}")
+        lines = host.run(
+            f"sha256sum < {out} > {out}.sum & {decompress} < {out} | tar -tvf - | "
+            f"awk '{{n++; s+=$3}} END {{print n+0, s+0}}'; s=(\"${{PIPESTATUS[@]}}\"); wait $!; "
+            f"echo \"rc ${{s[*]}}\"; cut -d' ' -f1 {out}.sum; rm -f {out}.sum"
+        )
+        count, raw = (int(x) for x in lines[0].split())
+        rcs = [int(x) for x in lines[1].split()[1:]]
+        problems = []
+        if lines[2].strip() != f.sha256:
+            problems.append("checksum mismatch")
+        if any(rcs) or not count:
+            problems.append(f"archive unreadable rc={rcs}")
+        f.raw_bytes = raw
+        f.verified = not problems
+        if problems:
+            f.error = "; ".join(problems)
+        log(f"VERIFY {f.name}: {'OK' if f.verified else 'FAILED ' + f.error}")
+
+    _run_pool(files, threads, archive)
+    _run_pool([f for f in files if not f.error], threads, verify)
+    manifest = _manifest("datadir", f"{host.label}:{backup_dir}", datadir, compressor, "file_copy", files, started)
+    host.run(f"cat > {q(backup_dir.rstrip('/') + '/' + BACKUP_MANIFEST)}", stdin=json.dumps(manifest, indent=2))
+    return manifest
+
+
+def write_backup(manifest: Dict[str, Any], out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / BACKUP_REPORT
+    path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .dbclient import Endpoint, SYSTEM_SCHEMAS, iter_query, sql_quote
+
+CATALOG_FILE = "catalog.sqlite"
+BATCH_ROWS = 5000
+
+_SYSTEM_FILTER = ", ".join(sql_quote(s) for s in SYSTEM_SCHEMAS)
+
+
+@dataclass
+class SnapshotTable:
+    """One source relation copied into the local catalog.
+
+    name: table name in the catalog
+    source: fully qualified source relation (schema.table)
+    columns: source column names; copied lower-cased, NULL when the server lacks them
+    where: optional filter applied on the source
+    sql: explicit query (used instead of columns/where); must return `columns` in order
+    """
+
+    name: str
+    source: str
+    columns: List[str]
+    where: str = ""
+    sql: str = ""
+    indexes: List[Tuple[str, ...]] = field(default_factory=list)
+
+
+SNAPSHOT_TABLES: List[SnapshotTable] = [
+    SnapshotTable(
+        "schemata", "information_schema.SCHEMATA",
+        ["SCHEMA_NAME", "DEFAULT_CHARACTER_SET_NAME", "DEFAULT_COLLATION_NAME"],
+        indexes=[("schema_name",)],
+    ),
+    SnapshotTable(
+        "tables", "information_schema.TABLES",
+        ["TABLE_SCHEMA", "TABLE_NAME", "TABLE_TYPE", "ENGINE", "ROW_FORMAT", "TABLE_ROWS",
+         "AVG_ROW_LENGTH", "DATA_LENGTH", "INDEX_LENGTH", "TABLE_COLLATION", "CREATE_OPTIONS"],
+        indexes=[("table_schema", "table_name"), ("table_collation",)],
+    ),
+    SnapshotTable(
+        "columns", "information_schema.COLUMNS",
+        ["TABLE_SCHEMA", "TABLE_NAME", "COLUMN_NAME", "ORDINAL_POSITION", "COLUMN_DEFAULT", "IS_NULLABLE",
+         "DATA_TYPE", "COLUMN_TYPE", "CHARACTER_SET_NAME", "COLLATION_NAME", "EXTRA", "SRS_ID",
+         "GENERATION_EXPRESSION"],
+        where=f"TABLE_SCHEMA NOT IN ({_SYSTEM_FILTER})",
+        indexes=[("table_schema", "table_name", "column_name"), ("data_type",), ("collation_name",)],
+    ),
+    SnapshotTable(
+        "statistics", "information_schema.STATISTICS",
+        ["TABLE_SCHEMA", "TABLE_NAME", "INDEX_NAME", "NON_UNIQUE", "SEQ_IN_INDEX", "COLUMN_NAME",
+         "SUB_PART", "INDEX_TYPE", "EXPRESSION"],
+        where=f"TABLE_SCHEMA NOT IN ({_SYSTEM_FILTER})",
+        indexes=[("table_schema", "table_name", "index_name")],
+    ),
+    SnapshotTable(
+        "table_constraints", "information_schema.TABLE_CONSTRAINTS",
+        ["CONSTRAINT_SCHEMA", "CONSTRAINT_NAME", "TABLE_SCHEMA", "TABLE_NAME", "CONSTRAINT_TYPE"],
+        indexes=[("constraint_schema", "constraint_name"), ("constraint_type",)],
+    ),
+    SnapshotTable(
+        "check_constraints", "information_schema.CHECK_CONSTRAINTS",
+        ["CONSTRAINT_SCHEMA", "CONSTRAINT_NAME", "CHECK_CLAUSE"],
+        indexes=[("constraint_schema", "constraint_name")],
+    ),
+    SnapshotTable(
+        "partitions", "information_schema.PARTITIONS",
+        ["TABLE_SCHEMA", "TABLE_NAME", "PARTITION_COUNT"],
+        sql=(
+            "SELECT TABLE_SCHEMA, TABLE_NAME, COUNT(*) FROM information_schema.PARTITIONS "
+            "WHERE PARTITION_NAME IS NOT NULL GROUP BY TABLE_SCHEMA, TABLE_NAME"
+        ),
+        indexes=[("table_schema", "table_name")],
+    ),
+    SnapshotTable(
+        "views", "information_schema.VIEWS",
+        ["TABLE_SCHEMA", "TABLE_NAME", "DEFINER", "SECURITY_TYPE"],
+    ),
+    SnapshotTable(
+        "triggers", "information_schema.TRIGGERS",
+        ["TRIGGER_SCHEMA", "TRIGGER_NAME", "EVENT_OBJECT_TABLE", "ACTION_TIMING", "EVENT_MANIPULATION",
+         "ACTION_ORDER", "DEFINER"],
+        indexes=[("trigger_schema", "event_object_table")],
+    ),
+    SnapshotTable(
+        "routines", "information_schema.ROUTINES",
+        ["ROUTINE_SCHEMA", "ROUTINE_NAME", "ROUTINE_TYPE", "DEFINER", "SECURITY_TYPE"],
+    ),
+    SnapshotTable(
+        "events", "information_schema.EVENTS",
+        ["EVENT_SCHEMA", "EVENT_NAME", "DEFINER", "STATUS"],
+    ),
+    SnapshotTable(
+        "plugins", "information_schema.PLUGINS",
+        ["PLUGIN_NAME", "PLUGIN_STATUS", "PLUGIN_TYPE"],
+    ),
+    SnapshotTable(
+        "resource_groups", "information_schema.RESOURCE_GROUPS",
+        ["RESOURCE_GROUP_NAME", "RESOURCE_GROUP_TYPE", "RESOURCE_GROUP_ENABLED", "VCPU_IDS", "THREAD_PRIORITY"],
+    ),
+    SnapshotTable(
+        "users", "mysql.user",
+        ["User", "Host", "plugin", "account_locked", "password_expired", "User_attributes"],
+        indexes=[("user", "host")],
+    ),
+    SnapshotTable(
+        "variables", "performance_schema.global_variables",
+        ["VARIABLE_NAME", "VARIABLE_VALUE"],
+        sql="SHOW GLOBAL VARIABLES",
+        indexes=[("variable_name",)],
+    ),
+    SnapshotTable(
+        "variables_info", "performance_schema.variables_info",
+        ["VARIABLE_NAME", "VARIABLE_SOURCE"],
+        indexes=[("variable_name",)],
+    ),
+    SnapshotTable(
+        "status", "performance_schema.global_status",
+        ["VARIABLE_NAME", "VARIABLE_VALUE"],
+        sql="SHOW GLOBAL STATUS",
+        indexes=[("variable_name",)],
+    ),
+]
+
+
+def _source_columns(ep: Endpoint) -> Dict[str, Set[str]]:
+    """Map schema.table -> available (upper-cased) columns for the snapshot relations."""
+    wanted = sorted({t.source for t in SNAPSHOT_TABLES if not t.sql})
+    schemas = sorted({s.split(".", 1)[0] for s in wanted})
+    tables = sorted({s.split(".", 1)[1] for s in wanted})
+    sql = (
+        "SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS "
+        f"WHERE TABLE_SCHEMA IN ({', '.join(sql_quote(s) for s in schemas)}) "
+        f"AND UPPER(TABLE_NAME) IN ({', '.join(sql_quote(t.upper()) for t in tables)})"
+    )
+    found: Dict[str, Set[str]] = {}
+    for row in iter_query(ep, sql):
+        if len(row) < 3 or row[0] is None or row[1] is None or row[2] is None:
+            continue
+        found.setdefault(f"{row[0].lower()}.{row[1].upper()}", set()).add(row[2].upper())
+    return found
+
+
+def _select_sql(table: SnapshotTable, available: Dict[str, Set[str]]) -> Optional[str]:
+    if table.sql:
+        return table.sql
+    schema, name = table.source.split(".", 1)
+    cols = available.get(f"{schema.lower()}.{name.upper()}")
+    if not cols:
+        return None
+    select = ", ".join(c if c.upper() in cols else "NULL" for c in table.columns)
+    sql = f"SELECT {select} FROM {table.source}"
+    if table.where:
+        sql += f" WHERE {table.where}"
+    return sql
+
+
+def _create_table(db: sqlite3.Connection, table: SnapshotTable) -> None:
+    cols = ", ".join(f'"{c.lower()}"' for c in table.columns)
+    db.execute(f'DROP TABLE IF EXISTS "{table.name}"')
+    db.execute(f'CREATE TABLE "{table.name}" ({cols})')
+
+
+def _create_indexes(db: sqlite3.Connection, table: SnapshotTable) -> None:
+    for i, idx in enumerate(table.indexes):
+        cols = ", ".join(f'"{c}"' for c in idx)
+        db.execute(f'CREATE INDEX "ix_{table.name}_{i}" ON "{table.name}" ({cols})')
+
+
+def snapshot_source(
+    ep: Endpoint,
+    path: Path,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, int]:
+    """Copy the catalog relations used by assessment checks into a local SQLite file.
+
+    Each relation is read with one streaming query; the file is written next to
+    `path` and renamed into place once complete. Returns row counts per table.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    available = _source_columns(ep)
+    counts: Dict[str, int] = {}
+    skipped: List[str] = []
+
+    db = sqlite3.connect(str(tmp))
+    try:
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute("CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT)")
+        for table in SNAPSHOT_TABLES:
+            _create_table(db, table)
+            sql = _select_sql(table, available)
+            if sql is None:
+                skipped.append(table.name)
+                counts[table.name] = 0
+                if log:
+                    log(f"CATALOG {table.name}: {table.source} not available on source; left empty")
+                continue
+            placeholders = ", ".join("?" for _ in table.columns)
+            insert = f'INSERT INTO "{table.name}" VALUES ({placeholders})'
+            width = len(table.columns)
+            batch: List[List[Optional[str]]] = []
+            n = 0
+            for row in iter_query(ep, sql):
+                if len(row) != width:
+                    row = (row + [None] * width)[:width]
+                batch.append(row)
+                if len(batch) >= BATCH_ROWS:
+                    db.executemany(insert, batch)
+                    n += len(batch)
+                    batch = []
+            if batch:
+                db.executemany(insert, batch)
+                n += len(batch)
+            _create_indexes(db, table)
+            counts[table.name] = n
+            if log:
+                log(f"CATALOG {table.name}: {n} rows")
+
+        meta = {
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+            "source": ep.label(),
+            "skipped": ",".join(skipped),
+        }
+        db.executemany("INSERT INTO snapshot_meta VALUES (?, ?)", sorted(meta.items()))
+        db.commit()
+    except BaseException:
+        db.close()
+        tmp.unlink()
+        raise
+    db.close()
+    tmp.replace(path)
+    return counts
+
+
+def open_catalog(path: Path) -> sqlite3.Connection:
+    if not path.exists():
+        raise RuntimeError(f"catalog not found: {path}")
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def catalog_meta(path: Path) -> Dict[str, str]:
+    db = open_catalog(path)
+    try:
+        return {k: v for k, v in db.execute("SELECT key, value FROM snapshot_meta")}
+    finally:
+        db.close()
+
+
+def _tsv_value(v: object) -> str:
+    if v is None:
+        return "NULL"
+    s = str(v)
+    return s.replace("\t", " ").replace("\n", " ")
+
+
+def evaluate_checks(
+    path: Path,
+    checks_dir: Path,
+    outdir: Path,
+    log: Optional[Callable[[str], None]] = None,
+    consume: Optional[Callable[[str, Iterator[str]], int]] = None,
+) -> Dict[str, int]:
+    """Run every checks_dir/*.sql against the catalog, writing <check>.tsv files.
+
+    With `consume`, no .tsv is written: each check's rows are passed to
+    consume(name, lines) as TSV lines, and it returns the number it took.
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    files = sorted(checks_dir.glob("*.sql"))
+    if not files:
+        raise RuntimeError(f"no catalog checks found in {checks_dir}")
+
+    counts: Dict[str, int] = {}
+    summary = outdir / "precheck.out"
+    errors = outdir / "precheck.err"
+    db = open_catalog(path)
+    try:
+        with summary.open("w", encoding="utf-8") as out, errors.open("w", encoding="utf-8") as err:
+            out.write("== Precheck (catalog) ==\n")
+            out.write(f"Catalog: {path}\n")
+            out.write(f"Checks dir: {checks_dir}\n\n")
+            for f in files:
+                name = f.stem
+                n = 0
+                try:
+                    cur = db.execute(f.read_text(encoding="utf-8"))
+                    lines = ("\t".join(_tsv_value(v) for v in row) for row in cur)
+                    if consume is not None:
+                        n = consume(name, lines)
+                    else:
+                        with (outdir / f"{name}.tsv").open("w", encoding="utf-8") as tsv:
+                            for line in lines:
+                                tsv.write(line + "\n")
+                                n += 1
+                except sqlite3.Error as exc:
+                    err.write(f"{name}: {exc}\n")
+                    raise RuntimeError(f"catalog check failed: {name}: {exc}")
+                counts[name] = n
+                out.write(f"---- {name} ---- {n} rows\n")
+                if log:
+                    log(f"CHECK {name}: {n} rows")
+    finally:
+        db.close()
+    return counts
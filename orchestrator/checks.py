@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import gzip
+import heapq
 import os
+import sqlite3
 import subprocess
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 
+from .advisor import advise, target_host, write_advice
+from .catalog import CATALOG_FILE, catalog_meta, evaluate_checks, open_catalog, snapshot_source
+from .dbclient import Endpoint
 from .report import Gate, GateStatus, WarningItem, Report
 
 
@@ -16,18 +22,110 @@ class AssessmentResult:
     gates: List[Gate]
     warnings: List[WarningItem]
     inventory: Dict[str, Any]
+    config_advice: Dict[str, Any] = field(default_factory=dict)
+
+
+FINDINGS_DIR = "findings"
+# Rows of each finding kept inline in report.json; the full list is in findings/<check>.tsv.gz.
+SAMPLE_ROWS = 200
+TOP_TABLES = 20
+# How the leading columns of a check identify the object it reports on. Checks
+# scoped by table are ordered by schema, table, so per-table counts are a run length.
+_SCOPE = {
+    "check_constraints": "table",
+    "compression_encryption": "table",
+    "fk_name_lengths": "table",
+    "functional_defaults": "table",
+    "functional_indexes": "table",
+    "gis_srid_usage": "table",
+    "invisible_columns": "table",
+    "json_columns": "table",
+    "lob_tables": "table",
+    "mysql8_collations": "table",
+    "mysql8_column_collations": "table",
+    "partitioned_tables": "table",
+    "trigger_order": "table",
+    "schema_charsets": "schema",
+    "schema_sizes": "schema",
+}
+
+# Single-row checks read as settings rather than reported as findings.
+_SETTINGS = ("mysql_version", "innodb_settings", "sql_mode")
 
 
-def _read_tsv(path: Path) -> List[List[str]]:
-    if not path.exists():
-        return []
-    rows: List[List[str]] = []
-    for line in path.read_text(encoding="utf-8", errors="replace").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        rows.append(line.split("\t"))
-    return rows
+@dataclass
+class FindingSummary:
+    """One check's rows, aggregated in a single pass."""
+
+    name: str
+    count: int = 0
+    by_schema: Dict[str, int] = field(default_factory=dict)
+    tables: int = 0
+    top_tables: List[Tuple[int, str]] = field(default_factory=list)
+    sample: List[str] = field(default_factory=list)
+    file: str = ""
+
+    def details(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"count": self.count, "rows_sample": self.sample}
+        if self.file:
+            d["file"] = self.file
+        if self.by_schema:
+            d["by_schema"] = dict(sorted(self.by_schema.items(), key=lambda kv: (-kv[1], kv[0])))
+        if self.tables:
+            d["tables"] = self.tables
+            d["top_tables"] = [{"table": t, "count": n} for n, t in sorted(self.top_tables, reverse=True)]
+        return d
+
+
+def _first_row(finding: FindingSummary) -> List[str]:
+    return finding.sample[0].split("\t") if finding.sample else []
+
+
+def _scan_finding(lines: Iterator[str], outdir: Path, name: str) -> FindingSummary:
+    """Count rows per schema and table, keep a sample, and stream every row to findings/<name>.tsv.gz."""
+    summary = FindingSummary(name)
+    scope = _SCOPE.get(name)
+    side: Optional[IO[str]] = None
+    current = ""
+    run = 0
+
+    def close_run() -> None:
+        if not run:
+            return
+        summary.tables += 1
+        if len(summary.top_tables) < TOP_TABLES:
+            heapq.heappush(summary.top_tables, (run, current))
+        else:
+            heapq.heappushpop(summary.top_tables, (run, current))
+
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if side is None:
+                (outdir / FINDINGS_DIR).mkdir(parents=True, exist_ok=True)
+                summary.file = f"{FINDINGS_DIR}/{name}.tsv.gz"
+                side = gzip.open(outdir / summary.file, "wt", encoding="utf-8", compresslevel=1)
+            side.write(line + "\n")
+            summary.count += 1
+            if len(summary.sample) < SAMPLE_ROWS:
+                summary.sample.append(line)
+            if scope is None:
+                continue
+            fields = line.split("\t", 2)
+            summary.by_schema[fields[0]] = summary.by_schema.get(fields[0], 0) + 1
+            if scope == "table" and len(fields) > 1:
+                table = f"{fields[0]}.{fields[1]}"
+                if table != current:
+                    close_run()
+                    current, run = table, 0
+                run += 1
+        close_run()
+    finally:
+        if side is not None:
+            side.close()
+    return summary
 
 
 def _effective_env_cfg(cfg: Dict[str, Any]) -> Dict[str, str]:
@@ -44,6 +142,8 @@ def _effective_env_cfg(cfg: Dict[str, Any]) -> Dict[str, str]:
         "SRC_DBS",
         "MYSQL_PWD",
         "MYSQL_BIN",
+        "SRC_ASSESS_USER",
+        "SRC_ASSESS_PASS",
     ]
     for k in override_keys:
         v = os.environ.get(k)
@@ -107,10 +207,7 @@ def _select_source_credentials(cfg: Dict[str, Any], env_cfg: Dict[str, str]) ->
     return None, None, last_err
 
 
-def _run_precheck(repo_root: Path, cfg: Dict[str, Any], outdir: Path, log) -> Path:
-    precheck_out = outdir / "precheck"
-    precheck_out.mkdir(parents=True, exist_ok=True)
-
+def _source_endpoint(cfg: Dict[str, Any], log) -> Endpoint:
     client = cfg.get("client", {}) or {}
     env_cfg = _effective_env_cfg(cfg)
 
@@ -119,61 +216,53 @@ def _run_precheck(repo_root: Path, cfg: Dict[str, Any], outdir: Path, log) -> Pa
         raise RuntimeError(f"unable to authenticate to source for assessment: {cred_source}")
     log(f"Assessment source auth selected: {cred_source} ({user})")
 
-    env = {
-        "MYSQL_BIN": str(env_cfg.get("MYSQL_BIN", client.get("mysql_bin", "mysql"))),
-        "HOST": str(env_cfg.get("SRC_HOST", client.get("host", "127.0.0.1"))),
-        "PORT": str(env_cfg.get("SRC_PORT", client.get("port", 3306))),
-        "USER": user,
-        "OUTDIR": str(precheck_out),
-        "CHECKS_DIR": str(repo_root / "sql" / "checks"),
-    }
-    # Pass through env vars first.
-    for k, v in env_cfg.items():
-        env[str(k)] = str(v)
-
-    # Then force the effective credentials (and password) used by precheck.
-    env["MYSQL_BIN"] = str(env_cfg.get("MYSQL_BIN", client.get("mysql_bin", "mysql")))
-    env["HOST"] = str(env_cfg.get("SRC_HOST", client.get("host", "127.0.0.1")))
-    env["PORT"] = str(env_cfg.get("SRC_PORT", client.get("port", 3306)))
-    env["USER"] = user
-    env["SRC_USER"] = user
-    if password:
-        env["MYSQL_PWD"] = password
-    elif "MYSQL_PWD" in env:
-        del env["MYSQL_PWD"]
-    if password:
-        env["SRC_PASS"] = password
-    elif "SRC_PASS" in env:
-        del env["SRC_PASS"]
-
-    script = repo_root / "scripts" / "00_precheck.sh"
-    if not script.exists():
-        raise RuntimeError(f"Missing precheck script: {script}")
-
-    log(f"RUN precheck -> {script}")
-    p = subprocess.run(
-        ["bash", str(script)],
-        cwd=str(repo_root),
-        capture_output=True,
-        text=True,
-        env=env,
+    return Endpoint(
+        host=str(env_cfg.get("SRC_HOST", client.get("host", "127.0.0.1"))),
+        port=str(env_cfg.get("SRC_PORT", client.get("port", 3306))),
+        user=user,
+        password=password or "",
+        client_bin=str(env_cfg.get("MYSQL_BIN", client.get("mysql_bin", "mysql"))),
     )
 
-    # Log stdout/stderr (should not contain password)
-    if p.stdout:
-        for ln in p.stdout.splitlines():
-            log(ln)
-    if p.stderr:
-        for ln in p.stderr.splitlines():
-            log(ln)
 
-    if p.returncode != 0:
-        raise RuntimeError(f"precheck failed rc={p.returncode} (see {precheck_out}/precheck.err)")
+def _run_precheck(
+    repo_root: Path,
+    cfg: Dict[str, Any],
+    outdir: Path,
+    log,
+    catalog_path: Optional[Path] = None,
+) -> Tuple[Dict[str, FindingSummary], Path]:
+    """Evaluate sql/catalog checks against a local catalog snapshot.
+
+    The source is read once (one bulk query per catalog relation) unless an
+    existing catalog is passed in, in which case the source is not contacted.
+    Each check's rows stream straight into its summary and findings side file;
+    precheck/ only gets precheck.out and precheck.err.
+    """
+    precheck_out = outdir / "precheck"
+    precheck_out.mkdir(parents=True, exist_ok=True)
+
+    if catalog_path is None:
+        catalog_path = outdir / CATALOG_FILE
+        ep = _source_endpoint(cfg, log)
+        log(f"RUN catalog snapshot {ep.label()} -> {catalog_path}")
+        snapshot_source(ep, catalog_path, log=log)
+    else:
+        log(f"Using existing catalog snapshot: {catalog_path}")
 
-    return precheck_out
+    checks_dir = repo_root / "sql" / "catalog"
+    log(f"RUN precheck (catalog) -> {checks_dir}")
+    findings: Dict[str, FindingSummary] = {}
 
+    def consume(name: str, lines: Iterator[str]) -> int:
+        findings[name] = _scan_finding(lines, outdir, name)
+        return findings[name].count
 
-def _source_db_gate(cfg: Dict[str, Any]) -> Gate:
+    evaluate_checks(catalog_path, checks_dir, precheck_out, log=log, consume=consume)
+    return findings, catalog_path
+
+
+def _source_db_gate(cfg: Dict[str, Any], catalog_path: Path) -> Gate:
     env_cfg = _effective_env_cfg(cfg)
     src_db = str(env_cfg.get("SRC_DB", "")).strip()
     src_dbs = str(env_cfg.get("SRC_DBS", "")).strip()
@@ -190,87 +279,85 @@ def _source_db_gate(cfg: Dict[str, Any]) -> Gate:
             {"reason": "SRC_DB_or_SRC_DBS_missing_for_assessment"},
         )
 
-    client = cfg.get("client", {}) or {}
-    mysql_bin = str(env_cfg.get("MYSQL_BIN", client.get("mysql_bin", "mysql")))
-    host = str(env_cfg.get("SRC_HOST", client.get("host", "127.0.0.1")))
-    port = str(env_cfg.get("SRC_PORT", client.get("port", 3306)))
-    user, password, cred_source = _select_source_credentials(cfg, env_cfg)
-    if not user:
-        return Gate(
-            "source_databases_exist",
-            GateStatus.FAIL,
-            {"requested": dbs, "missing": dbs, "reason": f"source auth failed: {cred_source}"},
-        )
-
-    def sql_escape(s: str) -> str:
-        return s.replace("'", "''")
-
-    missing: List[str] = []
-    for db in dbs:
-        query = (
-            "SELECT COUNT(*) FROM information_schema.schemata "
-            f"WHERE schema_name='{sql_escape(db)}';"
-        )
-        env = dict(os.environ)
-        if password:
-            env["MYSQL_PWD"] = password
-        elif "MYSQL_PWD" in env:
-            del env["MYSQL_PWD"]
-        try:
-            p = subprocess.run(
-                [mysql_bin, f"-h{host}", f"-P{port}", f"-u{user}", "--batch", "--skip-column-names", "-e", query],
-                capture_output=True,
-                text=True,
-                env=env,
-            )
-        except FileNotFoundError:
-            return Gate(
-                "source_databases_exist",
-                GateStatus.FAIL,
-                {"requested": dbs, "missing": dbs, "reason": f"mysql client not found: {mysql_bin}"},
-            )
-        if p.returncode != 0 or (p.stdout or "").strip() != "1":
-            missing.append(db)
+    db = open_catalog(catalog_path)
+    try:
+        present = {r[0] for r in db.execute("SELECT schema_name FROM schemata")}
+    finally:
+        db.close()
+    missing = [d for d in dbs if d not in present]
 
     return Gate(
         "source_databases_exist",
         GateStatus.PASS if not missing else GateStatus.FAIL,
-        {"requested": dbs, "missing": missing, "auth_source": cred_source},
+        {"requested": dbs, "missing": missing, "catalog": str(catalog_path)},
     )
 
 
-def run_assessment_checks(cfg: Dict[str, Any], report: Report, repo_root: Path, outdir: Path) -> AssessmentResult:
+def _total_size_mb(catalog_path: Path) -> float:
+    """Data + index size of every schema in the catalog (schema_sizes only keeps a sample)."""
+    db = open_catalog(catalog_path)
+    try:
+        row = db.execute("SELECT SUM(COALESCE(data_length, 0) + COALESCE(index_length, 0)) FROM tables").fetchone()
+    finally:
+        db.close()
+    return round(float(row[0] or 0) / 1024.0 / 1024.0, 2)
+
+
+def _config_advice(cfg: Dict[str, Any], catalog_path: Path, outdir: Path, log) -> Dict[str, Any]:
+    """Target my.cnf advice (config_advice/*.cnf); never fails the assessment."""
+    env = _effective_env_cfg(cfg)
+    env.update({k: v for k, v in os.environ.items() if k.startswith(("TGT_", "CONFIG_ADVICE")) and v})
+    if str(env.get("CONFIG_ADVICE", "1")) == "0":
+        return {}
+    try:
+        host = target_host(env, log=log)
+        advice = advise(catalog_path, host, str((cfg.get("target") or {}).get("version", "")), log=log)
+        write_advice(advice, outdir)
+    except (RuntimeError, OSError, sqlite3.Error, ValueError) as exc:
+        log(f"WARN: config advice skipped: {exc}")
+        return {}
+    return advice
+
+
+def run_assessment_checks(
+    cfg: Dict[str, Any],
+    report: Report,
+    repo_root: Path,
+    outdir: Path,
+    catalog_path: Optional[Path] = None,
+) -> AssessmentResult:
     gates: List[Gate] = []
     warnings: List[WarningItem] = []
     inventory: Dict[str, Any] = {}
 
-    pre = _run_precheck(repo_root, cfg, outdir, report.log)
-
-    # Load TSVs
-    mysql_version = _read_tsv(pre / "mysql_version.tsv")          # expected: 1 row: version, comment?
-    innodb = _read_tsv(pre / "innodb_settings.tsv")               # expected: 1 row: file_per_table, fast_shutdown
-    auth = _read_tsv(pre / "auth_plugins.tsv")
-    json_cols = _read_tsv(pre / "json_columns.tsv")
-    enc = _read_tsv(pre / "compression_encryption.tsv")
-    engines = _read_tsv(pre / "engines_summary.tsv")
-    sizes = _read_tsv(pre / "schema_sizes.tsv")
-
-    schema_charsets = _read_tsv(pre / "schema_charsets.tsv")
-    tcoll = _read_tsv(pre / "mysql8_collations.tsv")
-    ccoll = _read_tsv(pre / "mysql8_column_collations.tsv")
-    sql_mode = _read_tsv(pre / "sql_mode.tsv")
-    definers = _read_tsv(pre / "definers_inventory.tsv")
-    partitions = _read_tsv(pre / "partitioned_tables.tsv")
-    plugins = _read_tsv(pre / "active_plugins.tsv")
+    # A rerun into the same --out must not carry over side files of checks
+    # that now return no rows (they would be archived with the new report),
+    # nor the plain precheck/*.tsv files earlier versions wrote.
+    for stale in [*(outdir / FINDINGS_DIR).glob("*.tsv.gz"), *(outdir / "precheck").glob("*.tsv")]:
+        stale.unlink()
+
+    # One streaming pass per check, full rows to findings/<check>.tsv.gz
+    findings, catalog_path = _run_precheck(repo_root, cfg, outdir, report.log, catalog_path=catalog_path)
+    empty = FindingSummary("")
+
+    def finding(name: str) -> FindingSummary:
+        return findings.get(name, empty)
+
+    # Single-row settings (_SETTINGS)
+    mysql_version = _first_row(finding("mysql_version"))        # version
+    innodb = _first_row(finding("innodb_settings"))             # file_per_table, fast_shutdown
+    sql_mode = _first_row(finding("sql_mode"))
 
     # Source/target
-    version = mysql_version[0][0].strip() if mysql_version and mysql_version[0] else ""
+    version = mysql_version[0].strip() if mysql_version else ""
     env_cfg = _effective_env_cfg(cfg)
     source = {
         "type": "mysql",
         "version": version,
         "host": env_cfg.get("SRC_HOST", (cfg.get("client", {}) or {}).get("host", "")),
         "port": env_cfg.get("SRC_PORT", (cfg.get("client", {}) or {}).get("port", "")),
+        "catalog": str(catalog_path),
+        "catalog_taken_at": catalog_meta(catalog_path).get("taken_at", ""),
     }
     target = cfg.get("target", {"type": "mariadb", "version": "LTS"})
 
@@ -287,9 +374,9 @@ def run_assessment_checks(cfg: Dict[str, Any], report: Report, repo_root: Path,
 
     innodb_file_per_table = ""
     innodb_fast_shutdown = ""
-    if innodb and len(innodb[0]) >= 2:
-        innodb_file_per_table = innodb[0][0].strip()
-        innodb_fast_shutdown = innodb[0][1].strip()
+    if len(innodb) >= 2:
+        innodb_file_per_table = innodb[0].strip()
+        innodb_fast_shutdown = innodb[1].strip()
 
     gates.append(
         Gate(
@@ -298,7 +385,7 @@ def run_assessment_checks(cfg: Dict[str, Any], report: Report, repo_root: Path,
             {"value": innodb_file_per_table},
         )
     )
-    gates.append(_source_db_gate(cfg))
+    gates.append(_source_db_gate(cfg, catalog_path))
 
     # Warnings/Inventory
     if innodb_fast_shutdown and innodb_fast_shutdown != "0":
@@ -310,53 +397,52 @@ def run_assessment_checks(cfg: Dict[str, Any], report: Report, repo_root: Path,
             )
         )
 
-    auth_lines = ["\t".join(r) for r in auth if r]
-    if auth_lines:
-        warnings.append(WarningItem("mysql_sha_or_caching_auth_users", "HIGH", {"count": len(auth_lines), "rows_sample": auth_lines[:200]}))
-    inventory["auth_plugin_users"] = {"count": len(auth_lines)}
-
-    json_lines = ["\t".join(r) for r in json_cols if r]
-    if json_lines:
-        warnings.append(WarningItem("json_columns_present", "MEDIUM", {"count": len(json_lines), "rows_sample": json_lines[:200]}))
-    inventory["json_columns"] = {"count": len(json_lines)}
-
-    enc_lines = ["\t".join(r) for r in enc if r]
-    inventory["encryption_or_compression"] = {"count": len(enc_lines)}
-    if enc_lines:
-        warnings.append(WarningItem("encryption_or_compression_detected", "HIGH", {"count": len(enc_lines), "rows_sample": enc_lines[:200]}))
-
-    inventory["engines"] = {"rows": ["\t".join(r) for r in engines[:200]]}
-    inventory["schema_sizes_mb"] = {"rows": ["\t".join(r) for r in sizes[:200]]}
-    inventory["schema_charsets"] = {"rows": ["\t".join(r) for r in schema_charsets[:200]]}
-
-    tcoll_lines = ["\t".join(r) for r in tcoll if r]
-    if tcoll_lines:
-        warnings.append(WarningItem("mysql8_table_collations_present", "MEDIUM", {"count": len(tcoll_lines), "rows_sample": tcoll_lines[:200]}))
-    inventory["mysql8_table_collations"] = {"count": len(tcoll_lines)}
-
-    ccoll_lines = ["\t".join(r) for r in ccoll if r]
-    if ccoll_lines:
-        warnings.append(WarningItem("mysql8_column_collations_present", "MEDIUM", {"count": len(ccoll_lines), "rows_sample": ccoll_lines[:200]}))
-    inventory["mysql8_column_collations"] = {"count": len(ccoll_lines)}
-
-    sql_mode_val = sql_mode[0][0] if sql_mode and sql_mode[0] else ""
+    # (check, warning, severity, inventory key)
+    flagged = [
+        ("auth_plugins", "mysql_sha_or_caching_auth_users", "HIGH", "auth_plugin_users"),
+        ("json_columns", "json_columns_present", "MEDIUM", "json_columns"),
+        ("compression_encryption", "encryption_or_compression_detected", "HIGH", "encryption_or_compression"),
+        ("mysql8_collations", "mysql8_table_collations_present", "MEDIUM", "mysql8_table_collations"),
+        ("mysql8_column_collations", "mysql8_column_collations_present", "MEDIUM", "mysql8_column_collations"),
+        ("definers_inventory", "definer_objects_present", "MEDIUM", "definers"),
+        ("partitioned_tables", "partitioned_tables_present", "MEDIUM", "partitioned_tables"),
+    ]
+    for check, name, severity, key in flagged:
+        f = finding(check)
+        if f.count:
+            warnings.append(WarningItem(name, severity, f.details()))
+        inventory[key] = {"count": f.count}
+        if f.file:
+            inventory[key]["file"] = f.file
+
+    # BLOB/TEXT/JSON tables, largest first; candidates for the LOB transfer path (LOB_TRANSFER=1).
+    lob = finding("lob_tables")
+    inventory["lob_tables"] = {"count": lob.count, "rows": lob.sample}
+    if lob.file:
+        inventory["lob_tables"]["file"] = lob.file
+    inventory["engines"] = {"rows": finding("engines_summary").sample}
+    inventory["schema_sizes_mb"] = {"rows": finding("schema_sizes").sample, "total": _total_size_mb(catalog_path)}
+    inventory["schema_charsets"] = {"rows": finding("schema_charsets").sample}
+
+    sql_mode_val = sql_mode[0] if sql_mode else ""
     if sql_mode_val:
         warnings.append(WarningItem("sql_mode_review_recommended", "MEDIUM", {"value": sql_mode_val}))
     inventory["sql_mode"] = {"value": sql_mode_val}
 
-    definers_lines = ["\t".join(r) for r in definers if r]
-    if definers_lines:
-        warnings.append(WarningItem("definer_objects_present", "MEDIUM", {"count": len(definers_lines), "rows_sample": definers_lines[:200]}))
-    inventory["definers"] = {"count": len(definers_lines)}
+    plugins = finding("active_plugins")
+    if plugins.count:
+        warnings.append(WarningItem("active_plugins_review_recommended", "LOW", plugins.details()))
+    inventory["active_plugins"] = {"rows": plugins.sample}
 
-    partition_lines = ["\t".join(r) for r in partitions if r]
-    if partition_lines:
-        warnings.append(WarningItem("partitioned_tables_present", "MEDIUM", {"count": len(partition_lines), "rows_sample": partition_lines[:200]}))
-    inventory["partitioned_tables"] = {"count": len(partition_lines)}
+    # Counts per check (and per schema/table where the check is scoped), complete lists in findings/.
+    inventory["findings"] = {
+        name: {k: v for k, v in f.details().items() if k != "rows_sample"}
+        for name, f in findings.items()
+        if f.count and name not in _SETTINGS
+    }
 
-    plugin_lines = ["\t".join(r) for r in plugins if r]
-    if plugin_lines:
-        warnings.append(WarningItem("active_plugins_review_recommended", "LOW", {"count": len(plugin_lines), "rows_sample": plugin_lines[:200]}))
-    inventory["active_plugins"] = {"rows": plugin_lines[:200]}
+    config_advice = _config_advice(cfg, catalog_path, outdir, report.log)
 
-    return AssessmentResult(source=source, target=target, gates=gates, warnings=warnings, inventory=inventory)
+    return AssessmentResult(
+        source=source, target=target, gates=gates, warnings=warnings, inventory=inventory, config_advice=config_advice
+    )
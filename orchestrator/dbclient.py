@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import os
+import shlex
+import signal
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+SYSTEM_SCHEMAS = ("mysql", "information_schema", "performance_schema", "sys")
+
+_BATCH_ESCAPES = {"0": "\0", "t": "\t", "n": "\n", "\\": "\\"}
+
+
+class QueryTimeout(RuntimeError):
+    """A query did not finish within its timeout; the client was killed."""
+
+
+@dataclass
+class Endpoint:
+    """Connection settings for a mysql/mariadb command-line client."""
+
+    host: str
+    port: str = "3306"
+    user: str = ""
+    password: str = ""
+    client_bin: str = "mysql"
+    extra_args: List[str] = field(default_factory=list)
+    # When set (user@host), the client runs on that host over ssh.
+    ssh_target: str = ""
+    ssh_opts: str = ""
+
+    def argv(self, *args: str) -> List[str]:
+        cmd = [self.client_bin, "--protocol=TCP", f"-h{self.host}", f"-P{self.port}"]
+        if self.user:
+            cmd.append(f"-u{self.user}")
+        cmd.extend(self.extra_args)
+        cmd.extend(args)
+        if not self.ssh_target:
+            return cmd
+        remote = " ".join(shlex.quote(c) for c in cmd)
+        if self.password:
+            remote = f"MYSQL_PWD={shlex.quote(self.password)} {remote}"
+        return ["ssh", *shlex.split(self.ssh_opts), self.ssh_target, remote]
+
+    def env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        if self.password and not self.ssh_target:
+            env["MYSQL_PWD"] = self.password
+        elif "MYSQL_PWD" in env:
+            del env["MYSQL_PWD"]
+        return env
+
+    def label(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def endpoint_from_env(env: Mapping[str, str], side: str, via_ssh: bool = False) -> Endpoint:
+    """Build an endpoint from SRC_* / TGT_* envs, preferring admin credentials.
+
+    via_ssh: for the target, run the client on TGT_SSH_HOST (as the shell
+    scripts do when the orchestrator is on a third host).
+    """
+    prefix = side.upper()
+    if prefix == "SRC":
+        client_bin = env.get("MYSQL_BIN", "mysql")
+    else:
+        client_bin = env.get("MARIADB_BIN", "mariadb")
+    ep = Endpoint(
+        host=str(env.get(f"{prefix}_HOST", "")).strip(),
+        port=str(env.get(f"{prefix}_PORT", "3306")).strip() or "3306",
+        user=str(env.get(f"{prefix}_ADMIN_USER") or env.get(f"{prefix}_USER") or "").strip(),
+        password=str(env.get(f"{prefix}_ADMIN_PASS") or env.get(f"{prefix}_PASS") or "").strip(),
+        client_bin=str(client_bin),
+    )
+    ssh_host = str(env.get(f"{prefix}_SSH_HOST", "")).strip()
+    if via_ssh and ssh_host:
+        ssh_user = str(env.get(f"{prefix}_SSH_USER", "root")).strip() or "root"
+        ep.ssh_target = f"{ssh_user}@{ssh_host}"
+        ep.ssh_opts = str(env.get(f"{prefix}_SSH_OPTS", ""))
+    return ep
+
+
+def sql_quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def sql_ident(name: str) -> str:
+    return "`" + name.replace("`", "``") + "`"
+
+
+def unescape_field(raw: str) -> Optional[str]:
+    """Decode one field of mysql --batch output (NULL and backslash escapes)."""
+    if raw == "NULL":
+        return None
+    if "\\" not in raw:
+        return raw
+    out: List[str] = []
+    i = 0
+    n = len(raw)
+    while i < n:
+        ch = raw[i]
+        if ch == "\\" and i + 1 < n:
+            nxt = raw[i + 1]
+            out.append(_BATCH_ESCAPES.get(nxt, nxt))
+            i += 2
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def iter_query(ep: Endpoint, sql: str, timeout: Optional[float] = None) -> Iterator[List[Optional[str]]]:
+    """Stream result rows of a query without buffering the full result set."""
+    cmd = ep.argv("--batch", "--skip-column-names", "--quick", "--default-character-set=utf8mb4", "-e", sql)
+    try:
+        p = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=ep.env(),
+            start_new_session=True,
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"client not found: {ep.client_bin}")
+    assert p.stdout is not None
+
+    def _kill() -> None:
+        # The whole group, so a wrapper's children (ssh, shell) release stdout.
+        try:
+            os.killpg(p.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    # The deadline covers the whole read: a watchdog kills the client so a
+    # hung query ends the loop below instead of blocking on stdout.
+    expired = threading.Event()
+    watchdog: Optional[threading.Timer] = None
+    if timeout is not None:
+
+        def _expire() -> None:
+            expired.set()
+            _kill()
+
+        watchdog = threading.Timer(timeout, _expire)
+        watchdog.daemon = True
+        watchdog.start()
+    finished = False
+    try:
+        for line in p.stdout:
+            if expired.is_set():
+                break
+            line = line.rstrip("\n")
+            yield [unescape_field(f) for f in line.split("\t")]
+        finished = True
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        if not finished:
+            _kill()
+        p.stdout.close()
+        rc = p.wait()
+        err = p.stderr.read() if p.stderr else ""
+        if p.stderr:
+            p.stderr.close()
+    if expired.is_set():
+        raise QueryTimeout(f"query timed out on {ep.label()} after {timeout:g}s")
+    if rc != 0:
+        err = (err or "").strip().replace("\n", " ")
+        raise RuntimeError(f"query failed on {ep.label()} rc={rc}: {err[:240]}")
+
+
+def query(ep: Endpoint, sql: str, timeout: Optional[float] = None) -> List[List[Optional[str]]]:
+    return list(iter_query(ep, sql, timeout=timeout))
+
+
+def query_named(ep: Endpoint, sql: str, timeout: Optional[float] = None) -> List[Dict[str, Optional[str]]]:
+    """Run a query and return rows keyed by column name (for SHOW statements)."""
+    cmd = ep.argv("--batch", "--default-character-set=utf8mb4", "-e", sql)
+    try:
+        p = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=ep.env(),
+            timeout=timeout,
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"client not found: {ep.client_bin}")
+    except subprocess.TimeoutExpired:
+        raise QueryTimeout(f"query timed out on {ep.label()} after {timeout:g}s")
+    if p.returncode != 0:
+        err = (p.stderr or "").strip().replace("\n", " ")
+        raise RuntimeError(f"query failed on {ep.label()} rc={p.returncode}: {err[:240]}")
+    lines = p.stdout.splitlines()
+    if not lines:
+        return []
+    header = lines[0].split("\t")
+    return [dict(zip(header, (unescape_field(f) for f in line.split("\t")))) for line in lines[1:]]
+
+
+def query_value(ep: Endpoint, sql: str) -> Optional[str]:
+    rows = query(ep, sql)
+    if rows and rows[0]:
+        return rows[0][0]
+    return None
+
+
+def run_script(ep: Endpoint, statements: Iterable[str], force: bool = False) -> subprocess.CompletedProcess:
+    """Feed statements to a single client session on stdin."""
+    args = ["--batch", "--skip-column-names", "--default-character-set=utf8mb4"]
+    if force:
+        args.append("--force")
+    try:
+        p = subprocess.Popen(
+            ep.argv(*args),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            env=ep.env(),
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"client not found: {ep.client_bin}")
+    script = "".join(s if s.endswith("\n") else s + "\n" for s in statements)
+    out, err = p.communicate(script)
+    return subprocess.CompletedProcess(p.args, p.returncode, out, err)
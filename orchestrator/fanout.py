@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Mapping, Optional
+
+from .dbclient import Endpoint, endpoint_from_env
+
+CHUNK_BYTES = 1 << 20
+
+
+def targets_from_env(env: Mapping[str, str]) -> List[Endpoint]:
+    """TGT_HOSTS (host[:port],...) or the single TGT_HOST/TGT_PORT, with TGT_* credentials."""
+    base = endpoint_from_env(env, "TGT")
+    spec = str(env.get("TGT_HOSTS", "")).strip()
+    if not spec:
+        return [base] if base.host else []
+    out = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(":")
+        out.append(Endpoint(
+            host=host,
+            port=port or base.port,
+            user=base.user,
+            password=base.password,
+            client_bin=base.client_bin,
+        ))
+    return out
+
+
+class _Sink:
+    """One restore client fed from a bounded memory queue that spills to disk.
+
+    Chunks are queued in memory up to mem_cap bytes. Beyond that they are appended
+    to a spool of rotating segment files and replayed in order, so a slow target
+    falls behind on disk instead of stalling the others. Each segment is deleted
+    once it has been replayed, and spill_cap bounds the bytes on disk (read or
+    not); only when that is reached does the producer wait.
+    """
+
+    def __init__(self, ep: Endpoint, args: List[str], mem_cap: int, spill_cap: int, spill_dir: Path) -> None:
+        self.ep = ep
+        self.mem_cap = mem_cap
+        self.spill_cap = spill_cap
+        self.spill_dir = spill_dir
+        # Eight segments per cap, so replayed data is released in small steps.
+        self.segment_bytes = max(CHUNK_BYTES, spill_cap // 8)
+        self.cond = threading.Condition()
+        self.mem: Deque[bytes] = deque()
+        self.mem_bytes = 0
+        # Spool segments in write order as [path, size]; the last one is being written.
+        self.segments: Deque[List[Any]] = deque()
+        self.spool_w: Optional[BinaryIO] = None
+        self.spool_r: Optional[BinaryIO] = None
+        self.read_pos = 0
+        self.spool_pending = 0
+        self.spool_disk = 0
+        self.closed = False
+        self.failed = ""
+        self.written = 0
+        self.max_spilled = 0
+        self.stall_s = 0.0
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.proc = subprocess.Popen(
+            ep.argv(*args),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            env=ep.env(),
+        )
+        self.stderr_tail: Deque[bytes] = deque(maxlen=20)
+        self._err_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._err_thread.start()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _drain_stderr(self) -> None:
+        assert self.proc.stderr is not None
+        for line in self.proc.stderr:
+            self.stderr_tail.append(line)
+
+    def put(self, chunk: bytes) -> None:
+        with self.cond:
+            if self.failed:
+                return
+            if self.spool_pending == 0 and self.mem_bytes + len(chunk) <= self.mem_cap:
+                self.mem.append(chunk)
+                self.mem_bytes += len(chunk)
+                self.cond.notify_all()
+                return
+            if self.spill_cap <= 0:
+                # No spool: plain backpressure on the shared reader.
+                t0 = time.time()
+                while not self.failed and self.mem_bytes + len(chunk) > self.mem_cap and self.mem:
+                    self.cond.wait()
+                self.stall_s += time.time() - t0
+                if not self.failed:
+                    self.mem.append(chunk)
+                    self.mem_bytes += len(chunk)
+                    self.cond.notify_all()
+                return
+            t0 = time.time()
+            while not self.failed and self.spool_disk > 0 and self.spool_disk + len(chunk) > self.spill_cap:
+                self.cond.wait()
+            self.stall_s += time.time() - t0
+            if self.failed:
+                return
+            if self.spool_w is None or self.segments[-1][1] >= self.segment_bytes:
+                if self.spool_w is not None:
+                    self.spool_w.close()
+                fd, name = tempfile.mkstemp(prefix=f"fanout_{self.ep.host}_{self.ep.port}_", dir=str(self.spill_dir))
+                self.spool_w = os.fdopen(fd, "wb")
+                self.segments.append([Path(name), 0])
+            self.spool_w.write(chunk)
+            self.spool_w.flush()
+            self.segments[-1][1] += len(chunk)
+            self.spool_pending += len(chunk)
+            self.spool_disk += len(chunk)
+            self.max_spilled = max(self.max_spilled, self.spool_disk)
+            self.cond.notify_all()
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def _next(self) -> Optional[bytes]:
+        with self.cond:
+            while not self.mem and self.spool_pending == 0 and not self.closed:
+                self.cond.wait()
+            if self.mem:
+                chunk = self.mem.popleft()
+                self.mem_bytes -= len(chunk)
+                self.cond.notify_all()
+                return chunk
+            if self.spool_pending:
+                path, size = self.segments[0]
+                if self.spool_r is None:
+                    self.spool_r = open(path, "rb")
+                    self.read_pos = 0
+                chunk = self.spool_r.read(min(CHUNK_BYTES, size - self.read_pos))
+                self.read_pos += len(chunk)
+                self.spool_pending -= len(chunk)
+                if self.read_pos >= size and (len(self.segments) > 1 or self.spool_pending == 0):
+                    self._drop_segment()
+                self.cond.notify_all()
+                return chunk
+            return None
+
+    def _drop_segment(self) -> None:
+        """Delete the fully replayed head segment (caller holds cond)."""
+        path, size = self.segments.popleft()
+        if self.spool_r is not None:
+            self.spool_r.close()
+            self.spool_r = None
+        if not self.segments and self.spool_w is not None:
+            # Caught up with the writer: the next spill starts a fresh segment.
+            self.spool_w.close()
+            self.spool_w = None
+        self.read_pos = 0
+        self.spool_disk -= size
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        assert self.proc.stdin is not None
+        try:
+            while True:
+                chunk = self._next()
+                if chunk is None:
+                    break
+                self.proc.stdin.write(chunk)
+                self.written += len(chunk)
+            self.proc.stdin.close()
+        except (BrokenPipeError, OSError) as exc:
+            with self.cond:
+                self.failed = f"write failed: {exc}"
+                self.mem.clear()
+                self.mem_bytes = 0
+                self.spool_pending = 0
+                self.cond.notify_all()
+        rc = self.proc.wait()
+        self._err_thread.join(timeout=5)
+        self.finished = time.time()
+        if rc != 0 and not self.failed:
+            self.failed = f"client exited rc={rc}"
+        with self.cond:
+            self.cond.notify_all()
+
+    def join(self) -> None:
+        self._thread.join()
+        for fh in (self.spool_w, self.spool_r):
+            if fh is not None:
+                fh.close()
+        for path, _size in self.segments:
+            if path.exists():
+                path.unlink()
+        self.segments.clear()
+
+    def result(self) -> Dict[str, Any]:
+        tail = b"".join(self.stderr_tail).decode("utf-8", "replace").strip().splitlines()
+        return {
+            "target": self.ep.label(),
+            "ok": not self.failed,
+            "error": self.failed,
+            "stderr_tail": tail[-5:],
+            "bytes": self.written,
+            "max_spilled_bytes": self.max_spilled,
+            "stalled_s": round(self.stall_s, 1),
+            "duration_s": round((self.finished or time.time()) - self.started, 1),
+        }
+
+
+def fan_out(
+    stream: BinaryIO,
+    targets: List[Endpoint],
+    client_args: Optional[List[str]] = None,
+    mem_cap: int = 64 << 20,
+    spill_cap: int = 8 << 30,
+    spill_dir: Optional[Path] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Read a restore stream once and feed it to every target's client concurrently."""
+    log = log or (lambda _msg: None)
+    spill_dir = spill_dir or Path(tempfile.gettempdir())
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    sinks = [_Sink(ep, list(client_args or []), mem_cap, spill_cap, spill_dir) for ep in targets]
+    total = 0
+    started = time.time()
+    try:
+        while True:
+            chunk = stream.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            total += len(chunk)
+            live = [s for s in sinks if not s.failed]
+            if not live:
+                break
+            for s in live:
+                s.put(chunk)
+    finally:
+        for s in sinks:
+            s.close()
+        for s in sinks:
+            s.join()
+    results = [s.result() for s in sinks]
+    for r in results:
+        status = "OK" if r["ok"] else f"FAILED ({r['error']})"
+        log(f"FANOUT {r['target']}: {status} {r['bytes']} bytes in {r['duration_s']}s, "
+            f"max spilled {r['max_spilled_bytes']} bytes, stalled {r['stalled_s']}s")
+    return {
+        "source_bytes": total,
+        "duration_s": round(time.time() - started, 1),
+        "targets": results,
+        "ok": all(r["ok"] for r in results),
+    }
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+FLEET_REPORT = "fleet_report.json"
+FLEET_SUMMARY = "fleet_summary.tsv"
+# Per-instance settings that must never leak from the parent environment into a child.
+_INSTANCE_KEYS = ("SRC_HOST", "SRC_PORT", "SRC_DB", "SRC_DBS")
+_SECRET_KEY = re.compile(r"PASS|PWD|SECRET|TOKEN", re.I)
+
+
+@dataclass
+class FleetInstance:
+    name: str
+    host: str
+    port: str
+    cfg: Dict[str, Any] = field(default_factory=dict)
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+def _merge(base: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    out = copy.deepcopy(base)
+    for k, v in (extra or {}).items():
+        if isinstance(v, dict) and isinstance(out.get(k), dict):
+            out[k] = _merge(out[k], v)
+        else:
+            out[k] = copy.deepcopy(v)
+    return out
+
+
+def load_inventory(path: Path) -> List[FleetInstance]:
+    """Read a fleet inventory: `defaults` (an assess config) merged into each of `instances`."""
+    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    defaults = data.get("defaults", {}) or {}
+    instances: List[FleetInstance] = []
+    seen = set()
+    for i, item in enumerate(data.get("instances", []) or []):
+        if isinstance(item, str):
+            host, _, port = item.partition(":")
+            item = {"host": host, "port": port or 3306}
+        cfg = _merge(defaults, {k: v for k, v in item.items() if k not in ("name", "host", "port")})
+        client = cfg.setdefault("client", {})
+        host = str(item.get("host") or client.get("host") or "").strip()
+        port = str(item.get("port") or client.get("port") or 3306).strip()
+        if not host:
+            raise ValueError(f"{path}: instance #{i + 1} has no host")
+        client["host"], client["port"] = host, port
+        name = str(item.get("name") or f"{host}_{port}")
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", name)
+        if name in seen:
+            raise ValueError(f"{path}: duplicate instance name {name}")
+        seen.add(name)
+        env = {str(k): str(v) for k, v in (cfg.get("env", {}) or {}).items()}
+        instances.append(FleetInstance(name=name, host=host, port=port, cfg=cfg, env=env))
+    if not instances:
+        raise ValueError(f"{path}: no instances")
+    return instances
+
+
+def _child_env(inst: FleetInstance) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if k not in _INSTANCE_KEYS}
+    env.update(inst.env)
+    env["SRC_HOST"] = inst.host
+    env["SRC_PORT"] = inst.port
+    # Each child writes its own run dir; the shared store is fed once by the fleet run.
+    env["ARTIFACT_STORE"] = "0"
+    return env
+
+
+def _write_child_config(inst: FleetInstance, out_dir: Path) -> Path:
+    cfg = copy.deepcopy(inst.cfg)
+    # Secrets reach the child through its environment only.
+    cfg["env"] = {k: v for k, v in inst.env.items() if not _SECRET_KEY.search(k)}
+    path = out_dir / "source.yaml"
+    path.write_text(yaml.safe_dump(cfg, sort_keys=False), encoding="utf-8")
+    return path
+
+
+@dataclass
+class _Running:
+    inst: FleetInstance
+    proc: subprocess.Popen
+    started: float
+    log_fh: Any
+
+
+def run_fleet(
+    instances: List[FleetInstance],
+    out_dir: Path,
+    repo_root: Path,
+    concurrency: int = 16,
+    per_host: int = 1,
+    timeout: float = 900.0,
+    log: Optional[Callable[[str], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Assess many sources with at most `concurrency` children overall and `per_host` per host.
+
+    Each instance runs `migrationctl assess` in its own process and run directory, so
+    a hung or failing source is killed/recorded without affecting the others.
+    """
+    log = log or (lambda _msg: None)
+    pending = list(instances)
+    running: List[_Running] = []
+    per_host_running: Dict[str, int] = {}
+    results: List[Dict[str, Any]] = []
+
+    def launch(inst: FleetInstance) -> None:
+        inst_dir = out_dir / inst.name
+        inst_dir.mkdir(parents=True, exist_ok=True)
+        # A report left by an earlier fleet run must not pass for this one's.
+        stale = inst_dir / "report.json"
+        if stale.exists():
+            stale.unlink()
+        cfg_path = _write_child_config(inst, inst_dir)
+        cmd = [sys.executable, "-m", "orchestrator.migrationctl", "assess", "--config", str(cfg_path), "--out", str(inst_dir)]
+        log_fh = (inst_dir / "assess.out").open("w", encoding="utf-8")
+        proc = subprocess.Popen(
+            cmd,
+            cwd=str(repo_root),
+            env=_child_env(inst),
+            stdout=log_fh,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        running.append(_Running(inst, proc, time.time(), log_fh))
+        per_host_running[inst.host] = per_host_running.get(inst.host, 0) + 1
+
+    def collect(r: _Running, rc: Optional[int]) -> None:
+        r.log_fh.close()
+        per_host_running[r.inst.host] -= 1
+        result = _instance_result(r.inst, out_dir / r.inst.name, rc, time.time() - r.started)
+        results.append(result)
+        log(f"FLEET {r.inst.name}: {result['status']} ({result['duration_s']}s, "
+            f"{len(result['blockers'])} blocker(s), {result['data_mb']} MB)")
+
+    while pending or running:
+        for inst in list(pending):
+            if len(running) >= concurrency:
+                break
+            if per_host > 0 and per_host_running.get(inst.host, 0) >= per_host:
+                continue
+            pending.remove(inst)
+            launch(inst)
+        time.sleep(0.2)
+        for r in list(running):
+            rc = r.proc.poll()
+            if rc is None and timeout > 0 and time.time() - r.started > timeout:
+                try:
+                    os.killpg(r.proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                r.proc.wait()
+                rc = None
+            elif rc is None:
+                continue
+            running.remove(r)
+            collect(r, rc)
+    return results
+
+
+def _size_mb(inventory: Dict[str, Any]) -> float:
+    sizes = inventory.get("schema_sizes_mb", {}) or {}
+    if "total" in sizes:
+        return round(float(sizes["total"] or 0), 2)
+    # Reports written before "total" existed: the rows are a sample (first 200 schemas).
+    total = 0.0
+    for row in sizes.get("rows", []) or []:
+        parts = str(row).split("\t")
+        try:
+            total += float(parts[1])
+        except (IndexError, ValueError):
+            continue
+    return round(total, 2)
+
+
+def _instance_result(inst: FleetInstance, inst_dir: Path, rc: Optional[int], duration: float) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        "name": inst.name,
+        "host": inst.host,
+        "port": inst.port,
+        "report": str(inst_dir / "report.json"),
+        "duration_s": round(duration, 1),
+        "returncode": rc,
+        "version": "",
+        "blockers": [],
+        "warnings": {"HIGH": 0, "MEDIUM": 0, "LOW": 0},
+        "data_mb": 0.0,
+        "message": "",
+    }
+    if rc is None:
+        result["status"] = "TIMEOUT"
+        result["blockers"] = ["assessment_timeout"]
+        return result
+    report_path = inst_dir / "report.json"
+    try:
+        data = json.loads(report_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        result["status"] = "ERROR"
+        result["blockers"] = ["assessment_error"]
+        result["message"] = f"no report (exit {rc}); see {inst_dir / 'assess.out'}"
+        return result
+    result["version"] = (data.get("source") or {}).get("version", "")
+    result["message"] = data.get("message") or ""
+    result["blockers"] = [g["name"] for g in data.get("gates", []) if g.get("status") == "FAIL"]
+    for w in data.get("warnings", []):
+        sev = str(w.get("severity", "")).upper()
+        if sev in result["warnings"]:
+            result["warnings"][sev] += 1
+    result["data_mb"] = _size_mb(data.get("inventory", {}) or {})
+    if rc == 0:
+        result["status"] = "PASS"
+    elif data.get("gates"):
+        result["status"] = "FAIL"
+    else:
+        result["status"] = "ERROR"
+        if not result["blockers"]:
+            result["blockers"] = ["assessment_error"]
+    return result
+
+
+def rank(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Most blocked first, then most HIGH/MEDIUM warnings, then largest data size."""
+    return sorted(
+        results,
+        key=lambda r: (-len(r["blockers"]), -r["warnings"]["HIGH"], -r["warnings"]["MEDIUM"], -r["data_mb"], r["name"]),
+    )
+
+
+def write_fleet_report(results: List[Dict[str, Any]], out_dir: Path, inventory: Path) -> Dict[str, Any]:
+    ranked = rank(results)
+    by_status: Dict[str, int] = {}
+    blockers: Dict[str, int] = {}
+    for r in ranked:
+        by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+        for b in r["blockers"]:
+            blockers[b] = blockers.get(b, 0) + 1
+    summary = {
+        "inventory": str(inventory),
+        "instances": len(ranked),
+        "by_status": by_status,
+        "blockers": dict(sorted(blockers.items(), key=lambda kv: -kv[1])),
+        "total_data_mb": round(sum(r["data_mb"] for r in ranked), 2),
+        "ranking": ranked,
+    }
+    (out_dir / FLEET_REPORT).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    with (out_dir / FLEET_SUMMARY).open("w", encoding="utf-8") as f:
+        f.write("rank\tname\tstatus\tblockers\thigh\tmedium\tlow\tdata_mb\tversion\tduration_s\n")
+        for i, r in enumerate(ranked, 1):
+            f.write(
+                f"{i}\t{r['name']}\t{r['status']}\t{','.join(r['blockers'])}\t{r['warnings']['HIGH']}\t"
+                f"{r['warnings']['MEDIUM']}\t{r['warnings']['LOW']}\t{r['data_mb']}\t{r['version']}\t{r['duration_s']}\n"
+            )
+    return summary
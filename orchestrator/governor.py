@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional
+
+from .dbclient import Endpoint, QueryTimeout, endpoint_from_env, query, query_named
+
+EVENTS_FILE = "governor_events.jsonl"
+CHUNK_BYTES = 256 << 10
+
+
+@dataclass
+class GovernorConfig:
+    """Budgets and health thresholds; 0 disables each one."""
+
+    bytes_per_sec: int = 0
+    rows_per_sec: int = 0
+    max_threads_running: int = 0
+    max_history_length: int = 0
+    max_replica_lag: int = 0
+    replicas: List[Endpoint] = field(default_factory=list)
+    poll_secs: float = 5.0
+    # Above this share of a threshold readers run at half budget; a paused
+    # reader resumes only once every signal is back below it.
+    slow_ratio: float = 0.75
+    # Longest uninterrupted stop, so source sessions never hit net_write_timeout.
+    max_pause_secs: float = 20.0
+
+    def budgets(self) -> bool:
+        return self.bytes_per_sec > 0 or self.rows_per_sec > 0
+
+    def health_checks(self) -> bool:
+        return self.max_threads_running > 0 or self.max_history_length > 0 or self.max_replica_lag > 0
+
+    def enabled(self) -> bool:
+        return self.budgets() or self.health_checks()
+
+
+def config_from_env(env: Mapping[str, str]) -> GovernorConfig:
+    def _num(key: str, default: float = 0) -> float:
+        value = str(env.get(key, "")).strip()
+        try:
+            return float(value) if value else default
+        except ValueError:
+            return default
+
+    src = endpoint_from_env(env, "SRC")
+    replicas = []
+    for item in str(env.get("GOVERNOR_REPLICAS", "")).split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(":")
+        replicas.append(Endpoint(
+            host=host,
+            port=port or "3306",
+            user=str(env.get("GOVERNOR_REPLICA_USER") or src.user),
+            password=str(env.get("GOVERNOR_REPLICA_PASS") or src.password),
+            client_bin=src.client_bin,
+        ))
+    return GovernorConfig(
+        bytes_per_sec=int(_num("GOVERNOR_BYTES_PER_SEC")),
+        rows_per_sec=int(_num("GOVERNOR_ROWS_PER_SEC")),
+        max_threads_running=int(_num("GOVERNOR_MAX_THREADS_RUNNING")),
+        max_history_length=int(_num("GOVERNOR_MAX_HISTORY_LENGTH")),
+        max_replica_lag=int(_num("GOVERNOR_MAX_REPLICA_LAG")),
+        replicas=replicas,
+        poll_secs=max(1.0, _num("GOVERNOR_POLL_SECS", 5)),
+        slow_ratio=min(0.99, max(0.1, _num("GOVERNOR_SLOW_RATIO", 0.75))),
+        max_pause_secs=max(1.0, _num("GOVERNOR_MAX_PAUSE_SECS", 20)),
+    )
+
+
+class TokenBucket:
+    """Blocking token bucket; rate is units per second, bursts up to one second's worth.
+
+    Safe to share between threads: a caller reserves its tokens under the lock
+    and sleeps off any debt outside it, so concurrent readers split the rate.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = float(rate)
+        self.tokens = self.rate
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, n: float, factor: float = 1.0) -> float:
+        """Take n tokens at rate*factor, sleeping as needed; returns seconds slept."""
+        if self.rate <= 0 or n <= 0:
+            return 0.0
+        rate = self.rate * factor
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(rate, self.tokens + (now - self.stamp) * rate)
+            self.stamp = now
+            self.tokens -= n
+            if self.tokens >= 0:
+                return 0.0
+            wait = -self.tokens / rate
+        time.sleep(wait)
+        return wait
+
+
+class Governor:
+    """Polls source health in the background and tells readers to run, slow down or pause.
+
+    Every state change is appended to governor_events.jsonl in the run directory,
+    which `migrationctl run` folds into report.json.
+    """
+
+    def __init__(self, cfg: GovernorConfig, src: Endpoint, events_path: Path, reader: str) -> None:
+        self.cfg = cfg
+        self.src = src
+        self.events_path = events_path
+        self.reader = reader
+        self.state = "run"  # run / slow / pause
+        self.reason = ""
+        self.signals: Dict[str, Any] = {}
+        self.paused_s = 0.0
+        self.throttled_s = 0.0
+        # One budget per governor, shared by every stream it governs.
+        self.bytes_bucket = TokenBucket(cfg.bytes_per_sec)
+        self.rows_bucket = TokenBucket(cfg.rows_per_sec)
+        self._stop = threading.Event()
+        self._changed = threading.Condition()
+        self._warned: set = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "Governor":
+        self.event("start", budgets={"bytes_per_sec": self.cfg.bytes_per_sec, "rows_per_sec": self.cfg.rows_per_sec})
+        if self.cfg.health_checks():
+            self._poll()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.cfg.poll_secs + 5)
+        self.event("stop", paused_s=round(self.paused_s, 1), throttled_s=round(self.throttled_s, 1))
+
+    def event(self, name: str, **details: Any) -> None:
+        rec = {"ts": datetime.now(timezone.utc).isoformat(), "reader": self.reader, "event": name, **details}
+        try:
+            self.events_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.events_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+        except OSError:
+            pass
+
+    def _read_signals(self) -> Dict[str, Any]:
+        """Read the health signals; every query must answer within one poll interval."""
+        signals: Dict[str, Any] = {}
+        timeout = self.cfg.poll_secs
+        if self.cfg.max_threads_running > 0:
+            rows = query(self.src, "SHOW GLOBAL STATUS LIKE 'Threads_running'", timeout=timeout)
+            signals["threads_running"] = int(rows[0][1]) if rows and rows[0][1] else None
+        if self.cfg.max_history_length > 0:
+            rows = query(
+                self.src,
+                "SELECT `COUNT` FROM information_schema.INNODB_METRICS WHERE NAME='trx_rseg_history_len'",
+                timeout=timeout,
+            )
+            signals["history_length"] = int(rows[0][0]) if rows and rows[0][0] else None
+        if self.cfg.max_replica_lag > 0:
+            for rep in self.cfg.replicas:
+                lag = None
+                for sql in ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS"):
+                    try:
+                        rows = query_named(rep, sql, timeout=timeout)
+                    except QueryTimeout:
+                        raise
+                    except RuntimeError:
+                        continue
+                    if rows:
+                        value = rows[0].get("Seconds_Behind_Source", rows[0].get("Seconds_Behind_Master"))
+                        lag = int(value) if value not in (None, "") else None
+                    break
+                signals[f"replica_lag:{rep.label()}"] = lag
+        return signals
+
+    def _limit(self, name: str) -> int:
+        if name == "threads_running":
+            return self.cfg.max_threads_running
+        if name == "history_length":
+            return self.cfg.max_history_length
+        return self.cfg.max_replica_lag
+
+    def _poll(self) -> None:
+        try:
+            signals = self._read_signals()
+        except QueryTimeout as exc:
+            # A source (or replica) too busy to answer a status query is
+            # overloaded: pause rather than keep reading blind.
+            self._set_state("pause", f"health poll timed out: {exc}", {"poll": "timeout"})
+            return
+        except RuntimeError as exc:
+            if "health_unavailable" not in self._warned:
+                self._warned.add("health_unavailable")
+                self.event("health_unavailable", error=str(exc))
+            return
+        over: List[str] = []
+        near: List[str] = []
+        for name, value in signals.items():
+            limit = self._limit(name)
+            if value is None or limit <= 0:
+                continue
+            if value >= limit:
+                over.append(f"{name}={value}>={limit}")
+            elif value >= limit * self.cfg.slow_ratio:
+                near.append(f"{name}={value}>={limit * self.cfg.slow_ratio:g}")
+        if over:
+            new_state, reason = "pause", ", ".join(over)
+        elif near:
+            # Hysteresis: a paused reader stays paused until signals fall below the slow band.
+            new_state, reason = ("pause" if self.state == "pause" else "slow"), ", ".join(near)
+        else:
+            new_state, reason = "run", ""
+        self._set_state(new_state, reason, signals)
+
+    def _set_state(self, new_state: str, reason: str, signals: Dict[str, Any]) -> None:
+        with self._changed:
+            self.signals = signals
+            if new_state != self.state:
+                name = "resume" if new_state == "run" else new_state
+                self.event(name, reason=reason or "signals back below thresholds", signals=signals)
+                self.state, self.reason = new_state, reason
+                self._changed.notify_all()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.cfg.poll_secs):
+            self._poll()
+
+    def factor(self) -> float:
+        return 0.5 if self.state == "slow" else 1.0
+
+    def wait_while_paused(self) -> float:
+        """Block while paused, at most max_pause_secs; returns seconds waited."""
+        if self.state != "pause":
+            return 0.0
+        t0 = time.monotonic()
+        with self._changed:
+            self._changed.wait_for(lambda: self.state != "pause" or self._stop.is_set(), timeout=self.cfg.max_pause_secs)
+        waited = time.monotonic() - t0
+        self.paused_s += waited
+        return waited
+
+    def hold(self) -> float:
+        """Block for as long as the governor says pause; for readers that start one statement at a time."""
+        waited = 0.0
+        while self.state == "pause" and not self._stop.is_set():
+            waited += self.wait_while_paused()
+        return waited
+
+
+def _insert_rows(line: bytes) -> int:
+    """Rows in one extended INSERT: the `),(` separators outside quoted strings, plus one.
+
+    Escaped backslashes and quotes are dropped first, so every remaining quote
+    opens or closes a string and the even-numbered pieces are outside them.
+    """
+    if b"'" not in line:
+        return line.count(b"),(") + 1
+    pieces = line.replace(b"\\\\", b"").replace(b"\\'", b"").split(b"'")
+    return sum(p.count(b"),(") for p in pieces[::2]) + 1
+
+
+def govern_stream(stream: BinaryIO, sink: BinaryIO, gov: Optional[Governor]) -> int:
+    """Copy a dump stream, holding it to the byte/row budgets and pausing on bad source health.
+
+    Slowing the consumer makes the dump client block on write, which in turn
+    slows its reads from the source. Streams governed by one Governor share
+    its budgets. While paused, one chunk is let through every
+    max_pause_secs so the source session stays inside net_write_timeout.
+    The stream is read a line, i.e. one dump statement, at a time, so rows are
+    counted per whole INSERT and never across a read boundary.
+    """
+    if gov is None:
+        shutil.copyfileobj(stream, sink, CHUNK_BYTES)
+        sink.flush()
+        return 0
+    total = 0
+    for line in stream:
+        gov.wait_while_paused()
+        factor = gov.factor()
+        slept = gov.bytes_bucket.consume(len(line), factor)
+        if gov.cfg.rows_per_sec > 0 and line.startswith(b"INSERT INTO "):
+            slept += gov.rows_bucket.consume(_insert_rows(line), factor)
+        gov.throttled_s += slept
+        sink.write(line)
+        total += len(line)
+    sink.flush()
+    return total
+
+
+def govern_process(cmd: List[str], gov: Governor, log: Callable[[str], None]) -> int:
+    """Run an external reader (e.g. sqldata) and SIGSTOP/SIGCONT it on bad source health.
+
+    Stops are sliced to max_pause_secs with a short resume in between, so the
+    reader's source sessions are not dropped by net_write_timeout. The reader
+    talks to the source directly, so the byte/row budgets cannot be applied:
+    it is only ever paused, never rate-limited.
+    """
+    if gov.cfg.budgets():
+        gov.event("budgets_not_applied", reason="external reader is paused on health thresholds only")
+        log(f"GOVERNOR: byte/row budgets do not apply to {gov.reader}; it is only paused on health thresholds")
+    proc = subprocess.Popen(cmd, start_new_session=True)
+    try:
+        while proc.poll() is None:
+            if gov.state == "pause":
+                os.killpg(proc.pid, signal.SIGSTOP)
+                log(f"GOVERNOR: paused {gov.reader} ({gov.reason})")
+                try:
+                    gov.wait_while_paused()
+                finally:
+                    os.killpg(proc.pid, signal.SIGCONT)
+                if gov.state == "pause":
+                    time.sleep(2)
+                else:
+                    log(f"GOVERNOR: resumed {gov.reader}")
+            else:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        os.killpg(proc.pid, signal.SIGTERM)
+        raise
+    return proc.wait()
+
+
+def _event_time(event: Dict[str, Any]) -> float:
+    try:
+        return datetime.fromisoformat(str(event.get("ts"))).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def summarize_events(path: Path, since: float = 0.0) -> Dict[str, Any]:
+    """Throttle section for report.json from governor_events.jsonl.
+
+    The file is shared by every run writing to the same out dir; only events
+    at or after `since` (the run's start) are counted.
+    """
+    events: List[Dict[str, Any]] = []
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict) and _event_time(event) >= since:
+                events.append(event)
+    pauses = sum(1 for e in events if e.get("event") == "pause")
+    slows = sum(1 for e in events if e.get("event") == "slow")
+    paused_s = sum(float(e.get("paused_s") or 0) for e in events if e.get("event") == "stop")
+    throttled_s = sum(float(e.get("throttled_s") or 0) for e in events if e.get("event") == "stop")
+    return {
+        "events_file": str(path),
+        "pauses": pauses,
+        "slowdowns": slows,
+        "paused_s": round(paused_s, 1),
+        "throttled_s": round(throttled_s, 1),
+        "events": [e for e in events if e.get("event") not in ("start",)][-500:],
+    }
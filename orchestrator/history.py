@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import statistics
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .lobcopy import LOB_REPORT
+from .progress import PROGRESS_FILE
+
+HISTORY_FILE = "history.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  run_id TEXT NOT NULL,
+  report_path TEXT NOT NULL,
+  run_dir TEXT NOT NULL,
+  mode TEXT,
+  playbook TEXT,
+  config_path TEXT,
+  started_at TEXT,
+  finished_at TEXT,
+  duration_s REAL,
+  success INTEGER,
+  message TEXT,
+  source_host TEXT,
+  source_version TEXT,
+  target_version TEXT,
+  rows INTEGER,
+  bytes INTEGER,
+  indexed_at TEXT NOT NULL,
+  UNIQUE (run_id, report_path)
+);
+CREATE TABLE IF NOT EXISTS steps (
+  run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+  seq INTEGER NOT NULL,
+  step_id TEXT NOT NULL,
+  name TEXT,
+  status TEXT,
+  returncode INTEGER,
+  started_at TEXT,
+  duration_s REAL,
+  rows INTEGER,
+  bytes INTEGER,
+  PRIMARY KEY (run, seq)
+);
+CREATE TABLE IF NOT EXISTS gates (
+  run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  status TEXT
+);
+CREATE TABLE IF NOT EXISTS warnings (
+  run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  severity TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_playbook ON runs (playbook, started_at);
+CREATE INDEX IF NOT EXISTS steps_step ON steps (step_id);
+CREATE INDEX IF NOT EXISTS gates_run ON gates (run);
+CREATE INDEX IF NOT EXISTS warnings_run ON warnings (run);
+"""
+
+_RUN_COLUMNS = (
+    "id", "run_id", "report_path", "run_dir", "mode", "playbook", "started_at", "finished_at",
+    "duration_s", "success", "message", "source_host", "source_version", "rows", "bytes",
+)
+
+
+def _seconds(start: Optional[str], end: Optional[str]) -> Optional[float]:
+    try:
+        return round((datetime.fromisoformat(str(end)) - datetime.fromisoformat(str(start))).total_seconds(), 1)
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def is_fresh(path: Path, since: float) -> bool:
+    """True when path exists and was modified at or after `since` (a step's start)."""
+    try:
+        return path.stat().st_mtime >= since
+    except OSError:
+        return False
+
+
+def step_data(out_dir: Path, since: float) -> Dict[str, Any]:
+    """Rows/bytes moved by a step, from the run-dir files the data phases write.
+
+    Only files modified after `since` (the step's start) count, so a step that
+    moves no data does not inherit the previous phase's totals.
+    """
+    data: Dict[str, Any] = {}
+
+    def fresh(path: Path) -> bool:
+        return is_fresh(path, since)
+
+    progress = out_dir / PROGRESS_FILE
+    if fresh(progress):
+        snapshot = _read_json(progress)
+        overall = snapshot.get("overall") or {}
+        data["phase"] = snapshot.get("phase", "")
+        data["rows"] = int(overall.get("rows") or 0)
+        data["bytes"] = int(overall.get("bytes") or 0)
+    for path in sorted(out_dir.glob("fanout_*.json")):
+        if fresh(path):
+            # The dump stream is read once whatever the number of targets.
+            data["bytes"] = max(data.get("bytes", 0), int(_read_json(path).get("source_bytes") or 0))
+    lob = out_dir / LOB_REPORT
+    if fresh(lob):
+        summary = _read_json(lob)
+        data["rows"] = data.get("rows", 0) + int(summary.get("rows") or 0)
+        data["bytes"] = data.get("bytes", 0) + int(summary.get("wire_bytes") or 0)
+    return data
+
+
+def _rate(amount: Optional[int], seconds: Optional[float]) -> Optional[float]:
+    if not amount or not seconds or seconds <= 0:
+        return None
+    return amount / seconds
+
+
+@dataclass
+class RunHistory:
+    """SQLite index of finished runs (steps, durations, rows/bytes, gates, warnings) for trend queries."""
+
+    path: Path
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def index_report(self, data: Dict[str, Any], report_path: Path) -> int:
+        """Insert or replace one report.json; returns the history id of the run."""
+        report_path = Path(report_path).resolve()
+        steps = data.get("steps") or []
+        step_rows = []
+        for seq, s in enumerate(steps):
+            d = s.get("details") or {}
+            moved = d.get("data") or {}
+            step_rows.append((
+                seq, s.get("id", ""), s.get("name", ""), s.get("status", ""), d.get("returncode"),
+                d.get("started_at"), d.get("duration_s"), moved.get("rows"), moved.get("bytes"),
+            ))
+        total_rows = sum(r[7] or 0 for r in step_rows) or None
+        total_bytes = sum(r[8] or 0 for r in step_rows) or None
+        source = data.get("source") or {}
+        target = data.get("target") or {}
+        success = data.get("success")
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM runs WHERE run_id=? AND report_path=?", (data.get("run_id", ""), str(report_path))
+            )
+            cur = conn.execute(
+                "INSERT INTO runs (run_id, report_path, run_dir, mode, playbook, config_path, started_at, "
+                "finished_at, duration_s, success, message, source_host, source_version, target_version, "
+                "rows, bytes, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    data.get("run_id", ""),
+                    str(report_path),
+                    report_path.parent.name,
+                    data.get("mode"),
+                    # Runs are grouped by playbook; plans and assessments by their own mode.
+                    ((data.get("plan") or {}).get("mode") if data.get("mode") == "run" else None) or data.get("mode"),
+                    data.get("config_path"),
+                    data.get("started_at"),
+                    data.get("finished_at"),
+                    _seconds(data.get("started_at"), data.get("finished_at")),
+                    None if success is None else int(bool(success)),
+                    data.get("message"),
+                    str(source.get("host") or ""),
+                    str(source.get("version") or ""),
+                    str(target.get("version") or "") if isinstance(target, dict) else "",
+                    total_rows,
+                    total_bytes,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+            run = int(cur.lastrowid)
+            conn.executemany(
+                "INSERT INTO steps (run, seq, step_id, name, status, returncode, started_at, duration_s, rows, bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run, *r) for r in step_rows],
+            )
+            conn.executemany(
+                "INSERT INTO gates (run, name, status) VALUES (?, ?, ?)",
+                [(run, g.get("name", ""), g.get("status")) for g in data.get("gates") or []],
+            )
+            conn.executemany(
+                "INSERT INTO warnings (run, name, severity) VALUES (?, ?, ?)",
+                [(run, w.get("name", ""), w.get("severity")) for w in data.get("warnings") or []],
+            )
+        return run
+
+    def index_paths(self, paths: Iterable[Path]) -> List[Path]:
+        """Backfill: index every report.json under the given files/directories; returns those indexed."""
+        indexed = []
+        for p in paths:
+            p = Path(p)
+            candidates = sorted(p.rglob("report.json")) if p.is_dir() else [p]
+            for report in candidates:
+                data = _read_json(report)
+                if not data.get("run_id") or "steps" not in data:
+                    continue
+                self.index_report(data, report)
+                indexed.append(report)
+        return indexed
+
+    def _runs(self, where: str = "", params: tuple = (), limit: int = 0) -> List[Dict[str, Any]]:
+        sql = f"SELECT {', '.join(_RUN_COLUMNS)} FROM runs"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY started_at DESC, id DESC"
+        if limit > 0:
+            sql += f" LIMIT {int(limit)}"
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [dict(zip(_RUN_COLUMNS, r)) for r in rows]
+
+    def list_runs(self, playbook: str = "", last: int = 20) -> List[Dict[str, Any]]:
+        if playbook:
+            return self._runs("playbook=?", (playbook,), last)
+        return self._runs(limit=last)
+
+    def resolve(self, ref: str) -> Dict[str, Any]:
+        """A run by history id, run_id or run directory name (newest match wins)."""
+        ref = str(ref).strip()
+        if ref.isdigit():
+            rows = self._runs("id=?", (int(ref),), 1)
+        else:
+            rows = self._runs("run_id=? OR run_dir=?", (ref, ref), 1)
+        if not rows:
+            raise KeyError(f"no run {ref!r} in {self.path}")
+        return rows[0]
+
+    def steps(self, run: int) -> List[Dict[str, Any]]:
+        cols = ("seq", "step_id", "name", "status", "returncode", "started_at", "duration_s", "rows", "bytes")
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(cols)} FROM steps WHERE run=? ORDER BY seq", (run,)).fetchall()
+        return [dict(zip(cols, r)) for r in rows]
+
+    def trend(self, playbook: str, step: str = "", last: int = 20) -> List[Dict[str, Any]]:
+        """Oldest-first duration and throughput of a playbook (or one of its steps) across runs."""
+        out = []
+        for run in reversed(self.list_runs(playbook, last)):
+            point = {k: run[k] for k in ("id", "run_id", "run_dir", "started_at", "success")}
+            if step:
+                match = [s for s in self.steps(run["id"]) if s["step_id"] == step and s["status"] == "DONE" and s["duration_s"] is not None]
+                if not match:
+                    continue
+                src = match[-1]
+            else:
+                src = run
+            point.update(duration_s=src["duration_s"], rows=src["rows"], bytes=src["bytes"])
+            point["rows_per_s"] = _rate(src["rows"], src["duration_s"])
+            point["bytes_per_s"] = _rate(src["bytes"], src["duration_s"])
+            out.append(point)
+        return out
+
+    def compare(self, ref_a: str, ref_b: str) -> Dict[str, Any]:
+        """Phase-by-phase comparison of two runs (B relative to A)."""
+        a, b = self.resolve(ref_a), self.resolve(ref_b)
+        steps_a = {s["step_id"]: s for s in self.steps(a["id"])}
+        steps_b = {s["step_id"]: s for s in self.steps(b["id"])}
+        order = list(steps_a) + [k for k in steps_b if k not in steps_a]
+        rows = []
+        for step_id in order:
+            sa, sb = steps_a.get(step_id) or {}, steps_b.get(step_id) or {}
+            da, db = sa.get("duration_s"), sb.get("duration_s")
+            rows.append({
+                "step_id": step_id,
+                "status_a": sa.get("status", "-"),
+                "status_b": sb.get("status", "-"),
+                "duration_a": da,
+                "duration_b": db,
+                "delta_pct": round((db - da) / da * 100, 1) if da and db is not None else None,
+                "bytes_per_s_a": _rate(sa.get("bytes"), da),
+                "bytes_per_s_b": _rate(sb.get("bytes"), db),
+                "rows_per_s_a": _rate(sa.get("rows"), da),
+                "rows_per_s_b": _rate(sb.get("rows"), db),
+            })
+        return {"a": a, "b": b, "steps": rows}
+
+    def regressions(
+        self,
+        ref: str = "",
+        baseline: int = 5,
+        threshold: float = 0.2,
+        min_seconds: float = 5.0,
+    ) -> Dict[str, Any]:
+        """Compare a run with the median of the previous successful runs of the same playbook.
+
+        A step regresses when it is more than `threshold` slower (and at least
+        `min_seconds` slower, so short steps do not flap) or its bytes/rows per
+        second dropped by more than `threshold`.
+        """
+        run = self.resolve(ref) if ref else (self._runs("mode='run'", (), 1) or [None])[0]
+        if run is None:
+            raise KeyError(f"no migration runs in {self.path}")
+        prior = self._runs(
+            "playbook=? AND success=1 AND id<>? AND started_at<?",
+            (run["playbook"], run["id"], run["started_at"] or ""),
+            baseline,
+        )
+        base_steps: Dict[str, List[Dict[str, Any]]] = {}
+        for p in prior:
+            for s in self.steps(p["id"]):
+                if s["status"] == "DONE" and s["duration_s"] is not None:
+                    base_steps.setdefault(s["step_id"], []).append(s)
+        findings = []
+        for s in self.steps(run["id"]):
+            history = base_steps.get(s["step_id"]) or []
+            if s["status"] != "DONE" or s["duration_s"] is None or not history:
+                continue
+            median = statistics.median(h["duration_s"] for h in history)
+            if s["duration_s"] > median * (1 + threshold) and s["duration_s"] - median >= min_seconds:
+                findings.append({
+                    "step_id": s["step_id"], "metric": "duration_s",
+                    "baseline": round(median, 1), "value": s["duration_s"],
+                    "change_pct": round((s["duration_s"] - median) / median * 100, 1) if median else None,
+                })
+            for metric, key in (("bytes_per_s", "bytes"), ("rows_per_s", "rows")):
+                rates = [r for r in (_rate(h[key], h["duration_s"]) for h in history) if r]
+                value = _rate(s[key], s["duration_s"])
+                if not rates or value is None:
+                    continue
+                base_rate = statistics.median(rates)
+                if value < base_rate * (1 - threshold):
+                    findings.append({
+                        "step_id": s["step_id"], "metric": metric,
+                        "baseline": round(base_rate, 1), "value": round(value, 1),
+                        "change_pct": round((value - base_rate) / base_rate * 100, 1),
+                    })
+        return {"run": run, "baseline_runs": [p["id"] for p in prior], "regressions": findings}
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import subprocess
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .catalog import CATALOG_FILE, open_catalog, snapshot_source
+from .dbclient import Endpoint, iter_query, sql_ident, sql_quote
+from .governor import Governor, TokenBucket
+
+LOB_REPORT = "lob_transfer.json"
+LOB_CHECK = Path(__file__).resolve().parents[1] / "sql" / "catalog" / "lob_tables.sql"
+_BINARY_LOB = ("blob", "mediumblob", "longblob")
+# Columns the text protocol cannot round-trip through LOAD DATA byte-for-byte.
+_UNSUPPORTED_TYPES = (
+    "geometry", "point", "linestring", "polygon", "multipoint", "multilinestring",
+    "multipolygon", "geometrycollection", "geomcollection",
+)
+_LOAD_SESSION = (
+    "SET SESSION foreign_key_checks=0, unique_checks=0, "
+    "sql_mode='NO_AUTO_VALUE_ON_ZERO', time_zone='+00:00'"
+)
+
+
+@dataclass
+class LobTable:
+    schema: str
+    name: str
+    lob_columns: List[str]
+    rows: int = 0
+    avg_row_length: int = 0
+    data_bytes: int = 0
+
+    def qualified(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+
+@dataclass
+class _Column:
+    name: str
+    data_type: str
+    nullable: bool
+
+
+@dataclass
+class _TableCopy:
+    table: LobTable
+    columns: List[_Column] = field(default_factory=list)
+    rows: int = 0
+    wire_bytes: int = 0
+    # Extra bytes --hex-blob would have put on the wire for the binary columns (estimate).
+    hex_bytes_avoided: int = 0
+    chunks: int = 0
+    started: float = 0.0
+    finished: float = 0.0
+
+
+def find_catalog(env: Mapping[str, str], out_dir: Path) -> Optional[Path]:
+    """LOB_CATALOG, else the newest catalog.sqlite left by an assessment under the artifacts root."""
+    explicit = str(env.get("LOB_CATALOG", "")).strip()
+    if explicit:
+        return Path(explicit)
+    candidates = [out_dir / CATALOG_FILE, out_dir.parent / CATALOG_FILE, *out_dir.parent.glob(f"assess_*/{CATALOG_FILE}")]
+    found = [p for p in candidates if p.exists()]
+    if not found:
+        return None
+    return max(found, key=lambda p: p.stat().st_mtime)
+
+
+def detect_lob_tables(
+    catalog: Path,
+    schemas: Sequence[str],
+    min_bytes: int = 64 << 20,
+    min_avg_row: int = 2048,
+) -> List[LobTable]:
+    """BLOB/TEXT/JSON tables worth the LOB path: large overall and wide per row."""
+    wanted = {s.strip() for s in schemas if s and s.strip()}
+    db = open_catalog(catalog)
+    try:
+        rows = db.execute(LOB_CHECK.read_text(encoding="utf-8")).fetchall()
+        marks = ", ".join("?" for _ in _UNSUPPORTED_TYPES)
+        spatial = set(db.execute(
+            f"SELECT DISTINCT table_schema, table_name FROM columns WHERE lower(data_type) IN ({marks})",
+            _UNSUPPORTED_TYPES,
+        ).fetchall())
+    finally:
+        db.close()
+    out: List[LobTable] = []
+    for schema, name, lob_cols, n_rows, avg_row, data_len in rows:
+        if (wanted and schema not in wanted) or (schema, name) in spatial:
+            continue
+        t = LobTable(
+            schema=schema,
+            name=name,
+            lob_columns=[c for c in str(lob_cols or "").split(",") if c],
+            rows=int(n_rows or 0),
+            avg_row_length=int(avg_row or 0),
+            data_bytes=int(data_len or 0),
+        )
+        if t.data_bytes >= min_bytes and t.avg_row_length >= min_avg_row:
+            out.append(t)
+    return out
+
+
+def plan_lob_tables(
+    src: Endpoint,
+    env: Mapping[str, str],
+    out_dir: Path,
+    schemas: Sequence[str],
+    log: Optional[Callable[[str], None]] = None,
+) -> List[LobTable]:
+    """Pick LOB-heavy tables from the assessment catalog, snapshotting the source if there is none."""
+    log = log or (lambda _msg: None)
+    catalog = find_catalog(env, out_dir)
+    if catalog is None:
+        catalog = out_dir / CATALOG_FILE
+        log(f"LOB: no assessment catalog found; snapshotting {src.label()} -> {catalog}")
+        snapshot_source(src, catalog, log=log)
+    else:
+        log(f"LOB: using catalog {catalog}")
+    min_mb = float(env.get("LOB_MIN_MB") or 64)
+    min_avg_row = int(env.get("LOB_MIN_AVG_ROW") or 2048)
+    return detect_lob_tables(catalog, schemas, min_bytes=int(min_mb * (1 << 20)), min_avg_row=min_avg_row)
+
+
+def _load_columns(src: Endpoint, tables: List[LobTable]) -> Dict[Tuple[str, str], List[_Column]]:
+    """Current column definitions on the source (the catalog may be older than the copy)."""
+    pairs = ", ".join(f"({sql_quote(t.schema)}, {sql_quote(t.name)})" for t in tables)
+    sql = (
+        "SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, IS_NULLABLE, LOWER(DATA_TYPE), UPPER(EXTRA) "
+        f"FROM information_schema.COLUMNS WHERE (TABLE_SCHEMA, TABLE_NAME) IN ({pairs}) "
+        "ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION"
+    )
+    cols: Dict[Tuple[str, str], List[_Column]] = {}
+    for schema, name, col, nullable, data_type, extra in iter_query(src, sql):
+        if "GENERATED" in (extra or ""):
+            continue
+        cols.setdefault((schema or "", name or ""), []).append(
+            _Column(name=col or "", data_type=data_type or "", nullable=nullable == "YES")
+        )
+    return cols
+
+
+def _select_sql(copy: _TableCopy) -> str:
+    # NULL and the string 'NULL' print the same in --batch output, so nullable
+    # columns carry an IS NULL indicator appended after the values.
+    exprs = [f"{sql_ident(c.name)}+0" if c.data_type == "bit" else sql_ident(c.name) for c in copy.columns]
+    exprs += [f"{sql_ident(c.name)} IS NULL" for c in copy.columns if c.nullable]
+    return f"SELECT {', '.join(exprs)} FROM {sql_ident(copy.table.schema)}.{sql_ident(copy.table.name)}"
+
+
+def _load_sql(copy: _TableCopy) -> str:
+    targets: List[str] = []
+    sets: List[str] = []
+    for i, c in enumerate(copy.columns):
+        if c.data_type == "bit":
+            targets.append(f"@bit{i}")
+            sets.append(f"{sql_ident(c.name)} = CAST(@bit{i} AS UNSIGNED)")
+        else:
+            targets.append(sql_ident(c.name))
+    sql = (
+        f"LOAD DATA LOCAL INFILE '/dev/stdin' INTO TABLE {sql_ident(copy.table.schema)}.{sql_ident(copy.table.name)} "
+        "CHARACTER SET binary FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+        f"({', '.join(targets)})"
+    )
+    if sets:
+        sql += " SET " + ", ".join(sets)
+    return f"{_LOAD_SESSION}; {sql}"
+
+
+class _Loader:
+    """One LOAD DATA LOCAL session per target and chunk, fed on the client's stdin."""
+
+    def __init__(self, ep: Endpoint, sql: str) -> None:
+        self.ep = ep
+        self.proc = subprocess.Popen(
+            ep.argv("--local-infile=1", "--batch", "--default-character-set=binary", "-e", sql),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            env=ep.env(),
+        )
+
+    def write(self, data: bytes) -> None:
+        assert self.proc.stdin is not None
+        try:
+            self.proc.stdin.write(data)
+        except BrokenPipeError:
+            self.close()
+            raise RuntimeError(f"LOAD DATA session on {self.ep.label()} closed early")
+
+    def close(self) -> None:
+        assert self.proc.stdin is not None
+        try:
+            self.proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        assert self.proc.stderr is not None
+        err = self.proc.stderr.read()
+        self.proc.stderr.close()
+        self.proc.wait()
+        if self.proc.returncode != 0:
+            msg = (err or b"").decode("utf-8", "replace").strip().replace("\n", " ")
+            raise RuntimeError(f"LOAD DATA failed on {self.ep.label()} rc={self.proc.returncode}: {msg[:240]}")
+
+    def kill(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def _source_session(src: Endpoint, copies: List[_TableCopy], token: str) -> subprocess.Popen:
+    """One source session, one consistent snapshot, every table streamed in turn."""
+    stmts = [
+        "SET SESSION time_zone='+00:00'",
+        "SET SESSION net_write_timeout=600",
+        "SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ",
+        "START TRANSACTION WITH CONSISTENT SNAPSHOT",
+    ]
+    for i, copy in enumerate(copies):
+        stmts.append(f"SELECT {sql_quote(token)}, {i}")
+        stmts.append(_select_sql(copy))
+    stmts.append("COMMIT")
+    try:
+        return subprocess.Popen(
+            src.argv("--batch", "--skip-column-names", "--quick", "--default-character-set=binary", "-e", "; ".join(stmts)),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=src.env(),
+        )
+    except FileNotFoundError:
+        raise RuntimeError(f"client not found: {src.client_bin}")
+
+
+def copy_lob_tables(
+    src: Endpoint,
+    targets: List[Endpoint],
+    tables: List[LobTable],
+    chunk_bytes: int = 64 << 20,
+    gov: Optional[Governor] = None,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Copy tables as binary-safe LOAD DATA chunks instead of hex-encoded INSERTs.
+
+    Rows are read one at a time from the source's --batch output, whose escaping
+    (\\0, \\t, \\n, \\\\) is already what LOAD DATA expects, so values go on the wire
+    as raw bytes rather than 2x hex. Memory is bounded by the widest row; each chunk
+    of about chunk_bytes is loaded in its own target transaction.
+    """
+    log = log or (lambda _msg: None)
+    started = time.time()
+    columns = _load_columns(src, tables)
+    copies: List[_TableCopy] = []
+    skipped: List[Dict[str, str]] = []
+    for t in tables:
+        cols = columns.get((t.schema, t.name))
+        if not cols:
+            skipped.append({"table": t.qualified(), "reason": "not found on source"})
+        elif any(c.data_type in _UNSUPPORTED_TYPES for c in cols):
+            skipped.append({"table": t.qualified(), "reason": "spatial columns"})
+        else:
+            copies.append(_TableCopy(table=t, columns=cols))
+    if skipped:
+        # The dump already left these tables' data out; the schema changed since planning.
+        raise RuntimeError("LOB path cannot copy: " + ", ".join(f"{s['table']} ({s['reason']})" for s in skipped))
+
+    token = f"lob-{uuid.uuid4().hex}"
+    markers = {f"{token}\t{i}\n".encode(): c for i, c in enumerate(copies)}
+    bytes_bucket = TokenBucket(gov.cfg.bytes_per_sec) if gov is not None else None
+    rows_bucket = TokenBucket(gov.cfg.rows_per_sec) if gov is not None else None
+    proc = _source_session(src, copies, token)
+    assert proc.stdout is not None and proc.stderr is not None
+    err_tail: Deque[bytes] = deque(maxlen=20)
+    current: Optional[_TableCopy] = None
+    loaders: List[_Loader] = []
+    chunk = 0
+
+    def finish_chunk() -> None:
+        nonlocal loaders, chunk
+        for ld in loaders:
+            ld.close()
+        loaders = []
+        chunk = 0
+
+    def finish_table() -> None:
+        if current is None:
+            return
+        finish_chunk()
+        current.finished = time.time()
+        log(f"LOB {current.table.qualified()}: {current.rows} rows, {current.wire_bytes} bytes in "
+            f"{current.chunks} chunk(s), {current.finished - current.started:.1f}s")
+
+    try:
+        for line in proc.stdout:
+            copy = markers.get(line)
+            if copy is not None:
+                finish_table()
+                current = copy
+                current.started = time.time()
+                continue
+            if current is None:
+                continue
+            fields = line.rstrip(b"\n").split(b"\t")
+            ncols = len(current.columns)
+            nulls = fields[ncols:]
+            if len(nulls) != sum(1 for c in current.columns if c.nullable):
+                raise RuntimeError(f"unexpected row shape from {current.table.qualified()} ({len(fields)} fields)")
+            k = 0
+            for i, c in enumerate(current.columns):
+                if c.nullable:
+                    if nulls[k] == b"1":
+                        fields[i] = b"\\N"
+                    k += 1
+                if c.data_type in _BINARY_LOB:
+                    current.hex_bytes_avoided += len(fields[i]) + 2
+            row = b"\t".join(fields[:ncols]) + b"\n"
+            if gov is not None:
+                gov.wait_while_paused()
+                gov.throttled_s += bytes_bucket.consume(len(line), gov.factor())
+                gov.throttled_s += rows_bucket.consume(1, gov.factor())
+            if not loaders:
+                loaders = [_Loader(ep, _load_sql(current)) for ep in targets]
+                current.chunks += 1
+            for ld in loaders:
+                ld.write(row)
+            chunk += len(row)
+            current.rows += 1
+            current.wire_bytes += len(line)
+            if chunk >= chunk_bytes:
+                finish_chunk()
+        finish_table()
+        proc.stdout.close()
+        err_tail.extend(proc.stderr.read().splitlines()[-20:])
+        rc = proc.wait()
+    except BaseException:
+        for ld in loaders:
+            ld.kill()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        raise
+    if rc != 0:
+        msg = b" ".join(err_tail).decode("utf-8", "replace")
+        raise RuntimeError(f"LOB source read failed on {src.label()} rc={rc}: {msg[:240]}")
+    results = [
+        {
+            "table": c.table.qualified(),
+            "lob_columns": c.table.lob_columns,
+            "rows": c.rows,
+            "wire_bytes": c.wire_bytes,
+            "hex_bytes_avoided": c.hex_bytes_avoided,
+            "chunks": c.chunks,
+            "duration_s": round(c.finished - c.started, 1) if c.finished else 0.0,
+        }
+        for c in copies
+    ]
+    return {
+        "source": src.label(),
+        "targets": [t.label() for t in targets],
+        "chunk_bytes": chunk_bytes,
+        "duration_s": round(time.time() - started, 1),
+        "rows": sum(r["rows"] for r in results),
+        "wire_bytes": sum(r["wire_bytes"] for r in results),
+        "hex_bytes_avoided": sum(r["hex_bytes_avoided"] for r in results),
+        "tables": results,
+    }
@@ -2,17 +2,36 @@ from __future__ import annotations
 
 import json
 import os
+import shutil
+import sqlite3
 import sys
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Mapping
 
 import typer
 import yaml
 
 from .state import StateStore
-from .report import Report, GateStatus, StepStatus
+from .report import Report, GateStatus, StepStatus, WarningItem
 from .runner import run_step
-from .checks import run_assessment_checks, AssessmentResult
+from .checks import FINDINGS_DIR, run_assessment_checks, AssessmentResult
+from .catalog import CATALOG_FILE, evaluate_checks, snapshot_source
+from .dbclient import endpoint_from_env
+from .users import DEFAULT_APP_USER_PASSWORD, migrate_users
+from .artifacts import ArtifactStore, retention_from_env
+from .fanout import fan_out, targets_from_env
+from .governor import EVENTS_FILE, Governor, config_from_env, govern_process, govern_stream, summarize_events
+from .fleet import FLEET_REPORT, FLEET_SUMMARY, load_inventory, run_fleet, write_fleet_report
+from .lobcopy import LOB_REPORT, LobTable, copy_lob_tables, plan_lob_tables
+from .schemadiff import KINDS, SCHEMA_DIFF_REPORT, SCHEMA_DIFF_TSV, schema_diff, summary as diff_summary, write_diff
+from .perfcheck import PERFCHECK_REPORT, PERFCHECK_TSV, perfcheck, summary as perf_summary, warnings_from, write_perfcheck
+from .prewarm import prewarm, write_prewarm
+from .stats import post_load_stats, write_stats
+from .advisor import PROFILES, advise, target_host, write_advice
+from .backup import BACKUP_MANIFEST, datadir_backup, logical_backup, restore_manifest, verify_manifest, write_backup
+from .history import HISTORY_FILE, RunHistory, is_fresh, step_data
+from .progress import PROGRESS_FILE, follow_dump, follow_sqldata, render, tracker_from_env
 
 app = typer.Typer(add_completion=False, help="MySQL -> MariaDB migration orchestrator\n© 2026 MariaDB plc ")
 
@@ -20,6 +39,8 @@ DEFAULT_OUTDIR = "artifacts"
 DEFAULT_STATE = "state.json"
 DEFAULT_REPORT = "report.json"
 DEFAULT_LOG = "run.log"
+DEFAULT_STORE = "store"
+
 
 def _failure_hint_from_meta(meta: Optional[Dict[str, Any]]) -> Optional[str]:
     if not meta:
@@ -37,35 +58,86 @@ def _failure_hint_from_meta(meta: Optional[Dict[str, Any]]) -> Optional[str]:
             return s
     return None
 
+
 def _load_yaml(path: Path) -> Dict[str, Any]:
     if not path.exists():
         raise typer.BadParameter(f"Config file not found: {path}")
     with path.open("r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
+
 def _ensure_outdir(outdir: Path) -> None:
     outdir.mkdir(parents=True, exist_ok=True)
 
+
+def _config_env(cfg: Dict[str, Any]) -> Dict[str, str]:
+    env = cfg.get("env", {}) or {}
+    return {**{str(k): str(v) for k, v in env.items()}, **os.environ}
+
+
+def _open_store(env: Mapping[str, str]) -> Optional[ArtifactStore]:
+    """Shared artifact store (ARTIFACT_STORE_DIR, default artifacts/store); ARTIFACT_STORE=0 disables it."""
+    if str(env.get("ARTIFACT_STORE", "1")).strip().lower() in ("0", "false", "no", "off"):
+        return None
+    root = Path(env.get("ARTIFACT_STORE_DIR") or Path(DEFAULT_OUTDIR) / DEFAULT_STORE).resolve()
+    try:
+        return ArtifactStore(root, codec=env.get("ARTIFACT_CODEC", ""))
+    except (OSError, RuntimeError, sqlite3.Error) as exc:
+        typer.echo(f"WARN: artifact store disabled: {exc}")
+        return None
+
+
+def _open_history(env: Mapping[str, str]) -> Optional[RunHistory]:
+    """Run-history database (MIGRATION_HISTORY_DB, default artifacts/history.sqlite); MIGRATION_HISTORY=0 disables it."""
+    if str(env.get("MIGRATION_HISTORY", "1")).strip().lower() in ("0", "false", "no", "off"):
+        return None
+    path = Path(env.get("MIGRATION_HISTORY_DB") or Path(DEFAULT_OUTDIR) / HISTORY_FILE).resolve()
+    try:
+        return RunHistory(path)
+    except (OSError, sqlite3.Error) as exc:
+        typer.echo(f"WARN: run history disabled: {exc}")
+        return None
+
+
+def _apply_retention(store: Optional[ArtifactStore], env: Mapping[str, str], report: Report) -> None:
+    if store is None:
+        return
+    try:
+        result = store.gc(retention_from_env(env))
+    except (OSError, sqlite3.Error) as exc:
+        report.log(f"WARN: artifact retention failed: {exc}")
+        return
+    if result["runs_dropped"]:
+        report.log(
+            f"ARTIFACTS retention dropped {len(result['runs_dropped'])} run(s), "
+            f"freed {result['bytes_freed']} bytes"
+        )
+
+
 def _repo_root() -> Path:
     return Path(__file__).resolve().parents[1]
 
+
 def _load_step_map(repo_root: Path) -> Dict[str, Any]:
     step_map_path = repo_root / "orchestrator" / "step_map.yaml"
     if not step_map_path.exists():
         raise typer.BadParameter(f"Missing step map: {step_map_path}")
     return _load_yaml(step_map_path)
 
+
 def _resolve_mode(cfg: Dict[str, Any], cli_mode: Optional[str]) -> str:
     if cli_mode:
         return cli_mode.strip().lower()
     return (cfg.get("mode") or "offline").lower()
 
+
 def _validate_mode(step_map: Dict[str, Any], mode: str) -> None:
     modes = step_map.get("modes", {}) or {}
     if mode not in modes:
         available = ", ".join(sorted(modes.keys()))
         raise typer.BadParameter(f"Unknown mode/playbook: {mode}. Available: {available}")
 
+
 def _require_env(env: Dict[str, str], keys: List[str], mode_value: str) -> None:
     missing = [k for k in keys if not env.get(k)]
     if missing:
@@ -73,11 +145,13 @@ def _require_env(env: Dict[str, str], keys: List[str], mode_value: str) -> None:
             f"Missing required env vars for mode '{mode_value}': {', '.join(missing)}"
         )
 
+
 def _prompt_env(env: Dict[str, str], key: str, prompt: str, secret: bool = False) -> None:
     if env.get(key):
         return
     env[key] = typer.prompt(prompt, hide_input=secret, confirmation_prompt=False)
 
+
 def _prompt_required_env(env: Dict[str, str], mode_value: str, non_interactive: bool) -> None:
     if non_interactive:
         return
@@ -122,15 +196,68 @@ def _prompt_required_env(env: Dict[str, str], mode_value: str, non_interactive:
 
     # two_step uses installed sqldata by default; no SQLINESDATA_CMD* prompts required.
 
+
+def _assess_fleet(fleet: Path, out: Path, concurrency: int, per_host: int, timeout: float) -> None:
+    repo_root = _repo_root()
+    try:
+        instances = load_inventory(fleet)
+    except (OSError, ValueError, yaml.YAMLError) as exc:
+        raise typer.BadParameter(f"Invalid fleet inventory {fleet}: {exc}")
+    store = _open_store(os.environ)
+    report = Report(out / DEFAULT_REPORT, out / DEFAULT_LOG, store=store, history=_open_history(os.environ))
+    report.start_run(mode="fleet_assessment", config_path=str(fleet))
+    _apply_retention(store, os.environ, report)
+    report.log(f"FLEET {len(instances)} instance(s), concurrency={concurrency} per_host={per_host} timeout={timeout}s")
+    typer.echo(f"FLEET: assessing {len(instances)} instance(s) (concurrency {concurrency}, {per_host} per host)")
+
+    def progress(msg: str) -> None:
+        report.log(msg)
+        typer.echo(msg)
+
+    results = run_fleet(
+        instances, out, repo_root, concurrency=concurrency, per_host=per_host, timeout=timeout, log=progress
+    )
+    summary = write_fleet_report(results, out, fleet)
+    report.set_inventory({k: v for k, v in summary.items() if k != "ranking"})
+    report.archive(FLEET_REPORT, out / FLEET_REPORT)
+    report.archive(FLEET_SUMMARY, out / FLEET_SUMMARY)
+    counts = ", ".join(f"{k}={v}" for k, v in sorted(summary["by_status"].items()))
+    ok = summary["by_status"].get("PASS", 0) == len(results)
+    report.finish_run(success=ok, message=f"Fleet assessment: {counts}")
+    typer.echo(f"FLEET: {counts} (see {out / FLEET_SUMMARY})")
+    if not ok:
+        raise typer.Exit(code=2)
+
+
 @app.command()
 def assess(
-    config: Path = typer.Option(..., "--config", "-c", help="Source DB config YAML (read-only)."),
+    config: Optional[Path] = typer.Option(None, "--config", "-c", help="Source DB config YAML (read-only)."),
     out: Path = typer.Option(DEFAULT_OUTDIR, "--out", "-o", help="Output directory for artifacts."),
     non_interactive: bool = typer.Option(True, "--non-interactive", help="Never prompt; CI-safe."),
+    catalog: Optional[Path] = typer.Option(
+        None,
+        "--catalog",
+        help="Evaluate checks against an existing catalog snapshot (catalog.sqlite) instead of the live source.",
+    ),
+    fleet: Optional[Path] = typer.Option(
+        None,
+        "--fleet",
+        help="Inventory YAML of many sources; each is assessed into <out>/<name>/ and ranked in fleet_report.json.",
+    ),
+    concurrency: int = typer.Option(16, "--concurrency", help="Fleet: max assessments running at once."),
+    per_host: int = typer.Option(1, "--per-host", help="Fleet: max concurrent assessments per source host (0 = no limit)."),
+    timeout: float = typer.Option(900, "--timeout", help="Fleet: seconds before an instance assessment is killed (0 = none)."),
 ):
     """Run read-only assessment: safety gates + warnings + inventory."""
     repo_root = _repo_root()
     _ensure_outdir(out)
+    if fleet is not None:
+        if config is not None or catalog is not None:
+            raise typer.BadParameter("--fleet cannot be combined with --config or --catalog")
+        _assess_fleet(fleet, out, max(1, concurrency), max(0, per_host), timeout)
+        return
+    if config is None:
+        raise typer.BadParameter("Pass --config (single source) or --fleet (inventory)")
 
     # Initialize state + report
     state_path = out / DEFAULT_STATE
@@ -138,14 +265,16 @@ def assess(
     log_path = out / DEFAULT_LOG
 
     state = StateStore(state_path)
-    report = Report(report_path, log_path)
-
     cfg = _load_yaml(config)
+    env = _config_env(cfg)
+    store = _open_store(env)
+    report = Report(report_path, log_path, store=store, history=_open_history(env))
     report.start_run(mode="assessment", config_path=str(config))
+    _apply_retention(store, env, report)
 
     try:
         # Perform assessment checks (read-only)
-        result: AssessmentResult = run_assessment_checks(cfg, report, repo_root, out)
+        result: AssessmentResult = run_assessment_checks(cfg, report, repo_root, out, catalog_path=catalog)
     except Exception as exc:
         msg = f"Assessment failed during checks: {exc}"
         report.log(f"ERROR: {msg}")
@@ -159,6 +288,16 @@ def assess(
     report.set_gates(result.gates)
     report.set_warnings(result.warnings)
     report.set_inventory(result.inventory)
+    if result.config_advice:
+        report.set_config_advice(result.config_advice)
+        for profile in result.config_advice["profiles"].values():
+            report.archive(profile["file"], out / profile["file"])
+    for name in ("precheck.out", "precheck.err"):
+        report.archive(f"precheck/{name}", out / "precheck" / name)
+    for side in sorted((out / FINDINGS_DIR).glob("*.tsv.gz")):
+        report.archive(f"{FINDINGS_DIR}/{side.name}", side)
+    if catalog is None:
+        report.archive("catalog.sqlite", out / "catalog.sqlite")
 
     # Gate decision
     if any(g.status == GateStatus.FAIL for g in result.gates):
@@ -186,10 +325,10 @@ def plan(
     repo_root = _repo_root()
     _ensure_outdir(out)
 
-    report = Report(out / DEFAULT_REPORT, out / DEFAULT_LOG)
+    cfg = _load_yaml(config)
+    report = Report(out / DEFAULT_REPORT, out / DEFAULT_LOG, store=_open_store(_config_env(cfg)))
     report.start_run(mode="plan", config_path=str(config))
 
-    cfg = _load_yaml(config)
     step_map = _load_step_map(repo_root)
 
     mode_value = _resolve_mode(cfg, mode)
@@ -284,10 +423,11 @@ def run(
     _ensure_outdir(out)
 
     state = StateStore(out / DEFAULT_STATE)
-    report = Report(out / DEFAULT_REPORT, out / DEFAULT_LOG)
-    report.start_run(mode="run", config_path=str(config))
-
     cfg = _load_yaml(config)
+    store = _open_store(_config_env(cfg))
+    report = Report(out / DEFAULT_REPORT, out / DEFAULT_LOG, store=store, history=_open_history(_config_env(cfg)))
+    report.start_run(mode="run", config_path=str(config))
+    _apply_retention(store, _config_env(cfg), report)
     step_map = _load_step_map(repo_root)
 
     mode_value = _resolve_mode(cfg, mode)
@@ -365,8 +505,18 @@ def run(
             mode_value,
         )
 
+    # Step scripts and the engines they call write their result files here. The
+    # directory outlives a run, so results are only folded in when fresh.
+    env["MIGRATION_OUT_DIR"] = str(out)
+    env["MIGRATION_RUN_ID"] = report.run_id
+    if store is not None:
+        env["ARTIFACT_STORE_DIR"] = str(store.root)
+    else:
+        env["ARTIFACT_STORE"] = "0"
+
     failures = []
     failure_meta: Optional[Dict[str, Any]] = None
+    run_started = time.time()
     for s in steps:
         step_id = s["id"]
         name = s.get("name", step_id)
@@ -380,7 +530,24 @@ def run(
             continue
 
         report.log(f"RUN  {step_id} ({name}) -> {script}")
+        step_started = time.time()
         ok, meta = run_step(repo_root, script, args=args, extra_env=env, log=report.log)
+        moved = step_data(out, step_started)
+        if moved:
+            meta["data"] = moved
+        if is_fresh(out / EVENTS_FILE, step_started):
+            report.set_throttle(summarize_events(out / EVENTS_FILE, since=run_started))
+        if is_fresh(out / SCHEMA_DIFF_REPORT, step_started):
+            try:
+                report.set_schema_diff(diff_summary(json.loads((out / SCHEMA_DIFF_REPORT).read_text(encoding="utf-8"))))
+            except (OSError, ValueError, KeyError):
+                pass
+        if is_fresh(out / PERFCHECK_REPORT, step_started):
+            try:
+                perf = json.loads((out / PERFCHECK_REPORT).read_text(encoding="utf-8"))
+                report.set_perfcheck(perf_summary(perf), [WarningItem(*w) for w in warnings_from(perf)])
+            except (OSError, ValueError, KeyError):
+                pass
         if ok:
             state.mark_done(step_id, meta=meta)
             report.add_step(step_id, name, StepStatus.DONE, details=meta)
@@ -431,6 +598,864 @@ def resume(
     run(config=config, out=out, non_interactive=non_interactive, mode=mode)
 
 
+@app.command("precheck")
+def precheck_cmd(
+    out: Path = typer.Option(..., "--out", "-o", help="Directory for catalog.sqlite, precheck.out and <check>.tsv."),
+    catalog: Optional[Path] = typer.Option(None, "--catalog", help="Evaluate an existing catalog snapshot instead of reading the source."),
+):
+    """Snapshot the source catalog (SRC_* env) and run the sql/catalog checks against it."""
+    env = dict(os.environ)
+    try:
+        if catalog is None:
+            catalog = out / CATALOG_FILE
+            snapshot_source(endpoint_from_env(env, "SRC"), catalog, log=lambda m: typer.echo(m, err=True))
+        counts = evaluate_checks(catalog, _repo_root() / "sql" / "catalog", out, log=lambda m: typer.echo(m, err=True))
+    except (OSError, RuntimeError, sqlite3.Error) as exc:
+        typer.echo(f"ERROR: precheck failed: {exc}", err=True)
+        raise typer.Exit(code=3)
+    typer.echo(f"PRECHECK: {len(counts)} check(s), {sum(counts.values())} row(s) -> {out}")
+
+
+@app.command("migrate-users")
+def migrate_users_cmd(
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Directory for app_users.sql (default: MIGRATION_OUT_DIR or artifacts)."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Extract and write the script; do not apply it."),
+):
+    """Copy application users, roles and grants from source to target in one batch.
+
+    Connection settings come from the step environment (SRC_*/TGT_*, TGT_SSH_*).
+    """
+    env = dict(os.environ)
+    out_dir = out or Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    src = endpoint_from_env(env, "SRC")
+    tgt = endpoint_from_env(env, "TGT", via_ssh=True)
+    exclude = ["root", env.get("SRC_USER", ""), env.get("SRC_ADMIN_USER", "")]
+    default_password = env.get("APP_USER_DEFAULT_PASSWORD") or DEFAULT_APP_USER_PASSWORD
+    try:
+        summary = migrate_users(src, tgt, default_password, out_dir, exclude_users=exclude, dry_run=dry_run, log=typer.echo)
+    except RuntimeError as exc:
+        typer.echo(f"ERROR: {exc}")
+        raise typer.Exit(code=2)
+    (out_dir / "app_users_summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    for note in summary["notes"]:
+        typer.echo(f"NOTE: {note}")
+    if summary["password_reset_accounts"]:
+        typer.echo(f"Accounts recreated with the default password: {len(summary['password_reset_accounts'])}")
+    if summary["errors"]:
+        for line in summary["errors"][:20]:
+            typer.echo(line)
+        typer.echo(f"ERROR: {len(summary['errors'])} statement(s) failed on target (see {summary['script']})")
+        raise typer.Exit(code=3)
+    typer.echo("USERS: " + ("script written (dry run)" if dry_run else "applied"))
+
+
+artifacts_app = typer.Typer(help="Compressed, deduplicated artifact store shared by all runs.")
+app.add_typer(artifacts_app, name="artifacts")
+
+
+def _store_or_exit() -> ArtifactStore:
+    store = _open_store(os.environ)
+    if store is None:
+        typer.echo("ERROR: artifact store is disabled (ARTIFACT_STORE=0)")
+        raise typer.Exit(code=2)
+    return store
+
+
+@artifacts_app.command("put")
+def artifacts_put(
+    paths: List[str] = typer.Argument(..., help="Files to store, or - for stdin."),
+    name: Optional[str] = typer.Option(None, "--name", help="Artifact name (required for stdin; default: file name)."),
+    prefix: str = typer.Option("", "--prefix", help="Prefix added to each artifact name (e.g. precheck/)."),
+    run_id: Optional[str] = typer.Option(None, "--run", help="Run id (default: MIGRATION_RUN_ID)."),
+):
+    """Compress files (or stdin) into the store and index them under a run."""
+    store = _store_or_exit()
+    run_id = run_id or os.environ.get("MIGRATION_RUN_ID") or "adhoc"
+    if name and len(paths) > 1:
+        raise typer.BadParameter("--name applies to a single input")
+    for p in paths:
+        if p == "-":
+            if not name:
+                raise typer.BadParameter("--name is required when reading stdin")
+            meta = store.put_stream(run_id, prefix + name, sys.stdin.buffer)
+        else:
+            path = Path(p)
+            if not path.is_file():
+                raise typer.BadParameter(f"Not a file: {path}")
+            meta = store.put_file(run_id, prefix + (name or path.name), path)
+        dedup = " (deduplicated)" if meta["deduplicated"] else ""
+        typer.echo(f"{meta['digest']} {meta['size']} -> {meta['stored_size']} {run_id}/{meta['name']}{dedup}", err=True)
+
+
+@artifacts_app.command("cat")
+def artifacts_cat(
+    name: Optional[str] = typer.Option(None, "--name", help="Artifact name."),
+    run_id: Optional[str] = typer.Option(None, "--run", help="Run id (default: MIGRATION_RUN_ID, else newest run with that name)."),
+    digest: Optional[str] = typer.Option(None, "--digest", help="Read an object by content hash instead."),
+):
+    """Write the decompressed content of an artifact to stdout."""
+    if not name and not digest:
+        raise typer.BadParameter("Pass --name or --digest")
+    store = _store_or_exit()
+    run_id = run_id or os.environ.get("MIGRATION_RUN_ID") or ""
+    out = sys.stdout.buffer
+    try:
+        for chunk in store.iter_bytes(run_id=run_id, name=name or "", digest=digest or ""):
+            out.write(chunk)
+        out.flush()
+    except KeyError as exc:
+        typer.echo(f"ERROR: {exc.args[0]}", err=True)
+        raise typer.Exit(code=2)
+    except BrokenPipeError:
+        # Reader (e.g. grep -m1) stopped early; not an error for the producer.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), out.fileno())
+
+
+@artifacts_app.command("list")
+def artifacts_list(
+    run_id: Optional[str] = typer.Option(None, "--run", help="List the artifacts of one run."),
+):
+    """Show runs in the store, or the artifacts of one run."""
+    store = _store_or_exit()
+    if run_id:
+        for a in store.list_artifacts(run_id):
+            typer.echo(f"{a['name']}\t{a['size']}\t{a['stored_size']}\t{a['codec']}\t{a['digest'][:12]}")
+        return
+    for r in store.list_runs():
+        typer.echo(f"{r['run_id']}\t{r['mode'] or '-'}\t{r['artifacts']}\t{r['size']}\t{r['stored_size']}")
+    u = store.usage()
+    typer.echo(f"store: {u['objects']} objects, {u['logical_size']} bytes referenced, {u['stored_size']} bytes on disk")
+
+
+@artifacts_app.command("gc")
+def artifacts_gc(
+    keep_runs: Optional[int] = typer.Option(None, "--keep-runs", help="Keep the N newest runs (default: ARTIFACT_KEEP_RUNS or 10; 0 = no limit)."),
+    max_age_days: Optional[int] = typer.Option(None, "--max-age-days", help="Drop runs older than N days (default: ARTIFACT_MAX_AGE_DAYS)."),
+    max_bytes: Optional[int] = typer.Option(None, "--max-bytes", help="Keep newest runs within N stored bytes (default: ARTIFACT_MAX_BYTES)."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Report what would be removed."),
+):
+    """Apply the retention policy and delete objects no remaining run references."""
+    store = _store_or_exit()
+    policy = retention_from_env(os.environ)
+    if keep_runs is not None:
+        policy.keep_runs = keep_runs
+    if max_age_days is not None:
+        policy.max_age_days = max_age_days
+    if max_bytes is not None:
+        policy.max_bytes = max_bytes
+    result = store.gc(policy, dry_run=dry_run)
+    verb = "would drop" if dry_run else "dropped"
+    typer.echo(
+        f"ARTIFACTS: {verb} {len(result['runs_dropped'])} run(s), "
+        f"{result['objects_deleted']} object(s), {result['bytes_freed']} bytes"
+    )
+
+
+progress_app = typer.Typer(help="Per-table progress and ETA for data phases.")
+app.add_typer(progress_app, name="progress")
+
+
+def _progress_dir(out: Optional[Path]) -> Path:
+    return out or Path(os.environ.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+
+
+@progress_app.command("dump")
+def progress_dump(
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Run directory for progress.json (default: MIGRATION_OUT_DIR)."),
+    phase: str = typer.Option("one_step", "--phase", help="Phase name recorded in progress.json."),
+):
+    """Filter: copy a dump stream stdin -> stdout and track per-table progress."""
+    tracker = tracker_from_env(phase, os.environ, _progress_dir(out))
+    tracker.flush(force=True)
+    follow_dump(sys.stdin.buffer, sys.stdout.buffer, tracker)
+    tracker.finish_running()
+    tracker.flush(force=True, finished=True)
+
+
+@progress_app.command("sqldata")
+def progress_sqldata(
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Run directory for progress.json (default: MIGRATION_OUT_DIR)."),
+    phase: str = typer.Option("two_step_data", "--phase", help="Phase name recorded in progress.json."),
+):
+    """Filter: copy sqldata output stdin -> stdout and track per-table progress."""
+    tracker = tracker_from_env(phase, os.environ, _progress_dir(out))
+    tracker.flush(force=True)
+    follow_sqldata(sys.stdin, sys.stdout, tracker)
+    tracker.flush(force=True, finished=True)
+
+
+@progress_app.command("watch")
+def progress_watch(
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Run directory containing progress.json."),
+    interval: float = typer.Option(2.0, "--interval", help="Refresh interval in seconds."),
+    limit: int = typer.Option(20, "--limit", help="Tables to show."),
+    once: bool = typer.Option(False, "--once", help="Print one snapshot and exit."),
+):
+    """Show live per-table progress and ETA of a running data phase."""
+    path = _progress_dir(out) / PROGRESS_FILE
+    while True:
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = None
+            if data is not None:
+                if not once:
+                    typer.echo("\033[2J\033[H", nl=False)
+                typer.echo("\n".join(render(data, limit=limit)))
+                if once or data.get("finished"):
+                    return
+        elif once:
+            typer.echo(f"ERROR: {path} not found")
+            raise typer.Exit(code=2)
+        time.sleep(interval)
+
+
+@app.command("fanout")
+def fanout_cmd(
+    target: Optional[List[str]] = typer.Option(None, "--target", help="Target host[:port]; repeatable (default: TGT_HOSTS, else TGT_HOST)."),
+    buffer_mb: Optional[int] = typer.Option(None, "--buffer-mb", help="In-memory queue per target (default: FANOUT_BUFFER_MB or 64)."),
+    spill_max_mb: Optional[int] = typer.Option(None, "--spill-max-mb", help="Disk spool per target before the reader waits (default: FANOUT_SPILL_MAX_MB or 8192; 0 = no spool)."),
+    spill_dir: Optional[Path] = typer.Option(None, "--spill-dir", help="Spool directory (default: FANOUT_SPILL_DIR or <MIGRATION_OUT_DIR>/fanout_spill)."),
+    label: str = typer.Option("restore", "--label", help="Name recorded in fanout_<label>.json."),
+):
+    """Restore one SQL stream (stdin) into several targets concurrently, reading it once."""
+    env = dict(os.environ)
+    if target:
+        env["TGT_HOSTS"] = ",".join(target)
+    targets = targets_from_env(env)
+    if not targets:
+        raise typer.BadParameter("No targets: pass --target or set TGT_HOSTS/TGT_HOST")
+    out_dir = Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    mem_mb = buffer_mb if buffer_mb is not None else int(env.get("FANOUT_BUFFER_MB") or 64)
+    spill_mb = spill_max_mb if spill_max_mb is not None else int(env.get("FANOUT_SPILL_MAX_MB") or 8192)
+    spool = spill_dir or Path(env.get("FANOUT_SPILL_DIR") or out_dir / "fanout_spill")
+    typer.echo(f"FANOUT: {len(targets)} target(s): {', '.join(t.label() for t in targets)}", err=True)
+    try:
+        summary = fan_out(
+            sys.stdin.buffer,
+            targets,
+            # Binary mode keeps raw bytes intact when a dump is taken with DUMP_HEX_BLOB=0.
+            client_args=["--binary-mode"],
+            mem_cap=max(1, mem_mb) << 20,
+            spill_cap=max(0, spill_mb) << 20,
+            spill_dir=spool,
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (OSError, RuntimeError) as exc:
+        typer.echo(f"ERROR: fan-out failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / f"fanout_{label}.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    if not summary["ok"]:
+        for t in summary["targets"]:
+            for line in t["stderr_tail"]:
+                typer.echo(f"{t['target']}: {line}", err=True)
+        failed = [t["target"] for t in summary["targets"] if not t["ok"]]
+        typer.echo(f"ERROR: restore failed on {', '.join(failed)}", err=True)
+        raise typer.Exit(code=3)
+
+
+governor_app = typer.Typer(help="Source-protection governor for dump and copy workloads.")
+app.add_typer(governor_app, name="governor")
+
+
+def _governor(reader: str) -> Optional[Governor]:
+    env = dict(os.environ)
+    cfg = config_from_env(env)
+    if not cfg.enabled():
+        return None
+    out_dir = Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    return Governor(cfg, endpoint_from_env(env, "SRC"), out_dir / EVENTS_FILE, reader).start()
+
+
+@governor_app.command("pipe")
+def governor_pipe(
+    reader: str = typer.Option("dump", "--reader", help="Reader name recorded in throttle events."),
+):
+    """Filter: copy a dump stream stdin -> stdout within GOVERNOR_* budgets and health thresholds."""
+    gov = _governor(reader)
+    try:
+        govern_stream(sys.stdin.buffer, sys.stdout.buffer, gov)
+    finally:
+        if gov is not None:
+            gov.stop()
+
+
+@governor_app.command("exec", context_settings={"allow_extra_args": True, "ignore_unknown_options": True})
+def governor_exec(
+    ctx: typer.Context,
+    reader: str = typer.Option("sqldata", "--reader", help="Reader name recorded in throttle events."),
+):
+    """Run a source reader command (after --) and pause it while the source is unhealthy."""
+    cmd = list(ctx.args)
+    if not cmd:
+        raise typer.BadParameter("Pass the command to run after --")
+    gov = _governor(reader)
+    if gov is None:
+        os.execvp(cmd[0], cmd)
+    try:
+        rc = govern_process(cmd, gov, log=lambda m: typer.echo(m, err=True))
+    finally:
+        gov.stop()
+    raise typer.Exit(code=rc)
+
+
+lob_app = typer.Typer(help="Binary-safe transfer of BLOB/TEXT/JSON-heavy tables (LOAD DATA instead of --hex-blob INSERTs).")
+app.add_typer(lob_app, name="lob")
+
+
+@lob_app.command("plan")
+def lob_plan(
+    schemas: str = typer.Option(..., "--schemas", help="Comma-separated source schemas."),
+    list_file: Optional[Path] = typer.Option(None, "--list-file", help="Write the selected tables (schema.table per line) here."),
+):
+    """Select LOB-heavy tables from the assessment catalog (LOB_CATALOG, LOB_MIN_MB, LOB_MIN_AVG_ROW)."""
+    env = dict(os.environ)
+    out_dir = Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    try:
+        tables = plan_lob_tables(
+            endpoint_from_env(env, "SRC"), env, out_dir, schemas.split(","), log=lambda m: typer.echo(m, err=True)
+        )
+    except (OSError, RuntimeError, sqlite3.Error) as exc:
+        typer.echo(f"ERROR: LOB planning failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    for t in tables:
+        typer.echo(f"LOB: {t.qualified()} ({t.data_bytes >> 20} MB, avg row {t.avg_row_length} B, {','.join(t.lob_columns)})", err=True)
+    if not tables:
+        typer.echo("LOB: no tables above LOB_MIN_MB/LOB_MIN_AVG_ROW; everything goes through the dump.", err=True)
+    if list_file is not None:
+        list_file.parent.mkdir(parents=True, exist_ok=True)
+        list_file.write_text("".join(f"{t.qualified()}\n" for t in tables), encoding="utf-8")
+
+
+@lob_app.command("copy")
+def lob_copy(
+    table: Optional[List[str]] = typer.Option(None, "--table", help="schema.table; repeatable."),
+    tables_file: Optional[Path] = typer.Option(None, "--tables-file", help="File of schema.table lines (from `lob plan`)."),
+    chunk_mb: Optional[int] = typer.Option(None, "--chunk-mb", help="Rows per LOAD DATA transaction, in MB (default: LOB_CHUNK_MB or 64)."),
+):
+    """Copy tables source -> target(s) in one consistent snapshot, as binary-safe LOAD DATA chunks."""
+    env = dict(os.environ)
+    names = list(table or [])
+    if tables_file is not None:
+        names += [l.strip() for l in tables_file.read_text(encoding="utf-8").splitlines() if l.strip()]
+    tables = []
+    for name in names:
+        schema, _, tbl = name.partition(".")
+        if not tbl:
+            raise typer.BadParameter(f"Expected schema.table, got {name}")
+        tables.append(LobTable(schema=schema, name=tbl, lob_columns=[]))
+    if not tables:
+        typer.echo("LOB: nothing to copy.", err=True)
+        return
+    targets = targets_from_env(env) if env.get("TGT_HOSTS") else [endpoint_from_env(env, "TGT", via_ssh=True)]
+    out_dir = Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    mb = chunk_mb if chunk_mb is not None else int(env.get("LOB_CHUNK_MB") or 64)
+    gov = _governor("lob_copy")
+    try:
+        summary = copy_lob_tables(
+            endpoint_from_env(env, "SRC"),
+            targets,
+            tables,
+            chunk_bytes=max(1, mb) << 20,
+            gov=gov,
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (OSError, RuntimeError) as exc:
+        typer.echo(f"ERROR: LOB copy failed: {exc}", err=True)
+        raise typer.Exit(code=3)
+    finally:
+        if gov is not None:
+            gov.stop()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / LOB_REPORT).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    typer.echo(
+        f"LOB: {summary['rows']} rows, {summary['wire_bytes']} bytes in {summary['duration_s']}s "
+        f"(~{summary['hex_bytes_avoided']} bytes of hex encoding avoided)",
+        err=True,
+    )
+
+
+backup_app = typer.Typer(help="Parallel compressed backups with checksum manifests (inplace, replace_slave).")
+app.add_typer(backup_app, name="backup")
+
+
+def _backup_done(manifest: Dict[str, Any], env: Mapping[str, str]) -> None:
+    path = write_backup(manifest, Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR))
+    bad = [f for f in manifest["files"] if f["error"]]
+    for f in bad:
+        typer.echo(f"FAILED {f['name']}: {f['error']}", err=True)
+    status = "OK" if manifest["ok"] and manifest["verified"] else "FAILED"
+    typer.echo(
+        f"BACKUP: {status} {len(manifest['files'])} file(s), {manifest['total_bytes'] >> 20} MB "
+        f"({manifest['compressor']}, {manifest['consistency']}) in {manifest['duration_s']}s -> {manifest['location']} "
+        f"(see {path})"
+    )
+    if status != "OK":
+        raise typer.Exit(code=3)
+
+
+@backup_app.command("logical")
+def backup_logical(
+    backup_dir: Path = typer.Option(..., "--dir", help="Directory for the dump files and manifest.json."),
+    schemas: Optional[str] = typer.Option(None, "--schemas", help="Comma-separated schemas (default: all, plus the mysql schema)."),
+    threads: Optional[int] = typer.Option(None, "--threads", help="Parallel dump workers (default: BACKUP_THREADS or 4)."),
+    compress: Optional[str] = typer.Option(None, "--compress", help="auto, zstd, pigz, gzip or none (default: BACKUP_COMPRESS or auto)."),
+    inconsistent: bool = typer.Option(False, "--no-lock", help="Skip the brief global read lock that aligns the workers' snapshots."),
+):
+    """Dump the source in parallel, compress each file, write checksums and verify them."""
+    env = dict(os.environ)
+    src = endpoint_from_env(env, "SRC")
+    dump_bin = env.get("MARIADB_DUMP_BIN") or "mariadb-dump"
+    if not shutil.which(dump_bin) and shutil.which("mysqldump"):
+        dump_bin = "mysqldump"
+    gov = _governor("backup")
+    try:
+        manifest = logical_backup(
+            src,
+            dump_bin,
+            backup_dir,
+            schemas=(schemas or "").split(","),
+            threads=max(1, threads or int(env.get("BACKUP_THREADS") or 4)),
+            compressor=compress or env.get("BACKUP_COMPRESS") or "auto",
+            consistent=not inconsistent and env.get("BACKUP_LOCK", "1") != "0",
+            lock_wait_s=int(env.get("BACKUP_LOCK_WAIT") or 30),
+            gov=gov,
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (OSError, RuntimeError, ValueError) as exc:
+        typer.echo(f"ERROR: backup failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    finally:
+        if gov is not None:
+            gov.stop()
+    _backup_done(manifest, env)
+
+
+@backup_app.command("datadir")
+def backup_datadir(
+    backup_dir: str = typer.Option(..., "--dir", help="Directory on the target host for the archives and manifest.json."),
+    datadir: Optional[str] = typer.Option(None, "--datadir", help="Datadir to archive (default: BACKUP_DATADIR or /var/lib/mysql)."),
+    threads: Optional[int] = typer.Option(None, "--threads", help="Archives written at once (default: BACKUP_THREADS or 4)."),
+    compress: Optional[str] = typer.Option(None, "--compress", help="auto, zstd, pigz, gzip or none (default: BACKUP_COMPRESS or auto)."),
+):
+    """Archive the target host's datadir and config over ssh as parallel compressed tar files, then verify them."""
+    env = dict(os.environ)
+    try:
+        manifest = datadir_backup(
+            env,
+            backup_dir,
+            datadir=datadir or env.get("BACKUP_DATADIR") or "/var/lib/mysql",
+            threads=max(1, threads or int(env.get("BACKUP_THREADS") or 4)),
+            compressor=compress or env.get("BACKUP_COMPRESS") or "auto",
+            sudo=env.get("BACKUP_SUDO", "sudo"),
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (OSError, RuntimeError, ValueError) as exc:
+        typer.echo(f"ERROR: backup failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    _backup_done(manifest, env)
+
+
+@backup_app.command("verify")
+def backup_verify(
+    manifest_path: Path = typer.Argument(..., help=f"{BACKUP_MANIFEST} of a logical backup."),
+    threads: int = typer.Option(4, "--threads", help="Files verified at once."),
+):
+    """Re-check a logical backup: checksums, streaming decompression and dump completeness."""
+    try:
+        manifest = verify_manifest(manifest_path, threads=max(1, threads), log=lambda m: typer.echo(m, err=True))
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        typer.echo(f"ERROR: cannot verify {manifest_path}: {exc}", err=True)
+        raise typer.Exit(code=2)
+    ok = manifest["ok"] and manifest["verified"]
+    typer.echo(f"VERIFY: {'OK' if ok else 'FAILED'} {len(manifest['files'])} file(s) in {manifest_path.parent}")
+    if not ok:
+        raise typer.Exit(code=3)
+
+
+@backup_app.command("restore")
+def backup_restore(
+    manifest_path: Path = typer.Argument(..., help=f"{BACKUP_MANIFEST} of a logical backup."),
+    target: str = typer.Option("src", "--target", help="src (inplace rollback) or tgt."),
+    threads: int = typer.Option(4, "--threads", help="Data files loaded at once."),
+    skip_mysql: bool = typer.Option(False, "--skip-mysql", help="Do not load the mysql system schema."),
+):
+    """Verify a logical backup, then load it in its restore order: schema, mysql, data, triggers."""
+    env = dict(os.environ)
+    if target not in ("src", "tgt"):
+        typer.echo("ERROR: --target must be src or tgt", err=True)
+        raise typer.Exit(code=2)
+    ep = endpoint_from_env(env, "SRC") if target == "src" else endpoint_from_env(env, "TGT", via_ssh=True)
+    try:
+        result = restore_manifest(manifest_path, ep, threads=max(1, threads), skip_mysql=skip_mysql,
+                                  log=lambda m: typer.echo(m, err=True))
+    except (OSError, RuntimeError, ValueError, KeyError, TypeError) as exc:
+        typer.echo(f"ERROR: cannot restore {manifest_path}: {exc}", err=True)
+        raise typer.Exit(code=2)
+    typer.echo(f"RESTORE: {'OK' if result['ok'] else 'FAILED'} {len(result['files'])} file(s) into "
+               f"{result['target']} in {result['duration_s']}s")
+    if not result["ok"]:
+        raise typer.Exit(code=3)
+
+
+@app.command("schema-diff")
+def schema_diff_cmd(
+    schemas: Optional[str] = typer.Option(None, "--schemas", help="Comma-separated schemas (default: SRC_DBS or SRC_DB)."),
+    kinds: str = typer.Option(",".join(KINDS), "--kinds", help="Object kinds to compare."),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Directory for schema_diff.json/.tsv (default: MIGRATION_OUT_DIR or artifacts)."),
+    limit: int = typer.Option(50, "--limit", help="Differences to print."),
+):
+    """Compare tables, columns, indexes, FKs, checks, views, routines, triggers and events source vs target."""
+    env = dict(os.environ)
+    names = (schemas or env.get("SRC_DBS") or env.get("SRC_DB") or "").split(",")
+    wanted = [k.strip() for k in kinds.split(",") if k.strip()]
+    unknown = [k for k in wanted if k not in KINDS]
+    if unknown:
+        raise typer.BadParameter(f"Unknown kind(s): {', '.join(unknown)} (expected {', '.join(KINDS)})")
+    out_dir = out or Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    try:
+        result = schema_diff(
+            endpoint_from_env(env, "SRC"),
+            endpoint_from_env(env, "TGT", via_ssh=True),
+            names,
+            kinds=wanted,
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (RuntimeError, ValueError) as exc:
+        typer.echo(f"ERROR: schema diff failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    path = write_diff(result, out_dir)
+    lines = (
+        [f"MISSING  {m['kind']:<12} {m['object']}" for m in result["missing"]]
+        + [f"EXTRA    {e['kind']:<12} {e['object']}" for e in result["extra"]]
+        + [f"DIFFERS  {d['kind']:<12} {d['object']} ({', '.join(d['fields'])})" for d in result["differing"]]
+    )
+    for line in lines[:limit]:
+        typer.echo(line)
+    if len(lines) > limit:
+        typer.echo(f"... {len(lines) - limit} more in {out_dir / SCHEMA_DIFF_TSV}")
+    if result["normalised"]:
+        typer.echo("Normalised: " + ", ".join(f"{k} ({v})" for k, v in sorted(result["normalised"].items())))
+    status = "OK" if result["ok"] else "DIFFERENCES"
+    typer.echo(
+        f"SCHEMA-DIFF: {status} matched={result['matched']} missing={len(result['missing'])} "
+        f"extra={len(result['extra'])} differing={len(result['differing'])} (see {path})"
+    )
+    if not result["ok"]:
+        raise typer.Exit(code=4)
+
+
+@app.command("perfcheck")
+def perfcheck_cmd(
+    schemas: Optional[str] = typer.Option(None, "--schemas", help="Comma-separated schemas (default: SRC_DBS or SRC_DB)."),
+    top: int = typer.Option(50, "--top", help="Top statement digests (by total source latency) to replay."),
+    runs: int = typer.Option(5, "--runs", help="Timed executions per statement and server (after one warm-up)."),
+    sessions: int = typer.Option(2, "--sessions", help="Concurrent replay sessions per server."),
+    timeout: float = typer.Option(30, "--timeout", help="Per-statement time limit in seconds (0 = none)."),
+    threshold: float = typer.Option(0.5, "--threshold", help="Flag statements whose target p50 is this much slower (0.5 = 50%)."),
+    min_ms: float = typer.Option(5.0, "--min-ms", help="Ignore slowdowns smaller than this many milliseconds."),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Directory for perfcheck.json/.tsv (default: MIGRATION_OUT_DIR or artifacts)."),
+    fail_on_regression: bool = typer.Option(False, "--fail-on-regression", help="Exit 4 when any statement regressed."),
+):
+    """Replay the source's top read-only statements on source and target; compare latency and EXPLAIN plans."""
+    env = dict(os.environ)
+    names = (schemas or env.get("SRC_DBS") or env.get("SRC_DB") or "").split(",")
+    out_dir = out or Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    # The source replay is a source reader: it waits and slows with the governor.
+    gov = _governor("perfcheck_replay")
+    try:
+        result = perfcheck(
+            endpoint_from_env(env, "SRC"),
+            endpoint_from_env(env, "TGT", via_ssh=True),
+            names,
+            top=max(1, top),
+            runs=max(1, runs),
+            sessions=max(1, sessions),
+            timeout_s=max(0.0, timeout),
+            threshold=threshold,
+            min_ms=min_ms,
+            log=lambda m: typer.echo(m, err=True),
+            gov=gov,
+        )
+    except (RuntimeError, ValueError) as exc:
+        typer.echo(f"ERROR: perfcheck failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    finally:
+        if gov is not None:
+            gov.stop()
+    path = write_perfcheck(result, out_dir)
+    for r in result["statements"]:
+        if not (r["regressed"] or r["plan_change"] or r["errors"].get("target")):
+            continue
+        flags = ",".join(f for f, on in (("SLOWER", r["regressed"]), ("PLAN", r["plan_change"]),
+                                         ("ERROR", bool(r["errors"].get("target")))) if on)
+        p50 = ["-" if v is None else f"{v}ms" for v in (r["source_ms"]["p50"], r["target_ms"]["p50"])]
+        typer.echo(
+            f"{flags:<12} {p50[0]} -> {p50[1]}  "
+            f"{' '.join(r['digest_text'].split())[:100]}"
+        )
+    typer.echo(
+        f"PERFCHECK: replayed={result['replayed']} regressions={result['regressions']} "
+        f"plan_changes={result['plan_changes']} target_errors={result['target_errors']} "
+        f"(see {path} and {out_dir / PERFCHECK_TSV})"
+    )
+    if fail_on_regression and result["regressions"]:
+        raise typer.Exit(code=4)
+
+
+@app.command("stats")
+def stats_cmd(
+    schemas: Optional[str] = typer.Option(None, "--schemas", help="Comma-separated schemas (default: SRC_DBS or SRC_DB)."),
+    threads: int = typer.Option(4, "--threads", help="Tables analyzed at once."),
+    scan_max_mb: int = typer.Option(2048, "--scan-max-mb", help="Largest table (MB) whose histograms are rebuilt by a full scan when they cannot be converted."),
+    no_histograms: bool = typer.Option(False, "--no-histograms", help="Do not convert source histograms; rebuild them on the target instead."),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Directory for post_load_stats.json (default: MIGRATION_OUT_DIR or artifacts)."),
+):
+    """Refresh optimizer statistics on every loaded target (TGT_HOSTS or TGT_HOST) and carry over the source's MySQL histograms."""
+    env = dict(os.environ)
+    names = (schemas or env.get("SRC_DBS") or env.get("SRC_DB") or "").split(",")
+    out_dir = out or Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    targets = targets_from_env(env) if env.get("TGT_HOSTS") else [endpoint_from_env(env, "TGT", via_ssh=True)]
+    try:
+        result = post_load_stats(
+            endpoint_from_env(env, "SRC"),
+            targets,
+            names,
+            threads=max(1, threads),
+            scan_max_mb=max(0, scan_max_mb),
+            convert=not no_histograms,
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (RuntimeError, ValueError) as exc:
+        typer.echo(f"ERROR: statistics phase failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    path = write_stats(result, out_dir)
+    for r in result["targets"]:
+        for line in r["failed"][:20]:
+            typer.echo(f"FAILED {r['target']} {line}")
+        for col, reason in list(r["histograms_skipped"].items())[:20]:
+            typer.echo(f"SKIPPED {r['target']} histogram {col}: {reason}")
+        typer.echo(
+            f"STATS: {r['target']} {'OK' if r['ok'] else 'FAILED'} tables={r['tables']} "
+            f"converted={r['histograms_converted']} rebuilt={r['histograms_rebuilt']} "
+            f"skipped={len(r['histograms_skipped'])} in {r['duration_s']}s"
+        )
+    typer.echo(f"STATS: {'OK' if result['ok'] else 'FAILED'} on {len(result['targets'])} target(s) (see {path})")
+    if not result["ok"]:
+        raise typer.Exit(code=3)
+
+
+@app.command("config-advice")
+def config_advice_cmd(
+    catalog: Optional[Path] = typer.Option(None, "--catalog", help="Assessment catalog.sqlite (default: <out>/catalog.sqlite)."),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Directory for config_advice/*.cnf (default: MIGRATION_OUT_DIR or artifacts)."),
+    cpus: Optional[int] = typer.Option(None, "--cpus", help="Target CPU count (default: TGT_CPUS or detected)."),
+    memory_mb: Optional[int] = typer.Option(None, "--memory-mb", help="Target memory in MB (default: TGT_MEMORY_MB or detected)."),
+    target_version: Optional[str] = typer.Option(None, "--target-version", help="MariaDB version (default: REPLACE_MARIADB_VERSION or 11.4)."),
+):
+    """Write bulk-load and production my.cnf fragments for the target, sized from the source workload."""
+    env = dict(os.environ)
+    if cpus:
+        env["TGT_CPUS"] = str(cpus)
+    if memory_mb:
+        env["TGT_MEMORY_MB"] = str(memory_mb)
+    out_dir = out or Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    catalog_path = catalog or out_dir / "catalog.sqlite"
+    log = lambda m: typer.echo(m, err=True)
+    try:
+        advice = advise(
+            catalog_path,
+            target_host(env, log=log),
+            target_version or env.get("REPLACE_MARIADB_VERSION") or "",
+            log=log,
+        )
+        paths = write_advice(advice, out_dir)
+    except (RuntimeError, OSError, sqlite3.Error) as exc:
+        typer.echo(f"ERROR: config advice failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    for note in advice["notes"]:
+        typer.echo(f"NOTE: {note}")
+    for profile, path in zip(PROFILES, paths):
+        typer.echo(f"{profile:<10} {len(advice['profiles'][profile]['settings'])} setting(s) -> {path}")
+    if advice["dropped"]:
+        typer.echo("Dropped (no MariaDB equivalent): " + ", ".join(d["name"] for d in advice["dropped"]))
+    if advice["review"]:
+        typer.echo("Review by hand: " + ", ".join(advice["review"]))
+
+
+@app.command("prewarm")
+def prewarm_cmd(
+    schemas: Optional[str] = typer.Option(None, "--schemas", help="Comma-separated schemas (default: SRC_DBS or SRC_DB)."),
+    threads: Optional[int] = typer.Option(None, "--threads", help="Parallel preload sessions per target (default: PREWARM_THREADS or 4)."),
+    mb_per_sec: Optional[int] = typer.Option(None, "--mb-per-sec", help="Read budget per target in MB/s (default: PREWARM_MB_PER_SEC; 0 = unlimited)."),
+    max_mb: Optional[int] = typer.Option(None, "--max-mb", help="Preload at most this many MB (default: PREWARM_MAX_MB; 0 = buffer-pool share only)."),
+    out: Optional[Path] = typer.Option(None, "--out", "-o", help="Directory for prewarm.json (default: MIGRATION_OUT_DIR or artifacts)."),
+):
+    """Load the source's hot indexes into the target buffer pool(s) before cutover."""
+    env = dict(os.environ)
+
+    def _int(value: Optional[int], key: str, default: int) -> int:
+        if value is not None:
+            return value
+        raw = str(env.get(key, "")).strip()
+        return int(raw) if raw.isdigit() else default
+
+    try:
+        fraction = float(env.get("PREWARM_POOL_FRACTION") or 0.75)
+    except ValueError:
+        raise typer.BadParameter("PREWARM_POOL_FRACTION must be a number between 0 and 1")
+    names = (schemas or env.get("SRC_DBS") or env.get("SRC_DB") or "").split(",")
+    targets = targets_from_env(env) if env.get("TGT_HOSTS") else [endpoint_from_env(env, "TGT", via_ssh=True)]
+    out_dir = out or Path(env.get("MIGRATION_OUT_DIR") or DEFAULT_OUTDIR)
+    try:
+        result = prewarm(
+            endpoint_from_env(env, "SRC"),
+            targets,
+            names,
+            threads=max(1, _int(threads, "PREWARM_THREADS", 4)),
+            mb_per_sec=_int(mb_per_sec, "PREWARM_MB_PER_SEC", 0),
+            max_mb=_int(max_mb, "PREWARM_MAX_MB", 0),
+            pool_fraction=min(1.0, max(0.05, fraction)),
+            chunk_mb=max(1, _int(None, "PREWARM_CHUNK_MB", 64)),
+            check_residency=str(env.get("PREWARM_RESIDENCY", "1")).strip().lower() not in ("0", "false", "no", "off"),
+            log=lambda m: typer.echo(m, err=True),
+        )
+    except (RuntimeError, ValueError) as exc:
+        typer.echo(f"ERROR: prewarm failed: {exc}", err=True)
+        raise typer.Exit(code=2)
+    path = write_prewarm(result, out_dir)
+    for r in result["targets"]:
+        fraction_s = "-" if r["resident_fraction"] is None else f"{r['resident_fraction'] * 100:.1f}%"
+        typer.echo(
+            f"PREWARM: {r['target']} hot={r['hot_mb']}MB planned={r['planned_mb']}MB "
+            f"resident={fraction_s} failed={r['failed']} ({r['duration_s']}s)"
+        )
+    typer.echo(f"PREWARM: {'OK' if result['ok'] else 'PARTIAL'} (see {path})")
+
+
+history_app = typer.Typer(help="Run-history database: throughput trends and regressions across rehearsals.")
+app.add_typer(history_app, name="history")
+
+
+def _history_or_exit() -> RunHistory:
+    history = _open_history(os.environ)
+    if history is None:
+        typer.echo("ERROR: run history is disabled (MIGRATION_HISTORY=0)", err=True)
+        raise typer.Exit(code=2)
+    return history
+
+
+def _secs(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}s"
+
+
+def _mb_rate(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value / (1 << 20):.1f}MB/s"
+
+
+def _row_rate(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}rows/s"
+
+
+@history_app.command("index")
+def history_index(
+    paths: Optional[List[Path]] = typer.Argument(None, help="report.json files or directories to scan (default: artifacts/)."),
+):
+    """Backfill: index existing report.json files (re-indexing a run replaces it)."""
+    history = _history_or_exit()
+    indexed = history.index_paths(paths or [Path(DEFAULT_OUTDIR)])
+    typer.echo(f"HISTORY: indexed {len(indexed)} run(s) into {history.path}")
+
+
+@history_app.command("list")
+def history_list(
+    playbook: str = typer.Option("", "--playbook", "-m", help="Only runs of this playbook (e.g. one_step, assessment)."),
+    last: int = typer.Option(20, "--last", help="Number of runs to show (0 = all)."),
+):
+    """Newest runs with duration, rows and bytes moved."""
+    history = _history_or_exit()
+    for r in history.list_runs(playbook, last):
+        status = {1: "PASS", 0: "FAIL"}.get(r["success"], "-")
+        typer.echo(
+            f"#{r['id']}\t{r['run_id']}\t{r['run_dir']}\t{r['playbook'] or '-'}\t{status}\t"
+            f"{_secs(r['duration_s'])}\t{r['rows'] or 0}\t{r['bytes'] or 0}"
+        )
+
+
+@history_app.command("trend")
+def history_trend(
+    playbook: str = typer.Argument(..., help="Playbook to follow (e.g. one_step)."),
+    step: str = typer.Option("", "--step", help="Follow one step id instead of the whole run."),
+    last: int = typer.Option(20, "--last", help="Number of runs (0 = all)."),
+):
+    """Duration and throughput of a playbook (or one step) across runs, oldest first."""
+    history = _history_or_exit()
+    points = history.trend(playbook, step=step, last=last)
+    if not points:
+        typer.echo(f"HISTORY: no runs of {playbook}" + (f" with a completed {step}" if step else ""))
+        return
+    for p in points:
+        typer.echo(
+            f"#{p['id']}\t{p['started_at']}\t{_secs(p['duration_s'])}\t"
+            f"{_mb_rate(p['bytes_per_s'])}\t{_row_rate(p['rows_per_s'])}"
+        )
+
+
+@history_app.command("compare")
+def history_compare(
+    run_a: str = typer.Argument(..., help="Baseline run: history id, run id or run directory name."),
+    run_b: str = typer.Argument(..., help="Run to compare against it."),
+):
+    """Phase-by-phase durations and throughput of two runs."""
+    history = _history_or_exit()
+    try:
+        result = history.compare(run_a, run_b)
+    except KeyError as exc:
+        typer.echo(f"ERROR: {exc.args[0]}", err=True)
+        raise typer.Exit(code=2)
+    a, b = result["a"], result["b"]
+    typer.echo(f"A: #{a['id']} {a['run_dir']} ({a['playbook']}, {_secs(a['duration_s'])})")
+    typer.echo(f"B: #{b['id']} {b['run_dir']} ({b['playbook']}, {_secs(b['duration_s'])})")
+    for s in result["steps"]:
+        delta = "-" if s["delta_pct"] is None else f"{s['delta_pct']:+.1f}%"
+        typer.echo(
+            f"{s['step_id']:<28} {_secs(s['duration_a']):>9} {_secs(s['duration_b']):>9} {delta:>8}  "
+            f"{_mb_rate(s['bytes_per_s_a'])} -> {_mb_rate(s['bytes_per_s_b'])}  "
+            f"{_row_rate(s['rows_per_s_a'])} -> {_row_rate(s['rows_per_s_b'])}"
+        )
+
+
+@history_app.command("regressions")
+def history_regressions(
+    run_ref: Optional[str] = typer.Argument(None, help="Run to check (default: newest migration run)."),
+    baseline: int = typer.Option(5, "--baseline", help="Previous successful runs of the same playbook to compare with."),
+    threshold: float = typer.Option(0.2, "--threshold", help="Flag steps this much slower / lower throughput (0.2 = 20%)."),
+    min_seconds: float = typer.Option(5.0, "--min-seconds", help="Ignore slowdowns shorter than this."),
+):
+    """Flag steps slower, or moving data slower, than the median of earlier rehearsals; exits 4 when found."""
+    history = _history_or_exit()
+    try:
+        result = history.regressions(run_ref or "", baseline=max(1, baseline), threshold=threshold, min_seconds=min_seconds)
+    except KeyError as exc:
+        typer.echo(f"ERROR: {exc.args[0]}", err=True)
+        raise typer.Exit(code=2)
+    run = result["run"]
+    if not result["baseline_runs"]:
+        typer.echo(f"HISTORY: no earlier successful {run['playbook']} runs to compare #{run['id']} with")
+        return
+    for f in result["regressions"]:
+        typer.echo(f"REGRESSION {f['step_id']} {f['metric']}: {f['baseline']} -> {f['value']} ({f['change_pct']:+.1f}%)")
+    status = "REGRESSED" if result["regressions"] else "OK"
+    typer.echo(
+        f"HISTORY: {status} #{run['id']} {run['run_dir']} vs median of "
+        f"{len(result['baseline_runs'])} earlier {run['playbook']} run(s)"
+    )
+    if result["regressions"]:
+        raise typer.Exit(code=4)
+
+
 def main():
     app()
 
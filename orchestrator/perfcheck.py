@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import json
+import re
+import statistics
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .dbclient import Endpoint, query, query_named, sql_ident, sql_quote
+from .governor import Governor
+
+PERFCHECK_REPORT = "perfcheck.json"
+PERFCHECK_TSV = "perfcheck.tsv"
+_MARKER = "PERFCHECK"
+_COMMENTS = re.compile(r"/\*(?!\s*\+).*?\*/|--[^\n]*|#[^\n]*", re.S)
+_READ_ONLY = re.compile(r"^\s*\(?\s*(SELECT|WITH)\b", re.I)
+# Locking reads, writes through SELECT and functions with side effects are never replayed.
+_UNSAFE = re.compile(
+    r"\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bINTO\s+(OUTFILE|DUMPFILE|@)|"
+    r"\b(GET_LOCK|RELEASE_LOCK|RELEASE_ALL_LOCKS|SLEEP|BENCHMARK|NEXTVAL|SETVAL|LAST_INSERT_ID)\s*\(",
+    re.I,
+)
+_ERROR_LINE = re.compile(r"^ERROR \d+ \(\w+\) at line (\d+): (.*)$")
+
+
+@dataclass
+class Statement:
+    """A top digest from the source with the sample literal query to replay."""
+
+    schema: str
+    digest: str
+    digest_text: str
+    sample: str
+    calls: int
+    total_ms: float
+    latency: Dict[str, List[float]] = field(default_factory=lambda: {"source": [], "target": []})
+    errors: Dict[str, str] = field(default_factory=dict)
+    plans: Dict[str, List[Tuple[str, str, str]]] = field(default_factory=dict)
+
+
+def is_read_only(sql: str) -> bool:
+    body = _COMMENTS.sub(" ", sql)
+    return bool(_READ_ONLY.match(body)) and not _UNSAFE.search(body)
+
+
+def top_statements(
+    src: Endpoint,
+    schemas: Sequence[str],
+    limit: int,
+    log: Callable[[str], None],
+) -> Tuple[List[Statement], Dict[str, int]]:
+    """Top digests by total latency that have a complete, read-only sample query.
+
+    QUERY_SAMPLE_TEXT needs MySQL 8.0+; samples cut at performance_schema_max_sql_text_length
+    are skipped because they would not parse.
+    """
+    max_len = int((query(src, "SELECT @@performance_schema_max_sql_text_length") or [["1024"]])[0][0] or 1024)
+    rows = query(
+        src,
+        "SELECT SCHEMA_NAME, DIGEST, DIGEST_TEXT, COUNT_STAR, ROUND(SUM_TIMER_WAIT / 1000000000, 3), QUERY_SAMPLE_TEXT "
+        "FROM performance_schema.events_statements_summary_by_digest "
+        f"WHERE SCHEMA_NAME IN ({', '.join(sql_quote(s) for s in schemas)}) AND QUERY_SAMPLE_TEXT IS NOT NULL "
+        f"ORDER BY SUM_TIMER_WAIT DESC LIMIT {int(limit) * 4}",
+    )
+    skipped = {"not_read_only": 0, "truncated": 0}
+    out: List[Statement] = []
+    for schema, digest, text, calls, total_ms, sample in rows:
+        sample = (sample or "").strip().rstrip(";").strip()
+        if not sample:
+            continue
+        if len(sample) >= max_len - 4:
+            skipped["truncated"] += 1
+            continue
+        if not is_read_only(sample):
+            skipped["not_read_only"] += 1
+            continue
+        out.append(Statement(schema or "", digest or "", text or "", sample, int(calls or 0), float(total_ms or 0)))
+        if len(out) >= limit:
+            break
+    log(f"PERFCHECK {len(out)} read-only digest(s) to replay "
+        f"(skipped {skipped['not_read_only']} writes/locking, {skipped['truncated']} truncated samples)")
+    return out, skipped
+
+
+def _session_setup(side: str, timeout_s: float) -> List[str]:
+    lines = ["SET SESSION TRANSACTION READ ONLY;"]
+    if timeout_s > 0:
+        if side == "source":
+            lines.append(f"SET SESSION max_execution_time = {int(timeout_s * 1000)};")
+        else:
+            lines.append(f"SET SESSION max_statement_time = {timeout_s:g};")
+    return lines
+
+
+def _replay_session(
+    ep: Endpoint,
+    side: str,
+    jobs: List[Tuple[int, Statement]],
+    timeout_s: float,
+    errors: Dict[int, str],
+    gov: Optional[Governor] = None,
+) -> Dict[int, float]:
+    """Run (seq, statement) jobs in one client session; returns seq -> milliseconds.
+
+    Each statement runs between two SYSDATE(6) stamps in the same session, so the
+    server measures execution plus result transfer and client start-up is not counted.
+    Result rows are read and discarded. With a governor, statements are fed one at
+    a time: none starts while the source is paused, and in the slow state each is
+    followed by an idle gap as long as it ran.
+    """
+    lines = _session_setup(side, timeout_s)
+    setup = len(lines)
+    # Line range of each job in the script, so client errors map back to a statement.
+    spans: List[Tuple[int, int, int]] = []
+    line_seq: Dict[int, int] = {}
+    for seq, st in jobs:
+        begin = len(lines)
+        lines.append(f"USE {sql_ident(st.schema)};")
+        lines.append("SET @perfcheck_t0 = SYSDATE(6);")
+        first = len(lines) + 1
+        # Verbatim, with the delimiter on its own line so a trailing -- comment cannot swallow it.
+        lines.extend(st.sample.split("\n"))
+        lines.append(";")
+        for n in range(first, len(lines) + 1):
+            line_seq[n] = seq
+        lines.append(f"SELECT '{_MARKER}', {seq}, TIMESTAMPDIFF(MICROSECOND, @perfcheck_t0, SYSDATE(6));")
+        spans.append((seq, begin, len(lines)))
+    try:
+        p = subprocess.Popen(
+            ep.argv("--batch", "--skip-column-names", "--quick", "--force", "--default-character-set=utf8mb4"),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=ep.env(),
+        )
+    except FileNotFoundError:
+        errors[-1] = f"client not found: {ep.client_bin}"
+        return {}
+
+    timings: Dict[int, float] = {}
+    done = threading.Condition()
+    finished: List[int] = []
+
+    def feed() -> None:
+        assert p.stdin is not None
+        try:
+            if gov is None:
+                p.stdin.write("\n".join(lines) + "\n")
+            else:
+                p.stdin.write("\n".join(lines[:setup]) + "\n")
+                for seq, begin, end in spans:
+                    gov.throttled_s += gov.hold()
+                    p.stdin.write("\n".join(lines[begin:end]) + "\n")
+                    p.stdin.flush()
+                    with done:
+                        done.wait_for(lambda: seq in finished or p.poll() is not None)
+                    if gov.factor() < 1.0 and seq in timings:
+                        pause = timings[seq] / 1000.0
+                        time.sleep(pause)
+                        gov.throttled_s += pause
+            p.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    err_lines: List[str] = []
+    err_thread = threading.Thread(target=lambda: err_lines.extend(p.stderr or []), daemon=True)
+    err_thread.start()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    assert p.stdout is not None
+    for line in p.stdout:
+        if line.startswith(_MARKER + "\t"):
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) == 3 and parts[1].isdigit():
+                if parts[2].isdigit():
+                    timings[int(parts[1])] = int(parts[2]) / 1000.0
+                with done:
+                    finished.append(int(parts[1]))
+                    done.notify_all()
+    p.wait()
+    with done:
+        done.notify_all()
+    feeder.join()
+    err_thread.join(timeout=5)
+    for line in err_lines:
+        m = _ERROR_LINE.match(line.strip())
+        if m and int(m.group(1)) in line_seq:
+            seq = line_seq[int(m.group(1))]
+            errors[seq] = m.group(2)[:200]
+            timings.pop(seq, None)
+        elif line.strip() and not m:
+            errors.setdefault(-1, line.strip()[:200])
+    return timings
+
+
+def _replay(
+    ep: Endpoint,
+    side: str,
+    statements: List[Statement],
+    runs: int,
+    sessions: int,
+    timeout_s: float,
+    failures: List[str],
+    gov: Optional[Governor] = None,
+) -> None:
+    """Replay every statement runs+1 times (first run warms up) over `sessions` sessions."""
+    jobs = [(i * (runs + 1) + r, st) for r in range(runs + 1) for i, st in enumerate(statements)]
+    buckets: List[List[Tuple[int, Statement]]] = [jobs[k::sessions] for k in range(max(1, sessions))]
+    results: List[Dict[int, float]] = [{} for _ in buckets]
+    errors: List[Dict[int, str]] = [{} for _ in buckets]
+    threads = [
+        threading.Thread(target=lambda k=k: results[k].update(_replay_session(ep, side, buckets[k], timeout_s, errors[k], gov)),
+                         daemon=True)
+        for k in range(len(buckets)) if buckets[k]
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for k, timings in enumerate(results):
+        for seq, ms in timings.items():
+            i, r = divmod(seq, runs + 1)
+            if r > 0:
+                statements[i].latency[side].append(ms)
+        for seq, msg in errors[k].items():
+            if seq < 0:
+                # Client warnings are harmless; a session that timed nothing failed outright.
+                if not timings:
+                    failures.append(f"replay on {ep.label()} failed: {msg}")
+                continue
+            statements[seq // (runs + 1)].errors.setdefault(side, msg)
+
+
+def _plan(ep: Endpoint, st: Statement) -> List[Tuple[str, str, str]]:
+    rows = query_named(ep, f"USE {sql_ident(st.schema)}; EXPLAIN {st.sample}", timeout=60)
+    return [(r.get("table") or "", (r.get("type") or "").upper(), r.get("key") or "") for r in rows]
+
+
+def _pct(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))], 3)
+
+
+def perfcheck(
+    src: Endpoint,
+    tgt: Endpoint,
+    schemas: Sequence[str],
+    top: int = 50,
+    runs: int = 5,
+    sessions: int = 2,
+    timeout_s: float = 30.0,
+    threshold: float = 0.5,
+    min_ms: float = 5.0,
+    log: Optional[Callable[[str], None]] = None,
+    gov: Optional[Governor] = None,
+) -> Dict[str, Any]:
+    """Replay the source's top read-only statements on both servers and compare latency and plans.
+
+    The source side is a source reader like any other: with `gov`, its sessions
+    wait while the governor pauses and slow down with it.
+    """
+    log = log or (lambda _msg: None)
+    schemas = [s.strip() for s in schemas if s.strip()]
+    if not schemas:
+        raise ValueError("no schemas to check (set SRC_DBS or SRC_DB)")
+    statements, skipped = top_statements(src, schemas, top, log)
+    started = time.time()
+    if statements:
+        sides = [(src, "source"), (tgt, "target")]
+        failures: List[str] = []
+        threads = [
+            threading.Thread(
+                target=_replay,
+                args=(ep, side, statements, runs, sessions, timeout_s, failures, gov if side == "source" else None),
+                daemon=True,
+            )
+            for ep, side in sides
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if failures:
+            raise RuntimeError(failures[0])
+        for ep, side in sides:
+            for st in statements:
+                if side in st.errors:
+                    continue
+                if gov is not None and side == "source":
+                    gov.throttled_s += gov.hold()
+                try:
+                    st.plans[side] = _plan(ep, st)
+                except RuntimeError as exc:
+                    failures.append(str(exc))
+        if failures:
+            log(f"WARN: EXPLAIN failed for {len(failures)} statement(s): {failures[0]}")
+    rows = []
+    for st in statements:
+        s50, t50 = _pct(st.latency["source"], 0.5), _pct(st.latency["target"], 0.5)
+        ratio = round(t50 / s50, 2) if s50 and t50 is not None else None
+        src_plan, tgt_plan = st.plans.get("source"), st.plans.get("target")
+        plan_change = src_plan is not None and tgt_plan is not None and src_plan != tgt_plan
+        new_full_scans = sorted(
+            {t for t, typ, _ in (tgt_plan or []) if typ == "ALL"} - {t for t, typ, _ in (src_plan or []) if typ == "ALL"}
+        )
+        regressed = (
+            s50 is not None and t50 is not None and t50 > s50 * (1 + threshold) and t50 - s50 >= min_ms
+        )
+        rows.append({
+            "schema": st.schema,
+            "digest": st.digest,
+            "digest_text": st.digest_text[:500],
+            "calls": st.calls,
+            "source_total_ms": st.total_ms,
+            "source_ms": {"p50": s50, "p95": _pct(st.latency["source"], 0.95), "max": _pct(st.latency["source"], 1.0),
+                          "mean": round(statistics.mean(st.latency["source"]), 3) if st.latency["source"] else None},
+            "target_ms": {"p50": t50, "p95": _pct(st.latency["target"], 0.95), "max": _pct(st.latency["target"], 1.0),
+                          "mean": round(statistics.mean(st.latency["target"]), 3) if st.latency["target"] else None},
+            "ratio_p50": ratio,
+            "regressed": regressed,
+            "plan_change": plan_change,
+            "new_full_scans": new_full_scans,
+            "source_plan": [list(p) for p in src_plan or []],
+            "target_plan": [list(p) for p in tgt_plan or []],
+            "errors": st.errors,
+        })
+    rows.sort(key=lambda r: (not r["regressed"], -(r["ratio_p50"] or 0)))
+    return {
+        "schemas": schemas,
+        "replayed": len(statements),
+        "runs": runs,
+        "sessions": sessions,
+        "threshold": threshold,
+        "min_ms": min_ms,
+        "skipped": skipped,
+        "duration_s": round(time.time() - started, 1),
+        "regressions": sum(1 for r in rows if r["regressed"]),
+        "plan_changes": sum(1 for r in rows if r["plan_change"]),
+        "target_errors": sum(1 for r in rows if "target" in r["errors"] and "source" not in r["errors"]),
+        "statements": rows,
+    }
+
+
+def write_perfcheck(result: Dict[str, Any], out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / PERFCHECK_REPORT
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    with (out_dir / PERFCHECK_TSV).open("w", encoding="utf-8") as f:
+        f.write("schema\tdigest\tsource_p50_ms\ttarget_p50_ms\tratio\tregressed\tplan_change\tnew_full_scans\tdigest_text\n")
+        for r in result["statements"]:
+            text = " ".join(r["digest_text"].split())[:200]
+            f.write(
+                f"{r['schema']}\t{r['digest']}\t{r['source_ms']['p50']}\t{r['target_ms']['p50']}\t{r['ratio_p50']}\t"
+                f"{int(r['regressed'])}\t{int(r['plan_change'])}\t{','.join(r['new_full_scans'])}\t{text}\n"
+            )
+    return path
+
+
+def warnings_from(result: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """(name, severity, details) warnings for report.json."""
+    out = []
+    regressed = [r for r in result["statements"] if r["regressed"]]
+    if regressed:
+        severe = any((r["ratio_p50"] or 0) >= 3 or r["new_full_scans"] for r in regressed)
+        lines = [
+            f"{r['schema']}\t{r['digest']}\t{r['source_ms']['p50']}ms -> {r['target_ms']['p50']}ms\t"
+            f"x{r['ratio_p50']}\t{' '.join(r['digest_text'].split())[:160]}"
+            for r in regressed
+        ]
+        out.append(("query_latency_regressions", "HIGH" if severe else "MEDIUM",
+                    {"count": len(lines), "rows_sample": lines[:200]}))
+    changed = [r for r in result["statements"] if r["plan_change"]]
+    if changed:
+        lines = [
+            f"{r['schema']}\t{r['digest']}\tnew full scans: {','.join(r['new_full_scans']) or '-'}\t"
+            f"{' '.join(r['digest_text'].split())[:160]}"
+            for r in changed
+        ]
+        out.append(("query_plan_changes", "MEDIUM", {"count": len(lines), "rows_sample": lines[:200]}))
+    failing = [r for r in result["statements"] if "target" in r["errors"] and "source" not in r["errors"]]
+    if failing:
+        lines = [f"{r['schema']}\t{r['digest']}\t{r['errors']['target']}" for r in failing]
+        out.append(("queries_failing_on_target", "HIGH", {"count": len(lines), "rows_sample": lines[:200]}))
+    return out
+
+
+def summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """report.json section: counts plus the worst statements."""
+    keys = ("replayed", "runs", "threshold", "regressions", "plan_changes", "target_errors", "duration_s")
+    worst = [
+        {
+            **{k: r[k] for k in ("schema", "digest", "ratio_p50", "plan_change", "new_full_scans")},
+            "source_p50_ms": r["source_ms"]["p50"],
+            "target_p50_ms": r["target_ms"]["p50"],
+        }
+        for r in result["statements"] if r["regressed"] or r["plan_change"]
+    ]
+    return {**{k: result[k] for k in keys}, "statements": worst[:20]}
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .dbclient import Endpoint, query, query_value, sql_ident, sql_quote
+from .governor import TokenBucket
+
+PREWARM_REPORT = "prewarm.json"
+PAGE_BYTES = 16 << 10
+# Treat an index as fully wanted when the hot set covers this share of it.
+_FULL_SCAN = 0.95
+_NUMERIC = ("tinyint", "smallint", "mediumint", "int", "bigint", "decimal", "float", "double", "year")
+_TEMPORAL = ("date", "datetime", "timestamp")
+_ENCODED = re.compile(r"@([0-9a-fA-F]{4})")
+_BUFFER_TABLE = re.compile(r"^`((?:[^`]|``)+)`\.`((?:[^`]|``)+)`")
+
+Key = Tuple[str, str, str]
+
+
+@dataclass
+class HotIndex:
+    """One source index of the hot working set and what prewarming did with it on a target."""
+
+    schema: str
+    table: str
+    index: str
+    # Source: rows read through the index (performance_schema) and its buffer-pool pages.
+    reads: int = 0
+    cached_pages: int = 0
+    # Target: index size, leading-column type, pages scheduled and resident afterwards.
+    target_pages: int = 0
+    table_rows: int = 0
+    columns: List[str] = field(default_factory=list)
+    lead_type: str = ""
+    planned_pages: int = 0
+    resident_pages: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+    def key(self) -> Key:
+        return (self.schema, self.table, self.index)
+
+    def wanted_pages(self) -> int:
+        """Pages worth loading: what the source keeps cached, else the whole index."""
+        if not self.target_pages:
+            return 0
+        return min(self.cached_pages or self.target_pages, self.target_pages)
+
+
+def _in_list(names: Sequence[str]) -> str:
+    return ", ".join(sql_quote(n) for n in names)
+
+
+def _innodb_name(name: str) -> Tuple[str, str]:
+    """'db/tbl#p#p0' (filename-encoded) -> ('db', 'tbl')."""
+    schema, _, table = name.partition("/")
+    table = re.split(r"#[pP]#", table)[0]
+    decode = lambda s: _ENCODED.sub(lambda m: chr(int(m.group(1), 16)), s)  # noqa: E731
+    return decode(schema), decode(table)
+
+
+def hot_set(src: Endpoint, schemas: Sequence[str], log: Callable[[str], None]) -> List[HotIndex]:
+    """Source indexes ranked by buffer-pool residency, then by rows read through them.
+
+    Residency comes from INNODB_CACHED_INDEXES (MySQL 8.0+), the SQL view of what
+    an ib_buffer_pool dump would list, so no file access on the source is needed.
+    Read counts come from performance_schema; a NULL index (table scans) counts
+    towards PRIMARY.
+    """
+    found: Dict[Key, HotIndex] = {}
+
+    def entry(schema: str, table: str, index: str) -> HotIndex:
+        return found.setdefault((schema, table, index), HotIndex(schema, table, index))
+
+    try:
+        rows = query(
+            src,
+            "SELECT OBJECT_SCHEMA, OBJECT_NAME, COALESCE(INDEX_NAME, 'PRIMARY'), COUNT_READ "
+            "FROM performance_schema.table_io_waits_summary_by_index_usage "
+            f"WHERE OBJECT_SCHEMA IN ({_in_list(schemas)}) AND COUNT_READ > 0",
+        )
+        for schema, table, index, reads in rows:
+            entry(schema or "", table or "", index or "PRIMARY").reads += int(reads or 0)
+    except RuntimeError as exc:
+        log(f"WARN: performance_schema index I/O unavailable: {exc}")
+    try:
+        like = " OR ".join(f"t.NAME LIKE {sql_quote(s.replace('_', chr(92) + '_') + '/%')}" for s in schemas)
+        rows = query(
+            src,
+            "SELECT t.NAME, i.NAME, c.N_CACHED_PAGES FROM information_schema.INNODB_CACHED_INDEXES c "
+            "JOIN information_schema.INNODB_INDEXES i ON i.INDEX_ID = c.INDEX_ID "
+            "JOIN information_schema.INNODB_TABLES t ON t.TABLE_ID = i.TABLE_ID "
+            f"WHERE {like}",
+        )
+        wanted = set(schemas)
+        for name, index, pages in rows:
+            schema, table = _innodb_name(name or "")
+            if schema in wanted and index and index != "GEN_CLUST_INDEX":
+                entry(schema, table, index).cached_pages += int(pages or 0)
+    except RuntimeError as exc:
+        log(f"WARN: source buffer-pool contents unavailable (MySQL 8.0+ only): {exc}")
+    return sorted(found.values(), key=lambda h: (-h.cached_pages, -h.reads, h.key()))
+
+
+def _map_to_target(tgt: Endpoint, hot: List[HotIndex], schemas: Sequence[str]) -> List[HotIndex]:
+    """Fill target index sizes and columns; returns the hot indexes missing on the target."""
+    sizes: Dict[Key, int] = {}
+    for schema, table, index, pages in query(
+        tgt,
+        "SELECT database_name, table_name, index_name, stat_value FROM mysql.innodb_index_stats "
+        f"WHERE stat_name = 'size' AND database_name IN ({_in_list(schemas)})",
+    ):
+        key = (schema or "", re.split(r"#[pP]#", table or "")[0], index or "")
+        sizes[key] = sizes.get(key, 0) + int(pages or 0)
+    table_rows: Dict[Tuple[str, str], Tuple[int, int]] = {}
+    for schema, table, rows, data_len in query(
+        tgt,
+        "SELECT TABLE_SCHEMA, TABLE_NAME, COALESCE(TABLE_ROWS, 0), COALESCE(DATA_LENGTH, 0) "
+        f"FROM information_schema.TABLES WHERE TABLE_SCHEMA IN ({_in_list(schemas)}) AND ENGINE = 'InnoDB'",
+    ):
+        table_rows[(schema or "", table or "")] = (int(rows or 0), int(data_len or 0))
+    columns: Dict[Key, List[Tuple[str, str]]] = {}
+    for schema, table, index, column, dtype in query(
+        tgt,
+        "SELECT s.TABLE_SCHEMA, s.TABLE_NAME, s.INDEX_NAME, s.COLUMN_NAME, c.DATA_TYPE "
+        "FROM information_schema.STATISTICS s JOIN information_schema.COLUMNS c "
+        "ON c.TABLE_SCHEMA = s.TABLE_SCHEMA AND c.TABLE_NAME = s.TABLE_NAME AND c.COLUMN_NAME = s.COLUMN_NAME "
+        f"WHERE s.TABLE_SCHEMA IN ({_in_list(schemas)}) ORDER BY s.TABLE_SCHEMA, s.TABLE_NAME, s.INDEX_NAME, s.SEQ_IN_INDEX",
+    ):
+        columns.setdefault((schema or "", table or "", index or ""), []).append((column or "", (dtype or "").lower()))
+    missing = []
+    for h in hot:
+        rows, data_len = table_rows.get((h.schema, h.table), (0, 0))
+        cols = columns.get(h.key())
+        if not cols or (h.schema, h.table) not in table_rows:
+            missing.append(h)
+            continue
+        h.table_rows = rows
+        h.columns = [c for c, _ in cols]
+        h.lead_type = cols[0][1]
+        h.target_pages = sizes.get(h.key()) or (max(1, data_len // PAGE_BYTES) if h.index == "PRIMARY" else 0)
+    return missing
+
+
+def _budget_pages(tgt: Endpoint, max_mb: int, pool_fraction: float) -> int:
+    pool = int(query_value(tgt, "SELECT @@innodb_buffer_pool_size") or 0)
+    budget = int(pool * pool_fraction) if pool else 0
+    if max_mb > 0:
+        budget = min(budget, max_mb << 20) if budget else max_mb << 20
+    return budget // PAGE_BYTES
+
+
+def plan_pages(hot: List[HotIndex], budget_pages: int) -> None:
+    """Hand out the page budget in hot-set order; the last index may get a partial share."""
+    left = budget_pages
+    for h in hot:
+        want = h.wanted_pages()
+        h.planned_pages = max(0, min(want, left)) if budget_pages > 0 else want
+        left -= h.planned_pages
+
+
+def _scan_sql(h: HotIndex, where: str = "", limit: int = 0) -> str:
+    table = f"{sql_ident(h.schema)}.{sql_ident(h.table)} FORCE INDEX ({sql_ident(h.index)})"
+    if limit:
+        order = ", ".join(f"{sql_ident(c)} DESC" for c in h.columns)
+        return (f"SELECT COUNT(*) FROM (SELECT {sql_ident(h.columns[0])} FROM {table} "
+                f"ORDER BY {order} LIMIT {limit}) w")
+    return f"SELECT COUNT(*) FROM {table}" + (f" WHERE {where}" if where else "")
+
+
+def _chunks(tgt: Endpoint, h: HotIndex, chunk_pages: int) -> List[Tuple[str, int]]:
+    """(query, pages) pieces that read h.planned_pages of the index, newest keys first.
+
+    Numeric and temporal leading columns are split into key ranges of about
+    chunk_pages each so the I/O budget can pace them; other indexes are read in
+    one scan (or one LIMITed backward scan when only part of them fits).
+    """
+    partial = h.planned_pages < h.target_pages * _FULL_SCAN
+    lead = sql_ident(h.columns[0])
+    base = h.lead_type.split("(")[0]
+    if base in _NUMERIC or base in _TEMPORAL:
+        temporal = base in _TEMPORAL
+        conv = f"UNIX_TIMESTAMP({lead})" if temporal else lead
+        rows = query(tgt, f"SELECT MIN({conv}), MAX({conv}) FROM {sql_ident(h.schema)}.{sql_ident(h.table)}")
+        lo_raw, hi_raw = (rows[0] if rows else [None, None])
+        if lo_raw is not None and hi_raw is not None:
+            lo, hi = float(lo_raw), float(hi_raw)
+            span = (hi - lo) * (h.planned_pages / h.target_pages if partial else 1.0)
+            pieces = max(1, -(-h.planned_pages // max(1, chunk_pages)))
+            step = span / pieces if span > 0 else 0
+            out = []
+            upper = hi
+            for i in range(pieces):
+                lower = lo if (not partial and i == pieces - 1) else upper - step
+                # Compare the bare column so the range stays sargable.
+                lo_sql = f"FROM_UNIXTIME({lower!r})" if temporal else repr(lower)
+                hi_sql = f"FROM_UNIXTIME({upper!r})" if temporal else repr(upper)
+                rng = f"{lead} >= {lo_sql} AND {lead} {'<=' if i == 0 else '<'} {hi_sql}"
+                out.append((_scan_sql(h, where=rng), h.planned_pages // pieces))
+                upper = lower
+            return out
+    if partial:
+        limit = max(1, int(h.table_rows * h.planned_pages / max(1, h.target_pages)))
+        return [(_scan_sql(h, limit=limit), h.planned_pages)]
+    return [(_scan_sql(h), h.planned_pages)]
+
+
+class _Budget:
+    """Thread-safe I/O budget in bytes per second shared by all prewarm sessions."""
+
+    def __init__(self, bytes_per_sec: int) -> None:
+        self.bucket = TokenBucket(bytes_per_sec)
+        self.lock = threading.Lock()
+
+    def take(self, nbytes: int) -> None:
+        with self.lock:
+            self.bucket.consume(nbytes)
+
+
+def _load(tgt: Endpoint, hot: List[HotIndex], threads: int, chunk_pages: int, budget: _Budget,
+          log: Callable[[str], None]) -> None:
+    work = [h for h in hot if h.planned_pages > 0]
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if not work:
+                    return
+                h = work.pop(0)
+            t0 = time.time()
+            try:
+                for sql, pages in _chunks(tgt, h, chunk_pages):
+                    budget.take(pages * PAGE_BYTES)
+                    query(tgt, sql)
+            except (RuntimeError, ValueError) as exc:
+                h.error = str(exc)
+                log(f"WARN: prewarm {h.schema}.{h.table} ({h.index}) failed: {exc}")
+            h.seconds = round(time.time() - t0, 1)
+
+    pool = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, threads))]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+
+def _residency(tgt: Endpoint, hot: List[HotIndex], schemas: Sequence[str]) -> None:
+    """Count target buffer-pool pages per index (INNODB_BUFFER_PAGE; fine on a pre-cutover target)."""
+    resident: Dict[Key, int] = {}
+    like = " OR ".join(f"TABLE_NAME LIKE {sql_quote('`' + s.replace('_', chr(92) + '_') + '`.%')}" for s in schemas)
+    for table, index, pages in query(
+        tgt,
+        "SELECT TABLE_NAME, INDEX_NAME, COUNT(*) FROM information_schema.INNODB_BUFFER_PAGE "
+        f"WHERE PAGE_TYPE = 'INDEX' AND ({like}) GROUP BY TABLE_NAME, INDEX_NAME",
+    ):
+        m = _BUFFER_TABLE.match(table or "")
+        if not m:
+            continue
+        key = (m.group(1).replace("``", "`"), m.group(2).replace("``", "`"), index or "")
+        resident[key] = resident.get(key, 0) + int(pages or 0)
+    for h in hot:
+        h.resident_pages = resident.get(h.key(), 0)
+
+
+def prewarm(
+    src: Endpoint,
+    targets: List[Endpoint],
+    schemas: Sequence[str],
+    threads: int = 4,
+    mb_per_sec: int = 0,
+    max_mb: int = 0,
+    pool_fraction: float = 0.75,
+    chunk_mb: int = 64,
+    check_residency: bool = True,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Capture the source hot set and preload it into each target's buffer pool."""
+    log = log or (lambda _msg: None)
+    schemas = [s.strip() for s in schemas if s.strip()]
+    if not schemas:
+        raise ValueError("no schemas to prewarm (set SRC_DBS or SRC_DB)")
+    source_hot = hot_set(src, schemas, log)
+    if not source_hot:
+        raise RuntimeError("no hot set on the source: performance_schema and INNODB_CACHED_INDEXES returned nothing")
+    log(f"PREWARM hot set: {len(source_hot)} index(es), {sum(h.cached_pages for h in source_hot)} cached page(s) on source")
+    results = []
+    for tgt in targets:
+        hot = [HotIndex(h.schema, h.table, h.index, reads=h.reads, cached_pages=h.cached_pages) for h in source_hot]
+        started = time.time()
+        missing = _map_to_target(tgt, hot, schemas)
+        gone = {h.key() for h in missing}
+        hot = [h for h in hot if h.key() not in gone]
+        budget_pages = _budget_pages(tgt, max_mb, pool_fraction)
+        plan_pages(hot, budget_pages)
+        planned = sum(h.planned_pages for h in hot)
+        log(f"PREWARM {tgt.label()}: {len(hot)} index(es), {planned * PAGE_BYTES >> 20} MB planned "
+            f"(budget {budget_pages * PAGE_BYTES >> 20} MB, {len(missing)} missing on target)")
+        _load(tgt, hot, threads, max(1, (chunk_mb << 20) // PAGE_BYTES), _Budget(mb_per_sec << 20), log)
+        wanted = sum(h.wanted_pages() for h in hot)
+        result: Dict[str, Any] = {
+            "target": tgt.label(),
+            "indexes": len(hot),
+            "missing_on_target": [f"{h.schema}.{h.table} ({h.index})" for h in missing],
+            "budget_mb": budget_pages * PAGE_BYTES >> 20,
+            "hot_mb": wanted * PAGE_BYTES >> 20,
+            "planned_mb": planned * PAGE_BYTES >> 20,
+            "failed": sum(1 for h in hot if h.error),
+            "duration_s": round(time.time() - started, 1),
+            "resident_fraction": None,
+        }
+        if check_residency:
+            try:
+                _residency(tgt, hot, schemas)
+                covered = sum(min(h.resident_pages, h.wanted_pages()) for h in hot)
+                result["resident_mb"] = covered * PAGE_BYTES >> 20
+                result["resident_fraction"] = round(covered / wanted, 4) if wanted else None
+            except RuntimeError as exc:
+                log(f"WARN: residency check failed on {tgt.label()}: {exc}")
+        result["detail"] = [asdict(h) for h in hot]
+        fraction = result["resident_fraction"]
+        log(f"PREWARM {tgt.label()}: done in {result['duration_s']}s, "
+            + (f"{fraction * 100:.1f}% of the hot set resident" if fraction is not None else "residency unknown"))
+        results.append(result)
+    return {
+        "schemas": schemas,
+        "source_indexes": len(source_hot),
+        "source_cached_mb": sum(h.cached_pages for h in source_hot) * PAGE_BYTES >> 20,
+        "targets": results,
+        "ok": all(not r["failed"] for r in results),
+    }
+
+
+def write_prewarm(result: Dict[str, Any], out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / PREWARM_REPORT
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return path
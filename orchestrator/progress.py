@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, List, Mapping, Optional, TextIO, Tuple
+
+from .dbclient import Endpoint, endpoint_from_env, iter_query, sql_quote
+
+PROGRESS_FILE = "progress.json"
+# Tables still streaming never report more than this; TABLE_ROWS is only an estimate.
+RUNNING_CAP = 0.99
+
+_DUMP_DB = re.compile(rb"^(?:-- Current Database: |USE )`((?:[^`]|``)+)`")
+_DUMP_DATA = re.compile(rb"^-- Dumping data for table `((?:[^`]|``)+)`")
+_DUMP_END_DATA = re.compile(rb"^-- (?:Table structure for table|Dumping (?:events|routines)|Final view structure)")
+_SQLDATA_EVENT = re.compile(r"^\s+([^\s.]+)\.(\S+) - (.+)$")
+_SQLDATA_ROWS = re.compile(r"\((\d+) rows? read")
+_SQLDATA_WRITTEN = re.compile(r"^\s+Rows written:\s+(\d+)")
+
+
+@dataclass
+class TableProgress:
+    schema: str
+    name: str
+    expected_rows: int = 0
+    expected_bytes: int = 0
+    rows: int = 0
+    bytes: int = 0
+    state: str = "pending"  # pending / running / done
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def fraction(self) -> float:
+        if self.state == "done":
+            return 1.0
+        if self.state == "pending":
+            return 0.0
+        if self.expected_rows > 0:
+            frac = self.rows / self.expected_rows
+        elif self.expected_bytes > 0:
+            frac = self.bytes / self.expected_bytes
+        else:
+            frac = 0.0
+        return min(frac, RUNNING_CAP)
+
+
+def load_expectations(ep: Endpoint, dbs: Iterable[str]) -> List[TableProgress]:
+    """Expected rows/bytes per base table, one information_schema.TABLES query for all schemas."""
+    names = [d.strip() for d in dbs if d and d.strip()]
+    if not names:
+        return []
+    sql = (
+        "SELECT TABLE_SCHEMA, TABLE_NAME, COALESCE(TABLE_ROWS, 0), COALESCE(DATA_LENGTH, 0) "
+        "FROM information_schema.TABLES WHERE TABLE_TYPE='BASE TABLE' "
+        f"AND TABLE_SCHEMA IN ({', '.join(sql_quote(n) for n in names)}) "
+        "ORDER BY TABLE_SCHEMA, TABLE_NAME"
+    )
+    tables = []
+    for schema, name, rows, data_len in iter_query(ep, sql):
+        tables.append(TableProgress(
+            schema=schema or "",
+            name=name or "",
+            expected_rows=int(rows or 0),
+            expected_bytes=int(data_len or 0),
+        ))
+    return tables
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if n < 1024 or unit == "TB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{int(n)} B"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def _fmt_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+@dataclass
+class ProgressTracker:
+    """Per-table and overall progress for one data phase, flushed to progress.json."""
+
+    phase: str
+    out_path: Path
+    tables: List[TableProgress] = field(default_factory=list)
+    interval: float = 2.0
+    display: Optional[TextIO] = None
+    display_interval: float = 30.0
+    started_at: float = field(default_factory=time.time)
+    _index: Dict[Tuple[str, str], TableProgress] = field(default_factory=dict, init=False)
+    _last_flush: float = field(default=0.0, init=False)
+    _last_display: float = field(default=0.0, init=False)
+
+    def __post_init__(self) -> None:
+        self._index = {(t.schema, t.name): t for t in self.tables}
+
+    def table(self, schema: str, name: str) -> TableProgress:
+        t = self._index.get((schema, name))
+        if t is None:
+            t = TableProgress(schema=schema, name=name)
+            self.tables.append(t)
+            self._index[(schema, name)] = t
+        return t
+
+    def start(self, schema: str, name: str) -> TableProgress:
+        t = self.table(schema, name)
+        if t.state == "pending":
+            t.state = "running"
+            t.started_at = time.time()
+        return t
+
+    def finish(self, schema: str, name: str, rows: Optional[int] = None) -> None:
+        t = self.table(schema, name)
+        if t.started_at is None:
+            t.started_at = time.time()
+        if rows is not None:
+            t.rows = rows
+        t.state = "done"
+        t.finished_at = time.time()
+
+    def finish_running(self) -> None:
+        for t in self.tables:
+            if t.state == "running":
+                self.finish(t.schema, t.name)
+
+    def overall(self) -> Dict[str, Any]:
+        # Weight by expected size; tables without an estimate still count a little.
+        weights = [max(t.expected_bytes, 1) for t in self.tables]
+        total = sum(weights) or 1
+        frac = sum(w * t.fraction() for w, t in zip(weights, self.tables)) / total
+        elapsed = time.time() - self.started_at
+        eta = elapsed * (1 - frac) / frac if frac >= 0.005 else None
+        return {
+            "percent": round(frac * 100, 2),
+            "elapsed_s": round(elapsed, 1),
+            "eta_s": round(eta, 1) if eta is not None else None,
+            "tables_total": len(self.tables),
+            "tables_done": sum(1 for t in self.tables if t.state == "done"),
+            "rows": sum(t.rows for t in self.tables),
+            "expected_rows": sum(t.expected_rows for t in self.tables),
+            "bytes": sum(t.bytes for t in self.tables),
+            "expected_bytes": sum(t.expected_bytes for t in self.tables),
+        }
+
+    def snapshot(self, finished: bool = False) -> Dict[str, Any]:
+        schemas: Dict[str, Dict[str, Any]] = {}
+        for t in self.tables:
+            s = schemas.setdefault(t.schema, {"tables": 0, "done": 0, "expected_bytes": 0, "expected_rows": 0, "rows": 0})
+            s["tables"] += 1
+            s["done"] += 1 if t.state == "done" else 0
+            s["expected_bytes"] += t.expected_bytes
+            s["expected_rows"] += t.expected_rows
+            s["rows"] += t.rows
+        return {
+            "phase": self.phase,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "finished": finished,
+            "overall": self.overall(),
+            "schemas": schemas,
+            "tables": [
+                {
+                    "schema": t.schema,
+                    "table": t.name,
+                    "state": t.state,
+                    "percent": round(t.fraction() * 100, 2),
+                    "rows": t.rows,
+                    "expected_rows": t.expected_rows,
+                    "bytes": t.bytes,
+                    "expected_bytes": t.expected_bytes,
+                    "duration_s": round((t.finished_at or time.time()) - t.started_at, 1) if t.started_at else None,
+                }
+                for t in self.tables
+            ],
+        }
+
+    def flush(self, force: bool = False, finished: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last_flush < self.interval:
+            return
+        self._last_flush = now
+        data = self.snapshot(finished=finished)
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.out_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, self.out_path)
+        if self.display is not None and (force or now - self._last_display >= self.display_interval):
+            self._last_display = now
+            self.display.write(summary_line(data) + "\n")
+            self.display.flush()
+
+
+def summary_line(data: Dict[str, Any]) -> str:
+    o = data["overall"]
+    running = [f"{t['schema']}.{t['table']} {t['percent']:.0f}%" for t in data["tables"] if t["state"] == "running"]
+    line = (
+        f"PROGRESS {data['phase']}: {o['percent']:.1f}% "
+        f"tables {o['tables_done']}/{o['tables_total']} rows {o['rows']}/{o['expected_rows']} "
+        f"elapsed {_fmt_duration(o['elapsed_s'])} ETA {_fmt_duration(o['eta_s'])}"
+    )
+    if running:
+        line += " | " + ", ".join(running[:4]) + (" ..." if len(running) > 4 else "")
+    return line
+
+
+def render(data: Dict[str, Any], limit: int = 20) -> List[str]:
+    """Terminal view of a progress.json snapshot: summary plus running/recent tables."""
+    lines = [summary_line(data)]
+    order = {"running": 0, "pending": 1, "done": 2}
+    tables = sorted(data["tables"], key=lambda t: (order.get(t["state"], 3), -t["expected_bytes"]))
+    lines.append(f"{'TABLE':<48} {'STATE':<8} {'PCT':>6} {'ROWS':>14} {'EXPECTED':>14} {'SIZE':>10}")
+    for t in tables[:limit]:
+        bar = "#" * int(t["percent"] // 10)
+        lines.append(
+            f"{(t['schema'] + '.' + t['table'])[:48]:<48} {t['state']:<8} {t['percent']:>5.1f}% "
+            f"{t['rows']:>14} {t['expected_rows']:>14} {_fmt_bytes(t['expected_bytes']):>10} {bar}"
+        )
+    if len(tables) > limit:
+        lines.append(f"... {len(tables) - limit} more tables")
+    return lines
+
+
+def _unquote(raw: bytes) -> str:
+    return raw.decode("utf-8", "replace").replace("``", "`")
+
+
+def follow_dump(stream: BinaryIO, sink: BinaryIO, tracker: ProgressTracker) -> int:
+    """Pass a mysqldump/mariadb-dump stream through unchanged while tracking table progress.
+
+    Table boundaries come from the dump's comment markers; rows are counted from the
+    extended INSERT tuples. Returns the number of bytes passed through.
+    """
+    total = 0
+    schema = ""
+    current: Optional[TableProgress] = None
+    for line in stream:
+        sink.write(line)
+        total += len(line)
+        try:
+            if line.startswith(b"INSERT INTO "):
+                if current is not None:
+                    current.rows += line.count(b"),(") + 1
+                    current.bytes += len(line)
+            elif line.startswith(b"--") or line.startswith(b"USE "):
+                m = _DUMP_DATA.match(line)
+                if m:
+                    if current is not None:
+                        tracker.finish(current.schema, current.name)
+                    current = tracker.start(schema, _unquote(m.group(1)))
+                elif _DUMP_END_DATA.match(line):
+                    if current is not None:
+                        tracker.finish(current.schema, current.name)
+                        current = None
+                else:
+                    m = _DUMP_DB.match(line)
+                    if m:
+                        schema = _unquote(m.group(1))
+            tracker.flush()
+        except (OSError, ValueError):
+            # Progress is best-effort; never break the data stream.
+            pass
+    sink.flush()
+    if current is not None:
+        tracker.finish(current.schema, current.name)
+    return total
+
+
+def follow_sqldata(stream: TextIO, sink: TextIO, tracker: ProgressTracker) -> None:
+    """Pass sqldata output through while tracking its per-table events."""
+    last_done: Optional[TableProgress] = None
+    for line in stream:
+        sink.write(line)
+        sink.flush()
+        try:
+            m = _SQLDATA_EVENT.match(line)
+            if m:
+                schema, name, action = m.group(1), m.group(2), m.group(3)
+                t = tracker.table(schema, name)
+                if action.startswith("Started"):
+                    tracker.start(schema, name)
+                elif action.startswith("Data transfer complete"):
+                    tracker.finish(schema, name)
+                    last_done = t
+                else:
+                    rows = _SQLDATA_ROWS.search(action)
+                    if rows and t.state == "running":
+                        t.rows = max(t.rows, int(rows.group(1)))
+            else:
+                w = _SQLDATA_WRITTEN.match(line)
+                if w and last_done is not None:
+                    last_done.rows = int(w.group(1))
+                    last_done = None
+            tracker.flush()
+        except (OSError, ValueError):
+            pass
+
+
+def tracker_from_env(phase: str, env: Mapping[str, str], out_dir: Path, log: TextIO = sys.stderr) -> ProgressTracker:
+    """Build a tracker for SRC_DB/SRC_DBS, loading expectations from the source when reachable."""
+    dbs = [d for d in (env.get("SRC_DBS") or env.get("SRC_DB") or "").split(",") if d.strip()]
+    tables: List[TableProgress] = []
+    try:
+        tables = load_expectations(endpoint_from_env(env, "SRC"), dbs)
+    except (RuntimeError, ValueError) as exc:
+        log.write(f"WARN: progress expectations unavailable ({exc}); tracking without totals\n")
+    interval = float(env.get("PROGRESS_INTERVAL") or 2)
+    display_interval = 1.0 if log.isatty() else float(env.get("PROGRESS_LOG_INTERVAL") or 30)
+    return ProgressTracker(
+        phase=phase,
+        out_path=out_dir / PROGRESS_FILE,
+        tables=tables,
+        interval=interval,
+        display=log,
+        display_interval=display_interval,
+    )
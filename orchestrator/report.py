@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import json
+import sqlite3
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 
+from .artifacts import ArtifactStore
+from .history import RunHistory
+
 class GateStatus(str, Enum):
     PASS = "PASS"
     FAIL = "FAIL"
@@ -33,6 +37,10 @@ class Report:
     report_path: Path
     log_path: Path
     _data: Dict[str, Any] = field(default_factory=dict)
+    # When set, run.log/report.json (and anything passed to archive()) are kept in the store.
+    store: Optional[ArtifactStore] = None
+    # When set, finish_run() indexes the run for `migrationctl history`.
+    history: Optional[RunHistory] = None
 
     def start_run(self, mode: str, config_path: str) -> None:
         self._data = {
@@ -50,13 +58,33 @@ class Report:
             "warnings": [],
             "inventory": {},
             "plan": {},
-            "steps": []
+            "steps": [],
+            "artifacts": []
         }
         self.report_path.parent.mkdir(parents=True, exist_ok=True)
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
         self.log(f"START mode={mode} config={config_path}")
+        if self.store is not None:
+            self.store.register_run(self.run_id, mode)
         self._flush()
 
+    @property
+    def run_id(self) -> str:
+        return self._data.get("run_id", "")
+
+    def archive(self, name: str, path: Path) -> None:
+        """Copy a file into the artifact store under this run (no-op without a store)."""
+        if self.store is None or not path.exists():
+            return
+        try:
+            meta = self.store.put_file(self.run_id, name, path)
+        except (OSError, RuntimeError) as exc:
+            self.log(f"WARN: archiving {name} failed: {exc}")
+            return
+        self._data.setdefault("artifacts", [])
+        self._data["artifacts"] = [a for a in self._data["artifacts"] if a["name"] != name]
+        self._data["artifacts"].append({k: meta[k] for k in ("name", "digest", "size", "stored_size")})
+
     def log(self, msg: str) -> None:
         ts = datetime.now(timezone.utc).isoformat()
         line = f"{ts} {msg}\n"
@@ -71,7 +99,14 @@ class Report:
         self._data["success"] = success
         self._data["message"] = message
         self.log(f"FINISH success={success} message={message}")
+        self.archive("run.log", self.log_path)
         self._flush()
+        self.archive("report.json", self.report_path)
+        if self.history is not None:
+            try:
+                self.history.index_report(self._data, self.report_path)
+            except (OSError, sqlite3.Error) as exc:
+                self.log(f"WARN: indexing run history failed: {exc}")
 
     def set_source(self, source: Dict[str, Any]) -> None:
         self._data["source"] = source
@@ -97,6 +132,26 @@ class Report:
         self._data["plan"] = plan
         self._flush()
 
+    def set_throttle(self, throttle: Dict[str, Any]) -> None:
+        self._data["throttle"] = throttle
+        self._flush()
+
+    def set_schema_diff(self, diff: Dict[str, Any]) -> None:
+        self._data["schema_diff"] = diff
+        self._flush()
+
+    def set_config_advice(self, advice: Dict[str, Any]) -> None:
+        self._data["config_advice"] = advice
+        self._flush()
+
+    def set_perfcheck(self, perf: Dict[str, Any], warnings: List[WarningItem]) -> None:
+        """Store the perfcheck summary and replace the warnings an earlier perfcheck added."""
+        previous = set((self._data.get("perfcheck") or {}).get("warnings", []))
+        kept = [w for w in self._data.get("warnings", []) if w["name"] not in previous]
+        self._data["warnings"] = kept + [{"name": w.name, "severity": w.severity, "details": w.details} for w in warnings]
+        self._data["perfcheck"] = {**perf, "warnings": [w.name for w in warnings]}
+        self._flush()
+
     def add_step(self, step_id: str, name: str, status: StepStatus, details: Optional[Dict[str, Any]] = None) -> None:
         self._data["steps"].append({
             "id": step_id,
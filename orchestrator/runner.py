@@ -3,6 +3,8 @@ from __future__ import annotations
 import os
 import shlex
 import subprocess
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Callable, Dict, List, Tuple, Any, Optional
 
@@ -40,6 +42,8 @@ def run_step(
     if log:
         log("CMD " + " ".join(shlex.quote(c) for c in cmd))
 
+    started_at = datetime.now(timezone.utc).isoformat()
+    t0 = time.monotonic()
     p = subprocess.Popen(
         cmd,
         cwd=str(repo_root),
@@ -63,6 +67,8 @@ def run_step(
         "script": script,
         "args": args,
         "returncode": rc,
+        "started_at": started_at,
+        "duration_s": round(time.monotonic() - t0, 1),
         "output_tail": out_lines[-50:],  # keep last 50 lines for report
     }
     return (rc == 0), meta
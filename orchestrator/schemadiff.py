@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .dbclient import Endpoint, iter_query, query_value, sql_quote
+
+SCHEMA_DIFF_REPORT = "schema_diff.json"
+SCHEMA_DIFF_TSV = "schema_diff.tsv"
+KINDS = ("table", "column", "index", "foreign_key", "check", "view", "routine", "trigger", "event")
+
+# MySQL 8 collations and what a MariaDB target may legitimately carry instead.
+COLLATION_EQUIVALENTS: Dict[str, Set[str]] = {
+    "utf8mb4_0900_ai_ci": {"utf8mb4_uca1400_ai_ci", "utf8mb4_unicode_520_ci", "utf8mb4_unicode_ci", "utf8mb4_general_ci"},
+    "utf8mb4_0900_as_ci": {"utf8mb4_uca1400_as_ci", "utf8mb4_unicode_520_ci", "utf8mb4_unicode_ci"},
+    "utf8mb4_0900_as_cs": {"utf8mb4_uca1400_as_cs", "utf8mb4_bin"},
+    "utf8mb4_0900_bin": {"utf8mb4_bin", "utf8mb4_nopad_bin"},
+}
+
+_INT_WIDTH = re.compile(r"^(tinyint|smallint|mediumint|int|integer|bigint|year)\(\d+\)")
+_INTRODUCER = re.compile(r"_(?:utf8mb4|utf8mb3|utf8|latin1|binary|ascii)(?=')")
+_SPACE = re.compile(r"\s+")
+_JSON_VALID = re.compile(r"^json_valid\((\w+)\)$")
+
+Key = Tuple[str, str, str, str]  # kind, schema, table, name
+
+
+@dataclass
+class SchemaObject:
+    kind: str
+    schema: str
+    table: str
+    name: str
+    fields: Dict[str, Any] = field(default_factory=dict)
+    digest: str = ""
+
+    def key(self) -> Key:
+        return (self.kind, self.schema, self.table, self.name)
+
+    def label(self) -> str:
+        parts = [self.schema, self.table, self.name] if self.table else [self.schema, self.name]
+        return ".".join(p for p in parts if p)
+
+
+def _collation(value: Optional[str]) -> str:
+    v = (value or "").lower()
+    return "utf8mb3_" + v[5:] if v.startswith("utf8_") else v
+
+
+def _expr(value: Optional[str]) -> str:
+    """Bodies/expressions compared after dropping quoting, introducers and layout."""
+    v = (value or "").replace("`", "")
+    v = _INTRODUCER.sub("", v)
+    v = v.replace("current_timestamp()", "current_timestamp").replace("CURRENT_TIMESTAMP()", "CURRENT_TIMESTAMP")
+    return _SPACE.sub(" ", v).strip().lower()
+
+
+def _clause(value: Optional[str]) -> str:
+    # MySQL wraps check clauses and generated expressions in parentheses; MariaDB does not.
+    v = _expr(value)
+    while v.startswith("(") and v.endswith(")") and _balanced(v[1:-1]):
+        v = v[1:-1].strip()
+    return v
+
+
+def _balanced(v: str) -> bool:
+    depth = 0
+    for ch in v:
+        depth += 1 if ch == "(" else -1 if ch == ")" else 0
+        if depth < 0:
+            return False
+    return depth == 0
+
+
+def _default(value: Optional[str], mariadb: bool) -> Optional[str]:
+    # MariaDB quotes literal defaults and reports NULL as the string NULL.
+    if value is None:
+        return None
+    if mariadb:
+        if value == "NULL":
+            return None
+        if len(value) >= 2 and value[0] == "'" and value[-1] == "'":
+            return value[1:-1].replace("''", "'")
+    if value.lower().startswith("current_timestamp"):
+        return _expr(value)
+    return value
+
+
+def _extra(value: Optional[str]) -> str:
+    v = _expr(value).replace("default_generated", "")
+    return _SPACE.sub(" ", v).strip()
+
+
+def _column_type(value: Optional[str]) -> str:
+    return _INT_WIDTH.sub(r"\1", (value or "").lower())
+
+
+@dataclass
+class _Source:
+    """Bulk queries for one server; each returns every object of a kind in one round trip."""
+
+    ep: Endpoint
+    schemas: Sequence[str]
+    kinds: Sequence[str]
+    version: str = ""
+    mariadb: bool = False
+    objects: Dict[Key, SchemaObject] = field(default_factory=dict)
+    skipped: Dict[str, str] = field(default_factory=dict)
+    error: str = ""
+    elapsed: float = 0.0
+
+    def _in(self, col: str) -> str:
+        return f"{col} IN ({', '.join(sql_quote(s) for s in self.schemas)})"
+
+    def _add(self, kind: str, schema: str, table: str, name: str, **fields: Any) -> None:
+        key = (kind, schema, table, name)
+        obj = self.objects.get(key)
+        if obj is None:
+            self.objects[key] = SchemaObject(kind, schema, table, name, dict(fields))
+        else:
+            # Multi-row objects (index/FK columns) accumulate their parts in order.
+            for k, v in fields.items():
+                obj.fields.setdefault(k, [])
+                obj.fields[k] = list(obj.fields[k]) + list(v)
+
+    def _rows(self, kind: str, sql: str) -> List[List[Optional[str]]]:
+        try:
+            return list(iter_query(self.ep, sql))
+        except RuntimeError as exc:
+            self.skipped[kind] = str(exc)
+            return []
+
+    def load(self) -> None:
+        t0 = time.time()
+        try:
+            self.version = query_value(self.ep, "SELECT VERSION()") or ""
+            self.mariadb = "mariadb" in self.version.lower()
+            self._load()
+        except RuntimeError as exc:
+            self.error = str(exc)
+        self.elapsed = time.time() - t0
+
+    def _load(self) -> None:
+        base: Set[Tuple[str, str]] = set()
+        for schema, name, ttype, engine, coll in self._rows("table", (
+            "SELECT TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE, ENGINE, TABLE_COLLATION FROM information_schema.TABLES "
+            f"WHERE {self._in('TABLE_SCHEMA')}"
+        )):
+            if ttype != "BASE TABLE":
+                continue
+            base.add((schema or "", name or ""))
+            if "table" in self.kinds:
+                self._add("table", schema or "", "", name or "", engine=(engine or "").lower(), collation=_collation(coll))
+
+        if "column" in self.kinds:
+            prev: Tuple[str, str, str] = ("", "", "")
+            for schema, table, col, ctype, nullable, default, extra, coll, gen in self._rows("column", (
+                "SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, "
+                "COLUMN_DEFAULT, EXTRA, COLLATION_NAME, GENERATION_EXPRESSION FROM information_schema.COLUMNS "
+                f"WHERE {self._in('TABLE_SCHEMA')} ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION"
+            )):
+                if (schema or "", table or "") not in base:
+                    continue
+                # Position as "after <column>" so one missing column does not flag every later one.
+                after = prev[2] if prev[:2] == (schema, table) else ""
+                prev = (schema or "", table or "", col or "")
+                self._add(
+                    "column", schema or "", table or "", col or "",
+                    after=after, type=_column_type(ctype), nullable=nullable == "YES",
+                    default=_default(default, self.mariadb), extra=_extra(extra),
+                    collation=_collation(coll), generated=_clause(gen),
+                )
+
+        if "index" in self.kinds:
+            for schema, table, index, non_unique, _seq, col, sub_part, itype in self._rows("index", (
+                "SELECT TABLE_SCHEMA, TABLE_NAME, INDEX_NAME, NON_UNIQUE, SEQ_IN_INDEX, COLUMN_NAME, SUB_PART, INDEX_TYPE "
+                f"FROM information_schema.STATISTICS WHERE {self._in('TABLE_SCHEMA')} "
+                "ORDER BY TABLE_SCHEMA, TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX"
+            )):
+                part = f"{col or '(expression)'}({sub_part})" if sub_part else (col or "(expression)")
+                self._add(
+                    "index", schema or "", table or "", index or "",
+                    unique=[non_unique == "0"], type=[(itype or "").upper()], columns=[part],
+                )
+            # Collapse the per-column repeats of the index-level attributes.
+            for obj in self.objects.values():
+                if obj.kind == "index":
+                    obj.fields["unique"] = bool(obj.fields["unique"][0])
+                    obj.fields["type"] = obj.fields["type"][0]
+
+        if "foreign_key" in self.kinds:
+            for schema, table, name, col, ref_schema, ref_table, ref_col, upd, dele in self._rows("foreign_key", (
+                "SELECT k.CONSTRAINT_SCHEMA, k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME, k.REFERENCED_TABLE_SCHEMA, "
+                "k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME, r.UPDATE_RULE, r.DELETE_RULE "
+                "FROM information_schema.KEY_COLUMN_USAGE k JOIN information_schema.REFERENTIAL_CONSTRAINTS r "
+                "ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME "
+                "AND r.TABLE_NAME = k.TABLE_NAME "
+                f"WHERE k.REFERENCED_TABLE_NAME IS NOT NULL AND {self._in('k.CONSTRAINT_SCHEMA')} "
+                "ORDER BY k.CONSTRAINT_SCHEMA, k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION"
+            )):
+                self._add(
+                    "foreign_key", schema or "", table or "", name or "",
+                    columns=[col or ""], references=[f"{ref_schema}.{ref_table}.{ref_col}"],
+                    rules=[f"{(upd or '').upper()}/{(dele or '').upper()}"],
+                )
+            for obj in self.objects.values():
+                if obj.kind == "foreign_key":
+                    obj.fields["rules"] = obj.fields["rules"][0]
+
+        if "check" in self.kinds:
+            if self.mariadb:
+                sql = (
+                    "SELECT CONSTRAINT_SCHEMA, TABLE_NAME, CONSTRAINT_NAME, CHECK_CLAUSE FROM information_schema.CHECK_CONSTRAINTS "
+                    f"WHERE {self._in('CONSTRAINT_SCHEMA')}"
+                )
+            else:
+                # MySQL's CHECK_CONSTRAINTS has no table name; names are unique per schema there.
+                sql = (
+                    "SELECT tc.TABLE_SCHEMA, tc.TABLE_NAME, tc.CONSTRAINT_NAME, cc.CHECK_CLAUSE "
+                    "FROM information_schema.TABLE_CONSTRAINTS tc JOIN information_schema.CHECK_CONSTRAINTS cc "
+                    "ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME "
+                    f"WHERE tc.CONSTRAINT_TYPE = 'CHECK' AND {self._in('tc.TABLE_SCHEMA')}"
+                )
+            for schema, table, name, clause in self._rows("check", sql):
+                self._add("check", schema or "", table or "", name or "", clause=_clause(clause))
+
+        if "view" in self.kinds:
+            for schema, name, definition, check_option, security in self._rows("view", (
+                "SELECT TABLE_SCHEMA, TABLE_NAME, VIEW_DEFINITION, CHECK_OPTION, SECURITY_TYPE FROM information_schema.VIEWS "
+                f"WHERE {self._in('TABLE_SCHEMA')}"
+            )):
+                self._add(
+                    "view", schema or "", "", name or "",
+                    definition=_expr(definition), check_option=(check_option or "").upper(), security=(security or "").upper(),
+                )
+
+        if "routine" in self.kinds:
+            for schema, name, rtype, returns, body, deterministic, access, security in self._rows("routine", (
+                "SELECT ROUTINE_SCHEMA, ROUTINE_NAME, ROUTINE_TYPE, DTD_IDENTIFIER, ROUTINE_DEFINITION, IS_DETERMINISTIC, "
+                f"SQL_DATA_ACCESS, SECURITY_TYPE FROM information_schema.ROUTINES WHERE {self._in('ROUTINE_SCHEMA')}"
+            )):
+                self._add(
+                    "routine", schema or "", (rtype or "").lower(), name or "",
+                    returns=_column_type(returns), body=_expr(body), deterministic=deterministic == "YES",
+                    data_access=(access or "").upper(), security=(security or "").upper(),
+                )
+
+        if "trigger" in self.kinds:
+            for schema, table, name, event, timing, body in self._rows("trigger", (
+                "SELECT TRIGGER_SCHEMA, EVENT_OBJECT_TABLE, TRIGGER_NAME, EVENT_MANIPULATION, ACTION_TIMING, ACTION_STATEMENT "
+                f"FROM information_schema.TRIGGERS WHERE {self._in('TRIGGER_SCHEMA')}"
+            )):
+                self._add(
+                    "trigger", schema or "", table or "", name or "",
+                    event=(event or "").upper(), timing=(timing or "").upper(), body=_expr(body),
+                )
+
+        if "event" in self.kinds:
+            # STATUS is left out: events are commonly disabled on a target until cutover.
+            for schema, name, etype, interval, unit, body in self._rows("event", (
+                "SELECT EVENT_SCHEMA, EVENT_NAME, EVENT_TYPE, INTERVAL_VALUE, INTERVAL_FIELD, EVENT_DEFINITION "
+                f"FROM information_schema.EVENTS WHERE {self._in('EVENT_SCHEMA')}"
+            )):
+                self._add(
+                    "event", schema or "", "", name or "",
+                    type=(etype or "").upper(), interval=f"{interval or ''} {(unit or '').upper()}".strip(), body=_expr(body),
+                )
+
+        for obj in self.objects.values():
+            obj.digest = hashlib.sha1(json.dumps(obj.fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _excused(obj: SchemaObject, src: Dict[str, Any], tgt: Dict[str, Any], field_name: str) -> Optional[str]:
+    """Known MySQL -> MariaDB rewrites; returns the normalisation applied, or None."""
+    s, t = src.get(field_name), tgt.get(field_name)
+    if field_name == "collation" and s in COLLATION_EQUIVALENTS and t in COLLATION_EQUIVALENTS[s]:
+        return f"collation {s} -> {t}"
+    if obj.kind == "column" and src.get("type") == "json":
+        if field_name == "type" and t == "longtext":
+            return "json -> longtext"
+        if field_name == "collation":
+            return "json -> longtext"
+    return None
+
+
+def diff_objects(
+    src: Dict[Key, SchemaObject],
+    tgt: Dict[Key, SchemaObject],
+) -> Dict[str, Any]:
+    missing: List[SchemaObject] = []
+    extra: List[SchemaObject] = []
+    differing: List[Dict[str, Any]] = []
+    normalised: Dict[str, int] = {}
+    matched = 0
+
+    json_columns = {(o.schema, o.table, o.name) for o in src.values() if o.kind == "column" and o.fields.get("type") == "json"}
+
+    for key, s in src.items():
+        t = tgt.get(key)
+        if t is None:
+            missing.append(s)
+            continue
+        if s.digest == t.digest:
+            matched += 1
+            continue
+        fields = sorted(set(s.fields) | set(t.fields))
+        diffs = {}
+        notes = []
+        for f in fields:
+            if s.fields.get(f) == t.fields.get(f):
+                continue
+            note = _excused(s, s.fields, t.fields, f)
+            if note:
+                notes.append(note)
+            else:
+                diffs[f] = {"source": s.fields.get(f), "target": t.fields.get(f)}
+        if diffs:
+            differing.append({"kind": s.kind, "object": s.label(), "fields": diffs})
+        else:
+            matched += 1
+            for n in set(notes):
+                normalised[n] = normalised.get(n, 0) + 1
+    for key, t in tgt.items():
+        if key in src:
+            continue
+        if t.kind == "check":
+            # MariaDB stores JSON as LONGTEXT with an implicit json_valid() check.
+            m = _JSON_VALID.match(t.fields.get("clause", ""))
+            if m and (t.schema, t.table, m.group(1)) in json_columns:
+                normalised["json_valid check"] = normalised.get("json_valid check", 0) + 1
+                continue
+        extra.append(t)
+
+    def by_kind(items: List[Any], kind_of: Callable[[Any], str]) -> Dict[str, int]:
+        out: Dict[str, int] = {}
+        for i in items:
+            out[kind_of(i)] = out.get(kind_of(i), 0) + 1
+        return out
+
+    return {
+        "ok": not missing and not extra and not differing,
+        "objects_source": len(src),
+        "objects_target": len(tgt),
+        "matched": matched,
+        "missing": [{"kind": o.kind, "object": o.label()} for o in missing],
+        "extra": [{"kind": o.kind, "object": o.label()} for o in extra],
+        "differing": differing,
+        "by_kind": {
+            "missing": by_kind(missing, lambda o: o.kind),
+            "extra": by_kind(extra, lambda o: o.kind),
+            "differing": by_kind(differing, lambda d: d["kind"]),
+        },
+        "normalised": normalised,
+    }
+
+
+def schema_diff(
+    src: Endpoint,
+    tgt: Endpoint,
+    schemas: Sequence[str],
+    kinds: Sequence[str] = KINDS,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Compare schema objects of both servers; both are read concurrently in a few bulk queries."""
+    log = log or (lambda _msg: None)
+    names = [s.strip() for s in schemas if s and s.strip()]
+    if not names:
+        raise ValueError("no schemas to compare")
+    sides = [_Source(src, names, kinds), _Source(tgt, names, kinds)]
+    threads = [threading.Thread(target=s.load, daemon=True) for s in sides]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for side, s in zip(("source", "target"), sides):
+        if s.error:
+            raise RuntimeError(f"{side} {s.ep.label()}: {s.error}")
+        log(f"SCHEMA-DIFF {side} {s.ep.label()} ({s.version}): {len(s.objects)} objects in {s.elapsed:.1f}s")
+        for kind, err in s.skipped.items():
+            log(f"SCHEMA-DIFF {side}: {kind} not compared ({err})")
+    result = diff_objects(sides[0].objects, sides[1].objects)
+    result.update({
+        "schemas": names,
+        "kinds": list(kinds),
+        "source": {"endpoint": src.label(), "version": sides[0].version, "skipped": sides[0].skipped},
+        "target": {"endpoint": tgt.label(), "version": sides[1].version, "skipped": sides[1].skipped},
+    })
+    return result
+
+
+def write_diff(result: Dict[str, Any], out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / SCHEMA_DIFF_REPORT
+    path.write_text(json.dumps(result, indent=2, default=str), encoding="utf-8")
+    with (out_dir / SCHEMA_DIFF_TSV).open("w", encoding="utf-8") as f:
+        f.write("status\tkind\tobject\tdetail\n")
+        for m in result["missing"]:
+            f.write(f"MISSING\t{m['kind']}\t{m['object']}\t\n")
+        for e in result["extra"]:
+            f.write(f"EXTRA\t{e['kind']}\t{e['object']}\t\n")
+        for d in result["differing"]:
+            detail = "; ".join(f"{k}: {v['source']!r} -> {v['target']!r}" for k, v in d["fields"].items())
+            f.write(f"DIFFERS\t{d['kind']}\t{d['object']}\t{detail.replace(chr(9), ' ')}\n")
+    return path
+
+
+def summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form for report.json."""
+    return {
+        "ok": result["ok"],
+        "matched": result["matched"],
+        "missing": len(result["missing"]),
+        "extra": len(result["extra"]),
+        "differing": len(result["differing"]),
+        "by_kind": result["by_kind"],
+        "normalised": result["normalised"],
+    }
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import base64
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .dbclient import Endpoint, query, query_value, run_script, sql_ident, sql_quote
+
+STATS_REPORT = "post_load_stats.json"
+# mysql.column_stats.hist_size is a TINYINT UNSIGNED.
+MAX_BUCKETS = 255
+_PLAIN_TYPES = ("int", "double", "decimal", "date", "datetime", "time")
+_BASE64 = re.compile(r"^base64:type\d+:(.*)$", re.S)
+
+
+@dataclass
+class TableStats:
+    schema: str
+    name: str
+    size_bytes: int = 0
+    rows: int = 0
+    # Column -> MySQL histogram JSON from the source.
+    histograms: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    converted: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    rebuild: List[str] = field(default_factory=list)
+    skipped: Dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+    error: str = ""
+
+
+def _value(raw: Any, data_type: str) -> str:
+    if data_type == "string":
+        m = _BASE64.match(str(raw))
+        if not m:
+            raise ValueError("unexpected string encoding")
+        try:
+            return base64.b64decode(m.group(1)).decode("utf-8")
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("binary string values")
+    if data_type in _PLAIN_TYPES:
+        return str(raw)
+    raise ValueError(f"data-type {data_type} has no MariaDB equivalent")
+
+
+def _merge(buckets: List[List[Any]], limit: int) -> List[List[Any]]:
+    """Fold [start, end, size, ndv] buckets into at most `limit` contiguous groups."""
+    if len(buckets) <= limit:
+        return buckets
+    out = []
+    per = len(buckets) / limit
+    for g in range(limit):
+        part = buckets[int(round(g * per)):int(round((g + 1) * per))]
+        if part:
+            out.append([part[0][0], part[-1][1], sum(b[2] for b in part), sum(b[3] for b in part)])
+    return out
+
+
+def convert_histogram(hist: Dict[str, Any], rows: int, collected_by: str = "MySQL") -> Dict[str, Any]:
+    """MySQL 8 COLUMN_STATISTICS JSON -> a MariaDB mysql.column_stats row (JSON_HB).
+
+    MySQL bucket frequencies are cumulative over all rows; JSON_HB bucket sizes
+    are fractions of the non-NULL rows, with NULLs in nulls_ratio. Raises
+    ValueError when the column cannot be represented.
+    """
+    data_type = str(hist.get("data-type", ""))
+    kind = str(hist.get("histogram-type", ""))
+    raw = hist.get("buckets") or []
+    if not raw:
+        raise ValueError("empty histogram")
+    nulls = float(hist.get("null-values") or 0.0)
+    non_null = max(1e-9, 1.0 - nulls)
+    buckets: List[List[Any]] = []
+    prev = 0.0
+    for b in raw:
+        if kind == "singleton":
+            start = end = _value(b[0], data_type)
+            cum, ndv = float(b[1]), 1
+        elif kind == "equi-height":
+            start, end = _value(b[0], data_type), _value(b[1], data_type)
+            cum, ndv = float(b[2]), max(1, int(b[3]))
+        else:
+            raise ValueError(f"histogram-type {kind!r}")
+        buckets.append([start, end, max(0.0, cum - prev) / non_null, ndv])
+        prev = cum
+    buckets = _merge(buckets, MAX_BUCKETS)
+    hb = [{"start": b[0], "size": round(b[2], 6), "ndv": b[3]} for b in buckets]
+    hb[-1]["end"] = buckets[-1][1]
+    ndv_total = sum(b[3] for b in buckets)
+    return {
+        "min_value": buckets[0][0],
+        "max_value": buckets[-1][1],
+        "nulls_ratio": round(nulls, 4),
+        "avg_frequency": round(max(1.0, rows * non_null / ndv_total), 4) if rows else None,
+        "hist_size": len(hb),
+        "histogram": json.dumps({
+            "target_histogram_size": len(hb),
+            "collected_at": str(hist.get("last-updated", "")),
+            "collected_by": collected_by,
+            "histogram_hb": hb,
+        }, ensure_ascii=False),
+    }
+
+
+def _json_hb_supported(tgt: Endpoint) -> bool:
+    """JSON_HB histograms exist from MariaDB 10.8."""
+    version = query_value(tgt, "SELECT VERSION()") or ""
+    m = re.match(r"(\d+)\.(\d+)", version)
+    return bool(m) and (int(m.group(1)), int(m.group(2))) >= (10, 8)
+
+
+def source_histograms(src: Endpoint, schemas: Sequence[str], log: Callable[[str], None]) -> List[List[Optional[str]]]:
+    """MySQL 8.0 histograms (schema, table, column, JSON) for the given schemas; empty when unavailable."""
+    names = ", ".join(sql_quote(s) for s in schemas)
+    try:
+        return query(
+            src,
+            "SELECT SCHEMA_NAME, TABLE_NAME, COLUMN_NAME, HISTOGRAM FROM information_schema.COLUMN_STATISTICS "
+            f"WHERE SCHEMA_NAME IN ({names})",
+        )
+    except RuntimeError as exc:
+        log(f"WARN: source histograms unavailable (MySQL 8.0+ only): {exc}")
+        return []
+
+
+def load_tables(
+    tgt: Endpoint,
+    schemas: Sequence[str],
+    histograms: Sequence[Sequence[Optional[str]]],
+) -> List[TableStats]:
+    """Target base tables, largest first, with the source histograms that apply to them."""
+    names = ", ".join(sql_quote(s) for s in schemas)
+    tables: Dict[Tuple[str, str], TableStats] = {}
+    for schema, name, size, rows in query(
+        tgt,
+        "SELECT TABLE_SCHEMA, TABLE_NAME, COALESCE(DATA_LENGTH, 0) + COALESCE(INDEX_LENGTH, 0), COALESCE(TABLE_ROWS, 0) "
+        f"FROM information_schema.TABLES WHERE TABLE_SCHEMA IN ({names}) AND TABLE_TYPE = 'BASE TABLE'",
+    ):
+        tables[(schema or "", name or "")] = TableStats(schema or "", name or "", int(size or 0), int(rows or 0))
+    target_columns = {
+        (r[0] or "", r[1] or "", r[2] or "")
+        for r in query(tgt, f"SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA IN ({names})")
+    }
+    for schema, table, column, histogram in histograms:
+        t = tables.get((schema or "", table or ""))
+        if t is None or (t.schema, t.name, column or "") not in target_columns:
+            continue
+        try:
+            t.histograms[column or ""] = json.loads(histogram or "{}")
+        except ValueError:
+            t.skipped[column or ""] = "unreadable histogram"
+    return sorted(tables.values(), key=lambda t: (-t.size_bytes, t.schema, t.name))
+
+
+def _column_stats_sql(t: TableStats, column: str, row: Dict[str, Any]) -> str:
+    def lit(v: Any) -> str:
+        return "NULL" if v is None else (str(v) if isinstance(v, (int, float)) else sql_quote(str(v)))
+
+    return (
+        "REPLACE INTO mysql.column_stats (db_name, table_name, column_name, min_value, max_value, "
+        "nulls_ratio, avg_length, avg_frequency, hist_size, hist_type, histogram) VALUES ("
+        f"{sql_quote(t.schema)}, {sql_quote(t.name)}, {sql_quote(column)}, {lit(row['min_value'])}, "
+        f"{lit(row['max_value'])}, {lit(row['nulls_ratio'])}, NULL, {lit(row['avg_frequency'])}, "
+        f"{row['hist_size']}, 'JSON_HB', {lit(row['histogram'])});"
+    )
+
+
+def _process(tgt: Endpoint, t: TableStats) -> None:
+    ident = f"{sql_ident(t.schema)}.{sql_ident(t.name)}"
+    sql = f"ANALYZE NO_WRITE_TO_BINLOG TABLE {ident}"
+    if t.rebuild:
+        cols = ", ".join(sql_ident(c) for c in t.rebuild)
+        sql += f" PERSISTENT FOR COLUMNS ({cols}) INDEXES ()"
+    for row in query(tgt, sql):
+        if len(row) >= 4 and (row[2] or "").lower() == "error":
+            raise RuntimeError(row[3] or "ANALYZE TABLE failed")
+    if not t.converted:
+        return
+    statements = ["SET SESSION sql_log_bin = 0;"]
+    if not t.rebuild:
+        # Histograms need the table's row count, which only a PERSISTENT ANALYZE would collect.
+        statements.append(
+            f"REPLACE INTO mysql.table_stats (db_name, table_name, cardinality) "
+            f"VALUES ({sql_quote(t.schema)}, {sql_quote(t.name)}, {t.rows});"
+        )
+    statements.extend(_column_stats_sql(t, c, row) for c, row in t.converted.items())
+    # Statistics tables are read when the table is opened; reopen it to use them.
+    statements.append(f"FLUSH NO_WRITE_TO_BINLOG TABLES {ident};")
+    cp = run_script(tgt, statements)
+    if cp.returncode != 0:
+        raise RuntimeError((cp.stderr or "").strip().replace("\n", " ")[:240])
+
+
+def _target_stats(
+    tgt: Endpoint,
+    schemas: List[str],
+    histograms: Sequence[Sequence[Optional[str]]],
+    collected_by: str,
+    threads: int,
+    scan_max_mb: int,
+    convert: bool,
+    log: Callable[[str], None],
+) -> Dict[str, Any]:
+    started = time.time()
+    tables = load_tables(tgt, schemas, histograms)
+    json_hb = convert and _json_hb_supported(tgt)
+    if convert and not json_hb:
+        log(f"WARN: {tgt.label()} has no JSON_HB histograms (MariaDB < 10.8); histograms are rebuilt by ANALYZE instead")
+    for t in tables:
+        for column, hist in t.histograms.items():
+            reason = "conversion disabled" if not convert else "target has no JSON_HB"
+            if json_hb:
+                try:
+                    t.converted[column] = convert_histogram(hist, t.rows, collected_by)
+                    continue
+                except (ValueError, KeyError, IndexError, TypeError) as exc:
+                    reason = str(exc)
+            if t.size_bytes <= scan_max_mb << 20:
+                t.rebuild.append(column)
+            else:
+                t.skipped[column] = f"{reason}; table larger than {scan_max_mb} MB for a rebuild scan"
+    log(f"STATS {tgt.label()}: {len(tables)} table(s), {sum(len(t.converted) for t in tables)} histogram(s) to convert, "
+        f"{sum(len(t.rebuild) for t in tables)} to rebuild on target")
+
+    work = list(tables)
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if not work:
+                    return
+                t = work.pop(0)
+            t0 = time.time()
+            try:
+                _process(tgt, t)
+            except RuntimeError as exc:
+                t.error = str(exc)
+                log(f"WARN: statistics for {t.schema}.{t.name} on {tgt.label()} failed: {exc}")
+            t.seconds = round(time.time() - t0, 1)
+
+    pool = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, threads))]
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    return {
+        "target": tgt.label(),
+        "tables": len(tables),
+        "failed": [f"{t.schema}.{t.name}: {t.error}" for t in tables if t.error],
+        "histograms_converted": sum(len(t.converted) for t in tables if not t.error),
+        "histograms_rebuilt": sum(len(t.rebuild) for t in tables if not t.error),
+        "histograms_skipped": {f"{t.schema}.{t.name}.{c}": r for t in tables for c, r in t.skipped.items()},
+        "duration_s": round(time.time() - started, 1),
+        "detail": [
+            {"table": f"{t.schema}.{t.name}", "size_bytes": t.size_bytes, "seconds": t.seconds,
+             "converted": sorted(t.converted), "rebuilt": t.rebuild, "error": t.error}
+            for t in tables
+        ],
+        "ok": not any(t.error for t in tables),
+    }
+
+
+def post_load_stats(
+    src: Endpoint,
+    targets: List[Endpoint],
+    schemas: Sequence[str],
+    threads: int = 4,
+    scan_max_mb: int = 2048,
+    convert: bool = True,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """ANALYZE every table on each target (largest first, bounded pool) and carry MySQL histograms over.
+
+    Eligible histograms are converted to MariaDB JSON_HB rows in mysql.column_stats,
+    which avoids a full scan per column. Other histogram columns are rebuilt with
+    ANALYZE ... PERSISTENT FOR COLUMNS when the table is at most scan_max_mb. The
+    source histograms are read once and applied to every target in turn.
+    """
+    log = log or (lambda _msg: None)
+    schemas = [s.strip() for s in schemas if s.strip()]
+    if not schemas:
+        raise ValueError("no schemas to analyze (set SRC_DBS or SRC_DB)")
+    if not targets:
+        raise ValueError("no targets to analyze (set TGT_HOST or TGT_HOSTS)")
+    started = time.time()
+    histograms = source_histograms(src, schemas, log)
+    collected_by = f"MySQL {query_value(src, 'SELECT VERSION()') or ''}".strip()
+    results = []
+    for tgt in targets:
+        try:
+            results.append(_target_stats(tgt, schemas, histograms, collected_by, threads, scan_max_mb, convert, log))
+        except RuntimeError as exc:
+            # One unreachable target must not leave the others without statistics.
+            log(f"WARN: statistics phase failed on {tgt.label()}: {exc}")
+            results.append({"target": tgt.label(), "tables": 0, "failed": [f"{tgt.label()}: {exc}"],
+                            "histograms_converted": 0, "histograms_rebuilt": 0, "histograms_skipped": {},
+                            "duration_s": 0.0, "detail": [], "ok": False})
+    return {
+        "schemas": schemas,
+        "source_histograms": len(histograms),
+        "duration_s": round(time.time() - started, 1),
+        "targets": results,
+        "ok": all(r["ok"] for r in results),
+    }
+
+
+def write_stats(result: Dict[str, Any], out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / STATS_REPORT
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .dbclient import Endpoint, iter_query, query, run_script, sql_ident, sql_quote
+
+SYSTEM_ACCOUNTS = ("mysql.infoschema", "mysql.session", "mysql.sys")
+# Password for accounts whose hash cannot be carried over (APP_USER_DEFAULT_PASSWORD overrides it).
+DEFAULT_APP_USER_PASSWORD = "Str0ngChangeMe!2026"
+
+# mysql.user / mysql.db privilege columns whose name does not map mechanically.
+_PRIV_COLUMN_NAMES = {
+    "Create_tmp_table_priv": "CREATE TEMPORARY TABLES",
+    "Lock_tables_priv": "LOCK TABLES",
+    "Repl_slave_priv": "REPLICATION SLAVE",
+    "Repl_client_priv": "REPLICATION CLIENT",
+    "Show_db_priv": "SHOW DATABASES",
+    "Show_view_priv": "SHOW VIEW",
+    "Create_view_priv": "CREATE VIEW",
+    "Create_routine_priv": "CREATE ROUTINE",
+    "Alter_routine_priv": "ALTER ROUTINE",
+    "Create_user_priv": "CREATE USER",
+    "Create_tablespace_priv": "CREATE TABLESPACE",
+}
+# MySQL-only privileges with no MariaDB counterpart (roles are covered by CREATE USER).
+_SKIPPED_PRIV_COLUMNS = {"Create_role_priv", "Drop_role_priv"}
+
+# Source plugin -> how the account is recreated on MariaDB.
+NATIVE_PLUGINS = {"mysql_native_password"}
+RESET_PLUGINS = {"caching_sha2_password", "sha256_password"}
+SOCKET_PLUGINS = {"auth_socket": "unix_socket"}
+
+
+@dataclass
+class Account:
+    user: str
+    host: str
+    plugin: str = ""
+    auth_string: str = ""
+    locked: bool = False
+    expired: bool = False
+    ssl_type: str = ""
+    ssl_cipher: str = ""
+    x509_issuer: str = ""
+    x509_subject: str = ""
+    limits: Dict[str, int] = field(default_factory=dict)
+    global_privs: List[str] = field(default_factory=list)
+    grant_option: bool = False
+
+
+@dataclass
+class UserPlan:
+    """In-memory result of the set-based extract, ready to render as one script."""
+
+    accounts: List[Account] = field(default_factory=list)
+    roles: Set[Tuple[str, str]] = field(default_factory=set)
+    db_grants: List[Tuple[str, str, str, List[str], bool]] = field(default_factory=list)
+    table_grants: List[Tuple[str, str, str, str, List[str], bool]] = field(default_factory=list)
+    column_grants: Dict[Tuple[str, str, str, str], Dict[str, List[str]]] = field(default_factory=dict)
+    routine_grants: List[Tuple[str, str, str, str, str, List[str], bool]] = field(default_factory=list)
+    role_edges: List[Tuple[str, str, str, str, bool]] = field(default_factory=list)
+    default_roles: Dict[Tuple[str, str], List[Tuple[str, str]]] = field(default_factory=dict)
+    notes: List[str] = field(default_factory=list)
+
+
+def _priv_name(column: str) -> str:
+    if column in _PRIV_COLUMN_NAMES:
+        return _PRIV_COLUMN_NAMES[column]
+    return column[: -len("_priv")].replace("_", " ").upper()
+
+
+def _set_privs(value: Optional[str]) -> Tuple[List[str], bool]:
+    """Split a SET column such as 'Select,Insert,Grant' into privileges + grant flag."""
+    privs: List[str] = []
+    grant = False
+    for p in (value or "").split(","):
+        p = p.strip()
+        if not p:
+            continue
+        if p.lower() == "grant":
+            grant = True
+            continue
+        privs.append(p.upper())
+    return privs, grant
+
+
+def _mysql_columns(ep: Endpoint) -> Dict[str, List[str]]:
+    cols: Dict[str, List[str]] = {}
+    sql = (
+        "SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA='mysql' AND TABLE_NAME IN "
+        "('user','db','tables_priv','columns_priv','procs_priv','role_edges','default_roles','global_grants') "
+        "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+    )
+    for row in iter_query(ep, sql):
+        if row[0] and row[1]:
+            cols.setdefault(row[0].lower(), []).append(row[1])
+    return cols
+
+
+def extract(ep: Endpoint, exclude_users: Iterable[str] = ()) -> UserPlan:
+    """Read accounts, roles and all privilege levels with one query per grant table."""
+    plan = UserPlan()
+    cols = _mysql_columns(ep)
+    excluded = set(SYSTEM_ACCOUNTS) | {u for u in exclude_users if u}
+
+    def keep(user: Optional[str]) -> bool:
+        return bool(user) and user not in excluded
+
+    user_cols = cols.get("user", [])
+    lower_cols = {c.lower(): c for c in user_cols}
+    priv_cols = [c for c in user_cols if c.endswith("_priv") and c not in _SKIPPED_PRIV_COLUMNS and c != "Grant_priv"]
+    optional = ["plugin", "authentication_string", "account_locked", "password_expired", "ssl_type",
+                "ssl_cipher", "x509_issuer", "x509_subject", "max_questions", "max_updates",
+                "max_connections", "max_user_connections"]
+    select = ["User", "Host"] + [lower_cols.get(c, "NULL") for c in optional]
+    select += ["Grant_priv" if "grant_priv" in lower_cols else "NULL"] + priv_cols
+    for row in iter_query(ep, f"SELECT {', '.join(select)} FROM mysql.user"):
+        user, host = row[0] or "", row[1] or ""
+        if not keep(user):
+            continue
+        (plugin, auth, locked, expired, ssl_type, ssl_cipher, issuer, subject,
+         mq, mu, mc, muc, grant) = row[2:15]
+        limits = {}
+        for key, value in (("MAX_QUERIES_PER_HOUR", mq), ("MAX_UPDATES_PER_HOUR", mu),
+                           ("MAX_CONNECTIONS_PER_HOUR", mc), ("MAX_USER_CONNECTIONS", muc)):
+            if value and value.isdigit() and int(value) > 0:
+                limits[key] = int(value)
+        privs = [_priv_name(c) for c, v in zip(priv_cols, row[15:]) if v == "Y"]
+        plan.accounts.append(Account(
+            user=user, host=host, plugin=plugin or "", auth_string=auth or "",
+            locked=locked == "Y", expired=expired == "Y", ssl_type=(ssl_type or "").upper(),
+            ssl_cipher=ssl_cipher or "", x509_issuer=issuer or "", x509_subject=subject or "",
+            limits=limits, global_privs=privs, grant_option=grant == "Y",
+        ))
+
+    if "role_edges" in cols:
+        for fh, fu, th, tu, admin in iter_query(
+            ep, "SELECT FROM_HOST, FROM_USER, TO_HOST, TO_USER, WITH_ADMIN_OPTION FROM mysql.role_edges"
+        ):
+            if not keep(fu) or not keep(tu):
+                continue
+            plan.roles.add((fu or "", fh or ""))
+            plan.role_edges.append((fu or "", fh or "", tu or "", th or "", admin == "Y"))
+    if "default_roles" in cols:
+        for h, u, rh, ru in iter_query(
+            ep, "SELECT HOST, USER, DEFAULT_ROLE_HOST, DEFAULT_ROLE_USER FROM mysql.default_roles"
+        ):
+            if keep(u) and keep(ru):
+                plan.default_roles.setdefault((u or "", h or ""), []).append((ru or "", rh or ""))
+
+    db_cols = cols.get("db", [])
+    db_priv_cols = [c for c in db_cols if c.endswith("_priv") and c not in _SKIPPED_PRIV_COLUMNS and c != "Grant_priv"]
+    if db_cols:
+        grant_col = "Grant_priv" if "Grant_priv" in db_cols else "NULL"
+        sql = f"SELECT User, Host, Db, {grant_col}, {', '.join(db_priv_cols)} FROM mysql.db"
+        for row in iter_query(ep, sql):
+            if not keep(row[0]):
+                continue
+            privs = [_priv_name(c) for c, v in zip(db_priv_cols, row[4:]) if v == "Y"]
+            if privs or row[3] == "Y":
+                plan.db_grants.append((row[0] or "", row[1] or "", row[2] or "", privs, row[3] == "Y"))
+
+    if "tables_priv" in cols:
+        for u, h, db, t, tp in iter_query(ep, "SELECT User, Host, Db, Table_name, Table_priv FROM mysql.tables_priv"):
+            if not keep(u):
+                continue
+            privs, grant = _set_privs(tp)
+            if privs or grant:
+                plan.table_grants.append((u or "", h or "", db or "", t or "", privs, grant))
+
+    if "columns_priv" in cols:
+        sql = "SELECT User, Host, Db, Table_name, Column_name, Column_priv FROM mysql.columns_priv"
+        for u, h, db, t, c, cp in iter_query(ep, sql):
+            if not keep(u):
+                continue
+            privs, _ = _set_privs(cp)
+            per_priv = plan.column_grants.setdefault((u or "", h or "", db or "", t or ""), {})
+            for p in privs:
+                per_priv.setdefault(p, []).append(c or "")
+
+    if "procs_priv" in cols:
+        sql = "SELECT User, Host, Db, Routine_name, Routine_type, Proc_priv FROM mysql.procs_priv"
+        for u, h, db, r, rt, pp in iter_query(ep, sql):
+            if not keep(u):
+                continue
+            privs, grant = _set_privs(pp)
+            if privs or grant:
+                plan.routine_grants.append((u or "", h or "", db or "", r or "", (rt or "PROCEDURE").upper(), privs, grant))
+
+    if "global_grants" in cols:
+        rows = query(ep, "SELECT COUNT(*) FROM mysql.global_grants WHERE USER NOT IN ('mysql.session','mysql.sys')")
+        n = int(rows[0][0] or 0) if rows else 0
+        if n:
+            plan.notes.append(f"{n} MySQL dynamic privilege grants (mysql.global_grants) have no MariaDB equivalent; not migrated")
+
+    return plan
+
+
+def _grantee(plan: UserPlan, user: str, host: str) -> str:
+    if (user, host) in plan.roles:
+        return sql_ident(user)
+    return f"{sql_quote(user)}@{sql_quote(host)}"
+
+
+def _create_account(acc: Account, default_password: str, plan: UserPlan) -> List[str]:
+    if (acc.user, acc.host) in plan.roles:
+        return [f"CREATE ROLE IF NOT EXISTS {sql_ident(acc.user)};"]
+
+    name = f"{sql_quote(acc.user)}@{sql_quote(acc.host)}"
+    plugin = acc.plugin.lower()
+    if plugin in NATIVE_PLUGINS and acc.auth_string:
+        ident = f"IDENTIFIED BY PASSWORD {sql_quote(acc.auth_string)}"
+    elif plugin in SOCKET_PLUGINS:
+        ident = f"IDENTIFIED VIA {SOCKET_PLUGINS[plugin]}"
+    else:
+        # caching_sha2/sha256 hashes cannot be converted; recreate as mysql_native_password.
+        ident = f"IDENTIFIED BY {sql_quote(default_password)}"
+        if plugin not in RESET_PLUGINS and plugin not in NATIVE_PLUGINS:
+            plan.notes.append(f"{acc.user}@{acc.host}: plugin {acc.plugin or '(none)'} recreated with default password")
+
+    stmt = f"CREATE USER IF NOT EXISTS {name} {ident}"
+    if acc.ssl_type == "ANY":
+        stmt += " REQUIRE SSL"
+    elif acc.ssl_type == "X509":
+        stmt += " REQUIRE X509"
+    elif acc.ssl_type == "SPECIFIED":
+        req = []
+        if acc.x509_subject:
+            req.append(f"SUBJECT {sql_quote(acc.x509_subject)}")
+        if acc.x509_issuer:
+            req.append(f"ISSUER {sql_quote(acc.x509_issuer)}")
+        if acc.ssl_cipher:
+            req.append(f"CIPHER {sql_quote(acc.ssl_cipher)}")
+        stmt += " REQUIRE " + (" AND ".join(req) if req else "SSL")
+    if acc.limits:
+        stmt += " WITH " + " ".join(f"{k} {v}" for k, v in acc.limits.items())
+    if acc.expired:
+        stmt += " PASSWORD EXPIRE"
+    if acc.locked:
+        stmt += " ACCOUNT LOCK"
+    return [stmt + ";"]
+
+
+def _grant(privs: List[str], on: str, grantee: str, grant_option: bool) -> str:
+    what = ", ".join(privs) if privs else "USAGE"
+    stmt = f"GRANT {what} ON {on} TO {grantee}"
+    if grant_option:
+        stmt += " WITH GRANT OPTION"
+    return stmt + ";"
+
+
+def render_script(plan: UserPlan, default_password: str) -> List[str]:
+    """Turn the extracted plan into one ordered statement list for the target."""
+    stmts: List[str] = []
+    # Roles first so grants to/of roles resolve.
+    ordered = sorted(plan.accounts, key=lambda a: (a.user, a.host) not in plan.roles)
+    for acc in ordered:
+        stmts.extend(_create_account(acc, default_password, plan))
+    for acc in ordered:
+        if acc.global_privs or acc.grant_option:
+            stmts.append(_grant(acc.global_privs, "*.*", _grantee(plan, acc.user, acc.host), acc.grant_option))
+    for user, host, db, privs, grant in plan.db_grants:
+        on = f"{sql_ident(db)}.*"
+        stmts.append(_grant(privs, on, _grantee(plan, user, host), grant))
+    for user, host, db, table, privs, grant in plan.table_grants:
+        on = f"{sql_ident(db)}.{sql_ident(table)}"
+        stmts.append(_grant(privs, on, _grantee(plan, user, host), grant))
+    for (user, host, db, table), per_priv in sorted(plan.column_grants.items()):
+        parts = [f"{p} ({', '.join(sql_ident(c) for c in sorted(cols))})" for p, cols in sorted(per_priv.items())]
+        on = f"{sql_ident(db)}.{sql_ident(table)}"
+        stmts.append(f"GRANT {', '.join(parts)} ON {on} TO {_grantee(plan, user, host)};")
+    for user, host, db, routine, rtype, privs, grant in plan.routine_grants:
+        on = f"{rtype} {sql_ident(db)}.{sql_ident(routine)}"
+        stmts.append(_grant(privs, on, _grantee(plan, user, host), grant))
+    for role, _rh, to_user, to_host, admin in plan.role_edges:
+        stmt = f"GRANT {sql_ident(role)} TO {_grantee(plan, to_user, to_host)}"
+        if admin:
+            stmt += " WITH ADMIN OPTION"
+        stmts.append(stmt + ";")
+    for (user, host), roles in sorted(plan.default_roles.items()):
+        if (user, host) in plan.roles:
+            continue
+        # MariaDB supports a single default role per account.
+        stmts.append(f"SET DEFAULT ROLE {sql_ident(roles[0][0])} FOR {sql_quote(user)}@{sql_quote(host)};")
+        if len(roles) > 1:
+            plan.notes.append(f"{user}@{host}: {len(roles)} default roles on source; only {roles[0][0]} kept")
+    stmts.append("FLUSH PRIVILEGES;")
+    return stmts
+
+
+def migrate_users(
+    src: Endpoint,
+    tgt: Endpoint,
+    default_password: str,
+    out_dir: Path,
+    exclude_users: Iterable[str] = (),
+    dry_run: bool = False,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Extract all application accounts from the source and apply them in one target session."""
+    plan = extract(src, exclude_users=exclude_users)
+    stmts = render_script(plan, default_password)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    script_path = out_dir / "app_users.sql"
+    # Contains password hashes and the default password.
+    fd = os.open(str(script_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write("\n".join(stmts) + "\n")
+
+    reset = sorted(f"{a.user}@{a.host}" for a in plan.accounts
+                   if (a.user, a.host) not in plan.roles and a.plugin.lower() not in NATIVE_PLUGINS)
+    summary: Dict[str, Any] = {
+        "accounts": len(plan.accounts) - len(plan.roles),
+        "roles": len(plan.roles),
+        "statements": len(stmts),
+        "password_reset_accounts": reset,
+        "script": str(script_path),
+        "notes": plan.notes,
+        "errors": [],
+    }
+    if log:
+        log(f"Users: {summary['accounts']} accounts, {summary['roles']} roles, {len(stmts)} statements -> {script_path}")
+    if dry_run:
+        return summary
+
+    p = run_script(tgt, stmts, force=True)
+    errors = [ln for ln in (p.stderr or "").splitlines() if ln.startswith("ERROR")]
+    summary["errors"] = errors
+    if p.returncode != 0 and not errors:
+        summary["errors"] = [(p.stderr or "").strip()[:240] or f"client rc={p.returncode}"]
+    return summary
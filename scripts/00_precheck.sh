@@ -19,7 +19,6 @@ fi
 OUTDIR="${OUTDIR:-$ROOT/artifacts/precheck}"
 mkdir -p "$OUTDIR"
 
-CHECKS_DIR="${CHECKS_DIR:-$ROOT/sql/checks}"
 COMBINED_OUT="$OUTDIR/precheck.out"
 COMBINED_ERR="$OUTDIR/precheck.err"
 
@@ -28,7 +27,7 @@ MYSQL_OPTS=( --batch --skip-column-names --raw )
 
 echo "== Precheck runner ==" | tee "$COMBINED_OUT"
 echo "Host: $HOST  Port: $PORT  User: $USER" | tee -a "$COMBINED_OUT"
-echo "Checks dir: $CHECKS_DIR" | tee -a "$COMBINED_OUT"
+echo "Checks dir: $ROOT/sql/catalog (catalog snapshot)" | tee -a "$COMBINED_OUT"
 echo "Outdir: $OUTDIR" | tee -a "$COMBINED_OUT"
 echo "" | tee -a "$COMBINED_OUT"
 
@@ -61,60 +60,32 @@ if command -v "$CFG_BIN" >/dev/null 2>&1; then
 else
   echo "NOTE: mariadb-migrate-config-file not found; skipping config check." | tee -a "$COMBINED_OUT"
 fi
-
-# IMPORTANT: run each sql/checks/*.sql file individually so each output maps 1:1 to a TSV.
-SQL_FILES=(
-  "$CHECKS_DIR/mysql_version.sql"
-  "$CHECKS_DIR/innodb_settings.sql"
-  "$CHECKS_DIR/auth_plugins.sql"
-  "$CHECKS_DIR/json_columns.sql"
-  "$CHECKS_DIR/compression_encryption.sql"
-  "$CHECKS_DIR/engines_summary.sql"
-  "$CHECKS_DIR/schema_sizes.sql"
-  "$CHECKS_DIR/schema_charsets.sql"
-  "$CHECKS_DIR/mysql8_collations.sql"
-  "$CHECKS_DIR/mysql8_column_collations.sql"
-  "$CHECKS_DIR/sql_mode.sql"
-  "$CHECKS_DIR/definers_inventory.sql"
-  "$CHECKS_DIR/partitioned_tables.sql"
-  "$CHECKS_DIR/active_plugins.sql"
-  "$CHECKS_DIR/functional_indexes.sql"
-  "$CHECKS_DIR/functional_defaults.sql"
-  "$CHECKS_DIR/invisible_columns.sql"
-  "$CHECKS_DIR/check_constraints.sql"
-  "$CHECKS_DIR/partial_revokes.sql"
-  "$CHECKS_DIR/gis_srid_usage.sql"
-  "$CHECKS_DIR/resource_groups.sql"
-  "$CHECKS_DIR/xplugin_status.sql"
-  "$CHECKS_DIR/fk_name_lengths.sql"
-  "$CHECKS_DIR/trigger_order.sql"
-)
-
-for f in "${SQL_FILES[@]}"; do
-  if [[ ! -f "$f" ]]; then
-    echo "ERROR: Missing SQL file: $f" | tee -a "$COMBINED_OUT"
-    exit 2
-  fi
-
-  base="$(basename "$f" .sql)"
-  out="$OUTDIR/${base}.tsv"
-  echo "---- $base ----" | tee -a "$COMBINED_OUT"
-
-  if "$MYSQL_BIN" "${MYSQL_AUTH[@]}" "${MYSQL_OPTS[@]}" < "$f" > "$out" 2>>"$COMBINED_ERR"; then
-    if [[ -s "$out" ]]; then
-      head -n 50 "$out" | tee -a "$COMBINED_OUT"
-      if [[ $(wc -l < "$out") -gt 50 ]]; then
-        echo "... (truncated; full output in $out)" | tee -a "$COMBINED_OUT"
-      fi
-    else
-      echo "(no rows)" | tee -a "$COMBINED_OUT"
+echo "NOTE: Sized target my.cnf fragments are written by 'migrationctl assess' (config_advice/*.cnf)." | tee -a "$COMBINED_OUT"
+
+# The checks run against a catalog snapshot of the source (one streaming query per
+# information_schema relation), the same sql/catalog/*.sql that `migrationctl assess` uses.
+# It rewrites precheck.out and precheck.err, so the notes above are appended again afterwards.
+NOTES="$(cat "$COMBINED_OUT")"
+if ! SRC_HOST="$HOST" SRC_PORT="$PORT" SRC_ADMIN_USER="$USER" SRC_ADMIN_PASS="${PASS:-${MYSQL_PWD:-}}" MYSQL_BIN="$MYSQL_BIN" \
+  PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl precheck \
+  --out "$OUTDIR"; then
+  echo "$NOTES" >> "$COMBINED_OUT"
+  echo "ERROR: precheck failed (see above and $COMBINED_ERR)" | tee -a "$COMBINED_OUT"
+  exit 3
+fi
+echo "$NOTES" >> "$COMBINED_OUT"
+
+for out in "$OUTDIR"/*.tsv; do
+  echo "---- $(basename "$out" .tsv) ----"
+  if [[ -s "$out" ]]; then
+    head -n 50 "$out"
+    if [[ $(wc -l < "$out") -gt 50 ]]; then
+      echo "... (truncated; full output in $out)"
     fi
   else
-    echo "ERROR: mysql failed for $base (see $COMBINED_ERR)" | tee -a "$COMBINED_OUT"
-    exit 3
+    echo "(no rows)"
   fi
-
-  echo "" | tee -a "$COMBINED_OUT"
+  echo ""
 done
 
 # Hard gate quick check (optional, but useful)
@@ -127,5 +98,10 @@ if [[ -s "$ift_file" ]]; then
   fi
 fi
 
+if [[ "${ARTIFACT_STORE:-1}" != "0" ]]; then
+  PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl artifacts put \
+    --prefix precheck/ "$OUTDIR"/*.tsv 2>/dev/null || echo "WARN: could not archive precheck outputs to the artifact store."
+fi
+
 echo "Precheck complete." | tee -a "$COMBINED_OUT"
 echo "TSV outputs: $OUTDIR/*.tsv" | tee -a "$COMBINED_OUT"
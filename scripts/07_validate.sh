@@ -74,5 +74,19 @@ else
     -e "SHOW ENGINES;"
 fi
 
+echo
+echo "Schema diff (source vs target):"
+if [[ "${SCHEMA_DIFF:-1}" == "1" && -n "${SRC_HOST:-}" && -n "${SRC_DB:-}${SRC_DBS:-}" && -n "$TGT_HOST" ]]; then
+  # Fails validation on missing/extra/differing objects; details in schema_diff.tsv.
+  ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+  DIFF_ARGS=()
+  if [[ -n "${SCHEMA_DIFF_KINDS:-}" ]]; then
+    DIFF_ARGS=(--kinds "$SCHEMA_DIFF_KINDS")
+  fi
+  PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl schema-diff "${DIFF_ARGS[@]}"
+else
+  echo "Skipped (needs SRC_HOST, SRC_DB/SRC_DBS and TGT_HOST; SCHEMA_DIFF=0 disables)."
+fi
+
 echo
 echo "Validation complete (socket-first)."
@@ -38,7 +38,8 @@ TGT_ADMIN_SSH_USER="${TGT_ADMIN_SSH_USER:-${TGT_SSH_USER:-root}}"
 TGT_ADMIN_SSH_OPTS="${TGT_ADMIN_SSH_OPTS:-${TGT_SSH_OPTS:-}}"
 ALLOW_ROOT_USERS="${ALLOW_ROOT_USERS:-0}"
 MIGRATE_APP_USERS="$(trim_ws "${MIGRATE_APP_USERS:-1}")"
-APP_USER_DEFAULT_PASSWORD="$(trim_ws "${APP_USER_DEFAULT_PASSWORD:-Str0ngChangeMe!2026}")"
+# Empty: migrationctl's built-in default (orchestrator/users.py) is used.
+APP_USER_DEFAULT_PASSWORD="$(trim_ws "${APP_USER_DEFAULT_PASSWORD:-}")"
 
 if [[ -z "$SRC_HOST" || -z "$SRC_USER" || -z "$SRC_PASS" || ( -z "$SRC_DB" && -z "$SRC_DBS" ) ]]; then
   echo "ERROR: Missing source envs. Set SRC_HOST, SRC_USER, SRC_PASS, and SRC_DB or SRC_DBS."
@@ -210,19 +211,22 @@ FLUSH PRIVILEGES;"
 run_target_sql "$SQL_TGT"
 
 if [[ "$MIGRATE_APP_USERS" == "1" ]]; then
-  echo "Migrating application users to target (default password)"
-  user_rows=$(run_source_admin_sql "SELECT user, host FROM mysql.user WHERE user <> '' AND user NOT IN ('root','${SRC_USER}','mysql.infoschema','mysql.session','mysql.sys');")
-  while IFS=$'\t' read -r u h; do
-    [[ -z "$u" ]] && continue
-    u_esc="$(sql_escape "$u")"
-    h_esc="$(sql_escape "$h")"
-    run_target_sql "CREATE USER IF NOT EXISTS '${u_esc}'@'${h_esc}' IDENTIFIED BY '${APP_USER_DEFAULT_PASSWORD}';"
-    grants=$(run_source_admin_sql "SHOW GRANTS FOR '${u_esc}'@'${h_esc}';")
-    while IFS= read -r g; do
-      [[ -z "$g" ]] && continue
-      run_target_sql "$g"
-    done <<< "$grants"
-  done <<< "$user_rows"
+  echo "Migrating application users to target (hashes kept where supported, otherwise APP_USER_DEFAULT_PASSWORD)"
+  # One set-based extract from the source, one batched session on the target.
+  ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+  USERS_OUT="${MIGRATION_OUT_DIR:-$ROOT/artifacts}"
+  USERS_ARGS=()
+  if [[ -n "${TGT_SSH_HOST:-}" && "$ALLOW_ROOT_USERS" == "1" && "$TGT_ADMIN_USER" == "root" ]]; then
+    # Root override: only write the script, and apply it with run_target_sql, which
+    # falls back to the target's local socket when root cannot log in over TCP.
+    USERS_ARGS=(--dry-run)
+  fi
+  (cd "$ROOT" && APP_USER_DEFAULT_PASSWORD="$APP_USER_DEFAULT_PASSWORD" \
+    TGT_SSH_USER="$TGT_ADMIN_SSH_USER" TGT_SSH_OPTS="$TGT_ADMIN_SSH_OPTS" \
+    "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl migrate-users --out "$USERS_OUT" ${USERS_ARGS[@]+"${USERS_ARGS[@]}"})
+  if [[ "${#USERS_ARGS[@]}" -gt 0 ]]; then
+    run_target_sql "$(cat "$USERS_OUT/app_users.sql")"
+  fi
 fi
 
 echo "Migration user setup completed."
@@ -23,7 +23,21 @@ TGT_PASS="${TGT_ADMIN_PASS:-${TGT_PASS:-}}"
 TGT_SSH_HOST="${TGT_SSH_HOST:-}"
 TGT_SSH_USER="${TGT_SSH_USER:-root}"
 TGT_SSH_OPTS="${TGT_SSH_OPTS:-}"
+# Optional fan-out: host[:port],... restored concurrently from one dump stream.
+TGT_HOSTS="${TGT_HOSTS:-}"
 ALLOW_TARGET_DB_OVERWRITE="${ALLOW_TARGET_DB_OVERWRITE:-0}"
+PROGRESS="${PROGRESS:-1}"
+# Dump BLOBs as hex (the default). DUMP_HEX_BLOB=0 opts in to escaped binary strings,
+# half the bytes on the wire, which the --binary-mode restore loads unchanged.
+DUMP_HEX_BLOB="${DUMP_HEX_BLOB:-1}"
+# Move BLOB/TEXT/JSON-heavy tables with binary-safe LOAD DATA instead of dump INSERTs.
+# Their data is read in a second snapshot after the dump, i.e. from a later point in
+# time: it is refused unless the source is read_only, or LOB_TRANSFER_WRITES_STOPPED=1
+# confirms that application writes are stopped for the whole run.
+LOB_TRANSFER="${LOB_TRANSFER:-0}"
+LOB_TRANSFER_WRITES_STOPPED="${LOB_TRANSFER_WRITES_STOPPED:-0}"
+MYSQL_BIN="${MYSQL_BIN:-mysql}"
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 
 if [[ -z "$SRC_HOST" || -z "$SRC_USER" || -z "$SRC_PASS" || ( -z "$SRC_DB" && -z "$SRC_DBS" ) ]]; then
   echo "ERROR: Missing source envs. Set SRC_HOST, SRC_USER, SRC_PASS, and SRC_DB or SRC_DBS."
@@ -43,6 +57,8 @@ sql_escape() {
 
 target_db_exists() {
   local db="$1"
+  local TGT_HOST="${2:-$TGT_HOST}"
+  local TGT_PORT="${3:-$TGT_PORT}"
   local db_esc
   db_esc="$(sql_escape "$db")"
   local q="SELECT COUNT(*) FROM information_schema.schemata WHERE schema_name='${db_esc}';"
@@ -77,7 +93,10 @@ fi
 echo "Target: $TGT_HOST:$TGT_PORT"
 
 PIPE_CMD=()
-if command -v "$PV_BIN" >/dev/null 2>&1; then
+if [[ "$PROGRESS" == "1" ]]; then
+  # Per-table progress/ETA from the dump markers; writes progress.json to MIGRATION_OUT_DIR.
+  PIPE_CMD=( env PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl progress dump --phase one_step )
+elif command -v "$PV_BIN" >/dev/null 2>&1; then
   PIPE_CMD=( "$PV_BIN" -pet )
 fi
 
@@ -97,25 +116,32 @@ fi
 
 if [[ "${#PIPE_CMD[@]}" -eq 0 ]]; then
   echo "pv not found; running without progress meter."
+elif [[ "$PROGRESS" == "1" ]]; then
+  echo "Progress: ${MIGRATION_OUT_DIR:-artifacts}/progress.json (migrationctl progress watch --out ${MIGRATION_OUT_DIR:-artifacts})"
 fi
 
 set -o pipefail
 DUMP_ARGS=(
   --routines --triggers --events
-  --no-tablespaces --hex-blob --single-transaction
+  --no-tablespaces --single-transaction
 )
+if [[ "$DUMP_HEX_BLOB" != "0" ]]; then
+  DUMP_ARGS+=(--hex-blob)
+fi
 FILTER_CMD=()
+DEFINER_ARGS=()
 if [[ "$STRIP_DEFINERS" == "1" ]]; then
   if [[ "$MARIADB_DUMP_BIN" == "mysqldump" ]]; then
-    FILTER_CMD=( sed -E 's/\/\*!50017 DEFINER=`[^`]+`@`[^`]+`\*\/ ?//g; s/DEFINER=`[^`]+`@`[^`]+`//g' )
+    FILTER_CMD=( env LC_ALL=C sed -E 's/\/\*!50017 DEFINER=`[^`]+`@`[^`]+`\*\/ ?//g; s/DEFINER=`[^`]+`@`[^`]+`//g' )
   else
     if "$MARIADB_DUMP_BIN" --help 2>/dev/null | grep -q -- '--skip-definer'; then
-      DUMP_ARGS+=(--skip-definer)
+      DEFINER_ARGS=(--skip-definer)
     else
-      FILTER_CMD=( sed -E 's/\/\*!50017 DEFINER=`[^`]+`@`[^`]+`\*\/ ?//g; s/DEFINER=`[^`]+`@`[^`]+`//g' )
+      FILTER_CMD=( env LC_ALL=C sed -E 's/\/\*!50017 DEFINER=`[^`]+`@`[^`]+`\*\/ ?//g; s/DEFINER=`[^`]+`@`[^`]+`//g' )
     fi
   fi
 fi
+DUMP_ARGS+=("${DEFINER_ARGS[@]}")
 if [[ -n "$SRC_DBS" ]]; then
   IFS=',' read -r -a DB_LIST <<< "$SRC_DBS"
   DUMP_ARGS+=(--databases "${DB_LIST[@]}")
@@ -124,9 +150,28 @@ else
   DUMP_ARGS+=(--databases "$SRC_DB")
 fi
 if [[ "$MARIADB_DUMP_BIN" == "mysqldump" ]]; then
-  DUMP_ARGS+=(--set-gtid-purged=OFF)
+  GTID_ARGS=(--set-gtid-purged=OFF)
+else
+  GTID_ARGS=(--gtid=0)
+fi
+DUMP_ARGS+=("${GTID_ARGS[@]}")
+
+TARGETS=()
+if [[ -n "$TGT_HOSTS" ]]; then
+  if [[ -n "$TGT_SSH_HOST" ]]; then
+    echo "ERROR: TGT_HOSTS fan-out connects to each target directly; unset TGT_SSH_HOST."
+    exit 1
+  fi
+  IFS=',' read -r -a _tgts <<< "$TGT_HOSTS"
+  for t in "${_tgts[@]}"; do
+    t="${t// /}"
+    [[ -z "$t" ]] && continue
+    [[ "$t" == *:* ]] || t="$t:$TGT_PORT"
+    TARGETS+=("$t")
+  done
+  echo "Fan-out targets: ${TARGETS[*]}"
 else
-  DUMP_ARGS+=(--gtid=0)
+  TARGETS=("$TGT_HOST:$TGT_PORT")
 fi
 
 if [[ "$ALLOW_TARGET_DB_OVERWRITE" != "1" ]]; then
@@ -134,9 +179,11 @@ if [[ "$ALLOW_TARGET_DB_OVERWRITE" != "1" ]]; then
   for db in "${DB_LIST[@]}"; do
     db="${db// /}"
     [[ -z "$db" ]] && continue
-    if target_db_exists "$db"; then
-      existing+=("$db")
-    fi
+    for t in "${TARGETS[@]}"; do
+      if target_db_exists "$db" "${t%%:*}" "${t##*:}"; then
+        existing+=("$db@$t")
+      fi
+    done
   done
   if [[ "${#existing[@]}" -gt 0 ]]; then
     echo "ERROR: Target DB already exists: ${existing[*]}"
@@ -145,16 +192,68 @@ if [[ "$ALLOW_TARGET_DB_OVERWRITE" != "1" ]]; then
   fi
 fi
 
+migrationctl() {
+  PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl "$@"
+}
+
+# Restore a SQL stream (stdin) into every target; $1 labels the fan-out report.
+restore() {
+  if [[ -n "$TGT_HOSTS" ]]; then
+    migrationctl fanout --label "$1"
+  elif [[ -n "$TGT_SSH_HOST" ]]; then
+    TGT_PASS_Q="$(printf '%q' "$TGT_PASS")"
+    ssh ${TGT_SSH_OPTS} "${TGT_SSH_USER}@${TGT_SSH_HOST}" \
+      "MYSQL_PWD=$TGT_PASS_Q ${MARIADB_BIN} --binary-mode ${TGT_AUTH[*]}"
+  else
+    MYSQL_PWD="$TGT_PASS" "$MARIADB_BIN" --binary-mode "${TGT_AUTH[@]}"
+  fi
+}
+
+LOB_TABLES=()
+LOB_LIST="${MIGRATION_OUT_DIR:-artifacts}/lob_tables.txt"
+if [[ "$LOB_TRANSFER" == "1" && "$LOB_TRANSFER_WRITES_STOPPED" != "1" ]]; then
+  src_read_only="$(MYSQL_PWD="$SRC_PASS" "$MYSQL_BIN" "${SRC_AUTH[@]}" --batch --skip-column-names \
+    -e "SELECT @@global.read_only" 2>/dev/null || true)"
+  if [[ "$src_read_only" != "1" ]]; then
+    echo "ERROR: LOB_TRANSFER=1 reads LOB tables in a second snapshot after the dump, so a source"
+    echo "that is still taking writes would give them a later point in time than the other tables."
+    echo "Set the source read_only, or set LOB_TRANSFER_WRITES_STOPPED=1 once application writes are stopped."
+    exit 1
+  fi
+fi
+if [[ "$LOB_TRANSFER" == "1" ]]; then
+  if [[ "$MARIADB_DUMP_BIN" == "mysqldump" ]] || ! "$MARIADB_DUMP_BIN" --help 2>/dev/null | grep -q -- '--ignore-table-data'; then
+    echo "WARN: $MARIADB_DUMP_BIN has no --ignore-table-data; LOB tables stay in the dump."
+  else
+    migrationctl lob plan --schemas "$(IFS=,; echo "${DB_LIST[*]// /}")" --list-file "$LOB_LIST"
+    mapfile -t LOB_TABLES < "$LOB_LIST"
+  fi
+fi
+if [[ "${#LOB_TABLES[@]}" -gt 0 ]]; then
+  # LOB tables keep their DDL in the dump; their data follows via LOAD DATA, and
+  # all triggers are created last so they do not fire during the load.
+  for t in "${LOB_TABLES[@]}"; do
+    DUMP_ARGS+=(--ignore-table-data="$t")
+  done
+  DUMP_ARGS+=(--skip-triggers)
+  echo "LOB transfer: ${#LOB_TABLES[@]} table(s) via LOAD DATA (${LOB_LIST})"
+fi
+
 MYSQL_PWD="$SRC_PASS" "$MARIADB_DUMP_BIN" "${SRC_AUTH[@]}" "${SRC_SSL_ARGS[@]}" "${DUMP_ARGS[@]}" \
+  | migrationctl governor pipe --reader one_step_dump \
   | if [[ "${#FILTER_CMD[@]}" -gt 0 ]]; then "${FILTER_CMD[@]}"; else cat; fi \
   | if [[ "${#PIPE_CMD[@]}" -gt 0 ]]; then "${PIPE_CMD[@]}"; else cat; fi \
-  | if [[ -n "$TGT_SSH_HOST" ]]; then
-      TGT_PASS_Q="$(printf '%q' "$TGT_PASS")"
-      ssh ${TGT_SSH_OPTS} "${TGT_SSH_USER}@${TGT_SSH_HOST}" \
-        "MYSQL_PWD=$TGT_PASS_Q ${MARIADB_BIN} ${TGT_AUTH[*]}"
-    else
-      MYSQL_PWD="$TGT_PASS" "$MARIADB_BIN" "${TGT_AUTH[@]}"
-    fi
+  | restore one_step
+
+if [[ "${#LOB_TABLES[@]}" -gt 0 ]]; then
+  migrationctl lob copy --tables-file "$LOB_LIST"
+  echo "Restoring triggers..."
+  MYSQL_PWD="$SRC_PASS" "$MARIADB_DUMP_BIN" "${SRC_AUTH[@]}" "${SRC_SSL_ARGS[@]}" \
+    --no-create-info --no-data --no-create-db --skip-routines --skip-events --triggers --no-tablespaces \
+    "${DEFINER_ARGS[@]}" "${GTID_ARGS[@]}" --databases "${DB_LIST[@]}" \
+    | if [[ "${#FILTER_CMD[@]}" -gt 0 ]]; then "${FILTER_CMD[@]}"; else cat; fi \
+    | restore one_step_triggers
+fi
 set +o pipefail
 
 echo "One-step migration completed."
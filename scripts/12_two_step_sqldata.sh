@@ -16,6 +16,8 @@ TGT_HOST="${TGT_HOST:-}"
 TGT_PORT="${TGT_PORT:-3306}"
 TGT_USER="${TGT_ADMIN_USER:-${TGT_USER:-}}"
 TGT_PASS="${TGT_ADMIN_PASS:-${TGT_PASS:-}}"
+PROGRESS="${PROGRESS:-1}"
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 
 if [[ -z "$SQLINESDATA_BIN" ]]; then
   if command -v sqldata >/dev/null 2>&1; then
@@ -50,10 +52,23 @@ else
   DB_LIST=("$SRC_DB")
 fi
 
+progress_filter() {
+  if [[ "$PROGRESS" == "1" ]]; then
+    # Per-table progress/ETA from sqldata's table events; writes progress.json to MIGRATION_OUT_DIR.
+    PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl progress sqldata --phase two_step_data
+  else
+    cat
+  fi
+}
+
 for db in "${DB_LIST[@]}"; do
   db="${db// /}"
   [[ -z "$db" ]] && continue
-  "$SQLINESDATA_BIN" \
+  # Source sessions are paused by the governor while the source is unhealthy (GOVERNOR_*).
+  # Byte/row budgets are not enforced here: sqldata reads the source directly.
+  PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl \
+    governor exec --reader "sqldata:${db}" -- \
+    "$SQLINESDATA_BIN" \
     "-sd=mysql,${SRC_USER}/${SRC_PASS}@${SRC_HOST}:${SRC_PORT}/${db}" \
     "-td=mariadb,${TGT_USER}/${TGT_PASS}@${TGT_HOST}:${TGT_PORT}/${db}" \
     "-smap=${db}:${db}" \
@@ -64,6 +79,6 @@ for db in "${DB_LIST[@]}"; do
     -triggers=no \
     -views=no \
     -procedures=no
-done
+done | progress_filter
 
 echo "SQLines Data transfer completed."
@@ -21,9 +21,16 @@ TGT_USER="${TGT_USER:-}"
 TGT_PASS="${TGT_PASS:-}"
 TGT_ADMIN_USER="${TGT_ADMIN_USER:-}"
 TGT_ADMIN_PASS="${TGT_ADMIN_PASS:-}"
+# Optional fan-out: host[:port],... all seeded from one dump (same binlog coordinates).
+TGT_HOSTS="${TGT_HOSTS:-}"
 
 ALLOW_TARGET_DB_OVERWRITE="${ALLOW_TARGET_DB_OVERWRITE:-0}"
 BINLOG_COORD_FILE="${BINLOG_COORD_FILE:-artifacts/binlog_coords.env}"
+ARTIFACT_STORE="${ARTIFACT_STORE:-1}"
+# Dump BLOBs as hex (the default). DUMP_HEX_BLOB=0 opts in to escaped binary strings,
+# half the bytes on the wire, which the --binary-mode restore loads unchanged.
+DUMP_HEX_BLOB="${DUMP_HEX_BLOB:-1}"
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
 
 if [[ -z "$SRC_HOST" || ( -z "$SRC_USER" && -z "$SRC_ADMIN_USER" ) || ( -z "$SRC_PASS" && -z "$SRC_ADMIN_PASS" ) || ( -z "$SRC_DB" && -z "$SRC_DBS" ) ]]; then
   echo "ERROR: Missing source envs. Set SRC_HOST, SRC_USER/SRC_ADMIN_USER, SRC_PASS/SRC_ADMIN_PASS, and SRC_DB or SRC_DBS."
@@ -51,19 +58,50 @@ else
 fi
 
 mkdir -p "$(dirname "$BINLOG_COORD_FILE")"
-DUMP_FILE="$(dirname "$BINLOG_COORD_FILE")/binlog_seed_$(date +%Y%m%d_%H%M%S).sql"
-
-echo "Preparing target database(s)..."
-for db in "${DB_LIST[@]}"; do
-  db="${db// /}"
-  [[ -z "$db" ]] && continue
-  if [[ "$ALLOW_TARGET_DB_OVERWRITE" == "1" ]]; then
-    MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"$TGT_HOST" -P"$TGT_PORT" -u"$TGT_ADMIN_USER" \
-      --batch --skip-column-names -e "DROP DATABASE IF EXISTS \`${db}\`; CREATE DATABASE \`${db}\`;"
+DUMP_NAME="binlog_seed_$(date +%Y%m%d_%H%M%S).sql"
+DUMP_FILE="$(dirname "$BINLOG_COORD_FILE")/$DUMP_NAME"
+
+# The seed dump goes through the compressed artifact store unless ARTIFACT_STORE=0.
+artifacts() {
+  (cd "$ROOT" && "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl artifacts "$@")
+}
+dump_cat() {
+  if [[ "$ARTIFACT_STORE" == "0" ]]; then
+    cat "$DUMP_FILE"
   else
-    MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"$TGT_HOST" -P"$TGT_PORT" -u"$TGT_ADMIN_USER" \
-      --batch --skip-column-names -e "CREATE DATABASE IF NOT EXISTS \`${db}\`;"
+    artifacts cat --name "$DUMP_NAME"
   fi
+}
+
+TARGETS=()
+if [[ -n "$TGT_HOSTS" ]]; then
+  IFS=',' read -r -a _tgts <<< "$TGT_HOSTS"
+  for t in "${_tgts[@]}"; do
+    t="${t// /}"
+    [[ -z "$t" ]] && continue
+    [[ "$t" == *:* ]] || t="$t:$TGT_PORT"
+    TARGETS+=("$t")
+  done
+  echo "Fan-out targets: ${TARGETS[*]}"
+else
+  TARGETS=("$TGT_HOST:$TGT_PORT")
+fi
+
+echo "Preparing target database(s)..."
+for t in "${TARGETS[@]}"; do
+  t_host="${t%%:*}"
+  t_port="${t##*:}"
+  for db in "${DB_LIST[@]}"; do
+    db="${db// /}"
+    [[ -z "$db" ]] && continue
+    if [[ "$ALLOW_TARGET_DB_OVERWRITE" == "1" ]]; then
+      MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"$t_host" -P"$t_port" -u"$TGT_ADMIN_USER" \
+        --batch --skip-column-names -e "DROP DATABASE IF EXISTS \`${db}\`; CREATE DATABASE \`${db}\`;"
+    else
+      MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"$t_host" -P"$t_port" -u"$TGT_ADMIN_USER" \
+        --batch --skip-column-names -e "CREATE DATABASE IF NOT EXISTS \`${db}\`;"
+    fi
+  done
 done
 
 SRC_DUMP_USER="${SRC_ADMIN_USER:-$SRC_USER}"
@@ -76,10 +114,12 @@ DUMP_ARGS=(
   --single-transaction
   --master-data=2
   --routines --triggers --events
-  --hex-blob
   --skip-lock-tables
-  --databases
 )
+if [[ "$DUMP_HEX_BLOB" != "0" ]]; then
+  DUMP_ARGS+=(--hex-blob)
+fi
+DUMP_ARGS+=(--databases)
 if [[ "$MARIADB_DUMP_BIN" == "mysqldump" ]]; then
   DUMP_ARGS+=(--set-gtid-purged=OFF)
 else
@@ -90,10 +130,19 @@ for db in "${DB_LIST[@]}"; do
   [[ -n "$db" ]] && DUMP_ARGS+=("$db")
 done
 
-MYSQL_PWD="$SRC_DUMP_PASS" "$MARIADB_DUMP_BIN" --protocol=TCP -h"$SRC_HOST" -P"$SRC_PORT" -u"$SRC_DUMP_USER" \
-  "${DUMP_ARGS[@]}" > "$DUMP_FILE"
+# Source reads go through the governor (GOVERNOR_* budgets / health thresholds).
+governed() {
+  (cd "$ROOT" && "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl governor pipe --reader binlog_seed_dump)
+}
+if [[ "$ARTIFACT_STORE" == "0" ]]; then
+  MYSQL_PWD="$SRC_DUMP_PASS" "$MARIADB_DUMP_BIN" --protocol=TCP -h"$SRC_HOST" -P"$SRC_PORT" -u"$SRC_DUMP_USER" \
+    "${DUMP_ARGS[@]}" | governed > "$DUMP_FILE"
+else
+  MYSQL_PWD="$SRC_DUMP_PASS" "$MARIADB_DUMP_BIN" --protocol=TCP -h"$SRC_HOST" -P"$SRC_PORT" -u"$SRC_DUMP_USER" \
+    "${DUMP_ARGS[@]}" | governed | artifacts put - --name "$DUMP_NAME"
+fi
 
-coord_line="$(grep -m1 -E "MASTER_LOG_FILE='[^']+', MASTER_LOG_POS=[0-9]+" "$DUMP_FILE" || true)"
+coord_line="$(dump_cat | LC_ALL=C grep -a -m1 -E "MASTER_LOG_FILE='[^']+', MASTER_LOG_POS=[0-9]+" || true)"
 if [[ -z "$coord_line" ]]; then
   echo "ERROR: Unable to extract binlog coordinates from dump file."
   exit 3
@@ -107,9 +156,18 @@ SRC_BINLOG_FILE=${src_file}
 SRC_BINLOG_POS=${src_pos}
 COORDS
 
-echo "Restoring snapshot to target..."
-MYSQL_PWD="$TGT_RESTORE_PASS" "$MARIADB_BIN" --protocol=TCP -h"$TGT_HOST" -P"$TGT_PORT" -u"$TGT_RESTORE_USER" < "$DUMP_FILE"
+if [[ -n "$TGT_HOSTS" ]]; then
+  echo "Restoring snapshot to ${#TARGETS[@]} targets (one read, concurrent restores)..."
+  dump_cat | PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl fanout --label binlog_seed
+else
+  echo "Restoring snapshot to target..."
+  dump_cat | MYSQL_PWD="$TGT_RESTORE_PASS" "$MARIADB_BIN" --binary-mode --protocol=TCP -h"$TGT_HOST" -P"$TGT_PORT" -u"$TGT_RESTORE_USER"
+fi
 
 echo "Seed completed."
 echo "Coordinates file: $BINLOG_COORD_FILE"
-echo "Dump file: $DUMP_FILE"
+if [[ "$ARTIFACT_STORE" == "0" ]]; then
+  echo "Dump file: $DUMP_FILE"
+else
+  echo "Dump artifact: $DUMP_NAME (migrationctl artifacts cat --name $DUMP_NAME)"
+fi
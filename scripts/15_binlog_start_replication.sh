@@ -26,6 +26,26 @@ BINLOG_MASTER_SSL="${BINLOG_MASTER_SSL:-0}"
 BINLOG_MASTER_SSL_VERIFY_SERVER_CERT="${BINLOG_MASTER_SSL_VERIFY_SERVER_CERT:-0}"
 BINLOG_AUTO_FIX_SERVER_ID="${BINLOG_AUTO_FIX_SERVER_ID:-1}"
 TGT_SERVER_ID="${TGT_SERVER_ID:-}"
+TGT_HOSTS="${TGT_HOSTS:-}"
+BINLOG_TAKEN_SERVER_IDS="${BINLOG_TAKEN_SERVER_IDS:-}"
+
+if [[ -n "$TGT_HOSTS" ]]; then
+  # Fan-out seed: every target starts from the same coordinates; server_ids must stay distinct.
+  taken_ids="$BINLOG_TAKEN_SERVER_IDS"
+  IFS=',' read -r -a _tgts <<< "$TGT_HOSTS"
+  for t in "${_tgts[@]}"; do
+    t="${t// /}"
+    [[ -z "$t" ]] && continue
+    [[ "$t" == *:* ]] || t="$t:$TGT_PORT"
+    echo "--- target $t ---"
+    TGT_HOSTS="" TGT_SERVER_ID="" TGT_HOST="${t%%:*}" TGT_PORT="${t##*:}" BINLOG_TAKEN_SERVER_IDS="$taken_ids" "${BASH_SOURCE[0]}"
+    t_id="$(MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"${t%%:*}" -P"${t##*:}" -u"$TGT_ADMIN_USER" \
+      --batch --skip-column-names -e "SELECT @@server_id;")"
+    taken_ids="${taken_ids:+$taken_ids,}$t_id"
+  done
+  echo "Replication started on all targets."
+  exit 0
+fi
 
 missing=()
 for v in SRC_HOST SRC_ADMIN_USER SRC_ADMIN_PASS TGT_HOST TGT_ADMIN_USER TGT_ADMIN_PASS REPL_USER REPL_PASS; do
@@ -55,9 +75,13 @@ if [[ -z "$src_server_id" || -z "$tgt_server_id" ]]; then
   exit 10
 fi
 
-if [[ "$src_server_id" == "$tgt_server_id" ]]; then
+id_taken() {
+  [[ "$1" == "$src_server_id" || ",${BINLOG_TAKEN_SERVER_IDS}," == *",$1,"* ]]
+}
+
+if id_taken "$tgt_server_id"; then
   if [[ "$BINLOG_AUTO_FIX_SERVER_ID" != "1" ]]; then
-    echo "ERROR: Source and target server_id are equal ($src_server_id). Set distinct IDs before replication."
+    echo "ERROR: Target server_id $tgt_server_id is already used by the source or another target. Set distinct IDs before replication."
     exit 11
   fi
   new_tgt_id="$TGT_SERVER_ID"
@@ -65,15 +89,15 @@ if [[ "$src_server_id" == "$tgt_server_id" ]]; then
     host_hash="$(printf "%s" "$TGT_HOST" | tr -cd '0-9')"
     if [[ -z "$host_hash" ]]; then host_hash="200"; fi
     new_tgt_id="$(( (10#$host_hash % 2147483000) + 1000 ))"
-    if [[ "$new_tgt_id" == "$src_server_id" ]]; then
+    while id_taken "$new_tgt_id"; do
       new_tgt_id="$((new_tgt_id + 1))"
-    fi
+    done
   fi
   if ! [[ "$new_tgt_id" =~ ^[0-9]+$ ]]; then
     echo "ERROR: Computed target server_id is invalid: $new_tgt_id"
     exit 12
   fi
-  echo "Source/target server_id collision detected ($src_server_id). Setting target server_id=$new_tgt_id"
+  echo "server_id collision detected ($tgt_server_id). Setting target server_id=$new_tgt_id"
   MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"$TGT_HOST" -P"$TGT_PORT" -u"$TGT_ADMIN_USER" \
     --batch --skip-column-names -e "SET GLOBAL server_id=${new_tgt_id};"
   tgt_server_id="$(MYSQL_PWD="$TGT_ADMIN_PASS" "$MARIADB_BIN" --protocol=TCP -h"$TGT_HOST" -P"$TGT_PORT" -u"$TGT_ADMIN_USER" \
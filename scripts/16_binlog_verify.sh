@@ -12,6 +12,19 @@ TGT_ADMIN_PASS="${TGT_ADMIN_PASS:-}"
 BINLOG_MAX_LAG_SECS="${BINLOG_MAX_LAG_SECS:-30}"
 BINLOG_VERIFY_TIMEOUT_SECS="${BINLOG_VERIFY_TIMEOUT_SECS:-90}"
 BINLOG_VERIFY_POLL_SECS="${BINLOG_VERIFY_POLL_SECS:-3}"
+TGT_HOSTS="${TGT_HOSTS:-}"
+
+if [[ -n "$TGT_HOSTS" ]]; then
+  IFS=',' read -r -a _tgts <<< "$TGT_HOSTS"
+  for t in "${_tgts[@]}"; do
+    t="${t// /}"
+    [[ -z "$t" ]] && continue
+    [[ "$t" == *:* ]] || t="$t:$TGT_PORT"
+    echo "--- target $t ---"
+    TGT_HOSTS="" TGT_HOST="${t%%:*}" TGT_PORT="${t##*:}" "${BASH_SOURCE[0]}"
+  done
+  exit 0
+fi
 
 if [[ -z "$TGT_HOST" || -z "$TGT_ADMIN_USER" || -z "$TGT_ADMIN_PASS" ]]; then
   echo "ERROR: Missing target admin envs for verify step."
@@ -27,9 +27,27 @@ if ! command -v "$MARIADB_DUMP_BIN" >/dev/null 2>&1; then
 fi
 
 mkdir -p "$INPLACE_BACKUP_DIR"
-backup_sql="$INPLACE_BACKUP_DIR/full_backup_$(date +%Y%m%d_%H%M%S).sql"
 meta_file="$INPLACE_BACKUP_DIR/backup_meta.txt"
 
+# Parallel per-table dump workers, compressed, with a checksum manifest (BACKUP_PARALLEL=0: single dump file).
+if [[ "${BACKUP_PARALLEL:-1}" != "0" ]]; then
+  ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+  backup_dir="$INPLACE_BACKUP_DIR/backup_$(date +%Y%m%d_%H%M%S)"
+  echo "Creating parallel logical backup: $backup_dir"
+  MARIADB_DUMP_BIN="$MARIADB_DUMP_BIN" PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" \
+    -m orchestrator.migrationctl backup logical --dir "$backup_dir"
+
+  echo "backup_dir=$backup_dir" > "$meta_file"
+  echo "manifest=$backup_dir/manifest.json" >> "$meta_file"
+  echo "created_at=$(date -u +%FT%TZ)" >> "$meta_file"
+
+  echo "Backup completed and verified."
+  echo "Metadata file: $meta_file"
+  exit 0
+fi
+
+backup_sql="$INPLACE_BACKUP_DIR/full_backup_$(date +%Y%m%d_%H%M%S).sql"
+
 echo "Creating logical backup: $backup_sql"
 MYSQL_PWD="$SRC_ADMIN_PASS" "$MARIADB_DUMP_BIN" --protocol=TCP -h"$SRC_HOST" -P"$SRC_PORT" -u"$SRC_ADMIN_USER" \
   --all-databases --routines --events --triggers --single-transaction > "$backup_sql"
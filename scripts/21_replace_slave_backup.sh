@@ -18,6 +18,17 @@ if ! command -v ssh >/dev/null 2>&1; then
   exit 2
 fi
 
+# Parallel compressed archives of the datadir with a checksum manifest (BACKUP_PARALLEL=0: REPLACE_BACKUP_CMD).
+if [[ "${BACKUP_PARALLEL:-1}" != "0" ]]; then
+  ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+  REPLACE_BACKUP_DIR="${REPLACE_BACKUP_DIR:-/tmp/mysql_slave_backup_$(date +%Y%m%d_%H%M%S)}"
+  echo "Archiving datadir on target host into $REPLACE_BACKUP_DIR..."
+  TGT_SSH_OPTS="$TGT_SSH_OPTS" PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" \
+    -m orchestrator.migrationctl backup datadir --dir "$REPLACE_BACKUP_DIR"
+  echo "Backup step completed."
+  exit 0
+fi
+
 echo "Running backup command on target host..."
 ssh $TGT_SSH_OPTS "$TGT_SSH_USER@$TGT_SSH_HOST" "$REPLACE_BACKUP_CMD"
 
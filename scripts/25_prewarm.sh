@@ -0,0 +1,18 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+echo "==> Prewarm target buffer pool from the source hot set"
+
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+if [[ "${PREWARM:-1}" != "1" ]]; then
+  echo "Skipped (PREWARM=0)."
+  exit 0
+fi
+if [[ -z "${SRC_HOST:-}" || -z "${SRC_DB:-}${SRC_DBS:-}" || -z "${TGT_HOST:-}${TGT_HOSTS:-}" ]]; then
+  echo "ERROR: Missing SRC_HOST, SRC_DB/SRC_DBS or TGT_HOST for prewarm."
+  exit 1
+fi
+
+# Budgets: PREWARM_THREADS, PREWARM_MB_PER_SEC, PREWARM_MAX_MB, PREWARM_POOL_FRACTION, PREWARM_CHUNK_MB.
+PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl prewarm
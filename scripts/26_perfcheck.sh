@@ -0,0 +1,23 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+echo "==> Perfcheck: replay top source statements on source and target"
+
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+if [[ "${PERFCHECK:-1}" != "1" ]]; then
+  echo "Skipped (PERFCHECK=0)."
+  exit 0
+fi
+if [[ -z "${SRC_HOST:-}" || -z "${SRC_DB:-}${SRC_DBS:-}" || -z "${TGT_HOST:-}" ]]; then
+  echo "Skipped (needs SRC_HOST, SRC_DB/SRC_DBS and TGT_HOST)."
+  exit 0
+fi
+
+# Regressions become report.json warnings; PERFCHECK_FAIL=1 fails the step instead.
+ARGS=(--top "${PERFCHECK_TOP:-50}" --runs "${PERFCHECK_RUNS:-5}" --sessions "${PERFCHECK_SESSIONS:-2}")
+ARGS+=(--threshold "${PERFCHECK_THRESHOLD:-0.5}" --min-ms "${PERFCHECK_MIN_MS:-5}")
+if [[ "${PERFCHECK_FAIL:-0}" == "1" ]]; then
+  ARGS+=(--fail-on-regression)
+fi
+PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl perfcheck "${ARGS[@]}"
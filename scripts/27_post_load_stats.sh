@@ -0,0 +1,22 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+echo "==> Post-load statistics: ANALYZE target tables and transfer histograms"
+
+ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+if [[ "${POST_LOAD_STATS:-1}" != "1" ]]; then
+  echo "Skipped (POST_LOAD_STATS=0)."
+  exit 0
+fi
+# With TGT_HOSTS every fan-out target is analyzed, not just TGT_HOST.
+if [[ -z "${SRC_HOST:-}" || -z "${SRC_DB:-}${SRC_DBS:-}" || -z "${TGT_HOST:-}${TGT_HOSTS:-}" ]]; then
+  echo "ERROR: Missing SRC_HOST, SRC_DB/SRC_DBS or TGT_HOST/TGT_HOSTS for the statistics phase."
+  exit 1
+fi
+
+ARGS=(--threads "${STATS_THREADS:-4}" --scan-max-mb "${STATS_SCAN_MAX_MB:-2048}")
+if [[ "${STATS_HISTOGRAMS:-1}" != "1" ]]; then
+  ARGS+=(--no-histograms)
+fi
+PYTHONPATH="$ROOT${PYTHONPATH:+:$PYTHONPATH}" "${PYTHON_BIN:-python3}" -m orchestrator.migrationctl stats "${ARGS[@]}"
@@ -1,4 +1,4 @@
 SELECT plugin_name, plugin_status
-FROM information_schema.PLUGINS
+FROM plugins
 WHERE plugin_status = 'ACTIVE'
 ORDER BY plugin_name;
@@ -0,0 +1,5 @@
+SELECT user, host, plugin
+FROM users
+WHERE user NOT IN ('mysql.infoschema','mysql.session','mysql.sys')
+  AND (plugin LIKE '%sha%' OR plugin LIKE '%caching_sha2%')
+ORDER BY user, host, plugin;
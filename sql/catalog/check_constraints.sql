@@ -0,0 +1,7 @@
+SELECT tc.constraint_schema, tc.table_name, tc.constraint_name, cc.check_clause
+FROM check_constraints cc
+JOIN table_constraints tc
+  ON cc.constraint_name = tc.constraint_name
+ AND cc.constraint_schema = tc.constraint_schema
+WHERE tc.constraint_schema NOT IN ('mysql','information_schema','performance_schema','sys')
+ORDER BY tc.constraint_schema, tc.table_name, tc.constraint_name;
@@ -0,0 +1,16 @@
+SELECT object_type, definer, COUNT(*) AS cnt
+FROM (
+  SELECT 'VIEW' AS object_type, definer FROM views
+   WHERE table_schema NOT IN ('mysql','information_schema','performance_schema','sys')
+  UNION ALL
+  SELECT 'TRIGGER', definer FROM triggers
+   WHERE trigger_schema NOT IN ('mysql','information_schema','performance_schema','sys')
+  UNION ALL
+  SELECT 'ROUTINE', definer FROM routines
+   WHERE routine_schema NOT IN ('mysql','information_schema','performance_schema','sys')
+  UNION ALL
+  SELECT 'EVENT', definer FROM events
+   WHERE event_schema NOT IN ('mysql','information_schema','performance_schema','sys')
+)
+GROUP BY object_type, definer
+ORDER BY object_type, definer;
@@ -0,0 +1,5 @@
+SELECT engine, COUNT(*)
+FROM tables
+WHERE table_type = 'BASE TABLE'
+GROUP BY engine
+ORDER BY COUNT(*) DESC;
@@ -0,0 +1,8 @@
+/*
+Foreign key names longer than 60 characters may be truncated or rejected on import.
+*/
+SELECT constraint_schema, table_name, constraint_name, length(constraint_name) AS len
+FROM table_constraints
+WHERE constraint_type = 'FOREIGN KEY'
+  AND length(constraint_name) > 60
+ORDER BY constraint_schema, table_name, constraint_name;
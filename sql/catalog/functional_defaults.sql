@@ -0,0 +1,4 @@
+SELECT table_schema, table_name, column_name, column_default
+FROM columns
+WHERE column_default LIKE '(%)'
+ORDER BY table_schema, table_name, column_name;
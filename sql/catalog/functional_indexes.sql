@@ -0,0 +1,4 @@
+SELECT DISTINCT table_schema, table_name, index_name
+FROM statistics
+WHERE expression IS NOT NULL
+ORDER BY table_schema, table_name, index_name;
@@ -0,0 +1,5 @@
+SELECT table_schema, table_name, column_name, srs_id
+FROM columns
+WHERE lower(data_type) IN ('geometry', 'point', 'linestring', 'polygon')
+  AND srs_id IS NOT NULL
+ORDER BY table_schema, table_name, column_name;
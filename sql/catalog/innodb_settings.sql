@@ -0,0 +1,5 @@
+-- @@innodb_file_per_table reports 1/0 while SHOW GLOBAL VARIABLES reports ON/OFF.
+SELECT
+  (SELECT CASE upper(variable_value) WHEN 'ON' THEN '1' WHEN 'OFF' THEN '0' ELSE variable_value END
+     FROM variables WHERE lower(variable_name) = 'innodb_file_per_table'),
+  (SELECT variable_value FROM variables WHERE lower(variable_name) = 'innodb_fast_shutdown');
@@ -0,0 +1,4 @@
+SELECT table_schema, table_name, column_name
+FROM columns
+WHERE upper(extra) LIKE '%INVISIBLE%'
+ORDER BY table_schema, table_name, column_name;
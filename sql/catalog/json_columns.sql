@@ -0,0 +1,4 @@
+SELECT table_schema, table_name, column_name, data_type
+FROM columns
+WHERE lower(data_type) = 'json'
+ORDER BY table_schema, table_name, column_name;
@@ -0,0 +1,11 @@
+SELECT c.table_schema, c.table_name,
+       group_concat(c.column_name || ':' || lower(c.data_type), ',') AS lob_columns,
+       COALESCE(t.table_rows, 0) AS table_rows,
+       COALESCE(t.avg_row_length, 0) AS avg_row_length,
+       COALESCE(t.data_length, 0) AS data_length
+FROM columns c
+JOIN tables t ON t.table_schema = c.table_schema AND t.table_name = c.table_name
+WHERE lower(c.data_type) IN ('blob', 'mediumblob', 'longblob', 'text', 'mediumtext', 'longtext', 'json')
+  AND t.table_type = 'BASE TABLE'
+GROUP BY c.table_schema, c.table_name
+ORDER BY CAST(COALESCE(t.data_length, 0) AS INTEGER) DESC, c.table_schema, c.table_name;
@@ -1,5 +1,5 @@
 SELECT table_schema, table_name, table_collation
-FROM information_schema.TABLES
+FROM tables
 WHERE table_schema NOT IN ('mysql','information_schema','performance_schema','sys')
-  AND table_collation LIKE '%_0900_%'
+  AND table_collation LIKE '%\_0900\_%' ESCAPE '\'
 ORDER BY table_schema, table_name;
@@ -0,0 +1,4 @@
+SELECT table_schema, table_name, column_name, collation_name
+FROM columns
+WHERE collation_name LIKE '%\_0900\_%' ESCAPE '\'
+ORDER BY table_schema, table_name, column_name;
@@ -0,0 +1,8 @@
+/*
+MySQL 8 partial revokes (GRANT ... ON *.* with REVOKE ... ON db.*) have no MariaDB equivalent.
+*/
+SELECT user, host, user_attributes
+FROM users
+WHERE user_attributes LIKE '%"partial_revokes":true%'
+   OR user_attributes LIKE '%"partial_revokes": true%'
+ORDER BY user, host;
@@ -0,0 +1,3 @@
+SELECT resource_group_name, resource_group_type, resource_group_enabled, vcpu_ids, thread_priority
+FROM resource_groups
+ORDER BY resource_group_name;
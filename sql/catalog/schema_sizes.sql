@@ -0,0 +1,5 @@
+SELECT table_schema,
+       printf('%.2f', SUM(COALESCE(data_length, 0) + COALESCE(index_length, 0)) / 1024.0 / 1024.0) AS size_mb
+FROM tables
+GROUP BY table_schema
+ORDER BY SUM(COALESCE(data_length, 0) + COALESCE(index_length, 0)) DESC;
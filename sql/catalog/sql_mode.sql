@@ -0,0 +1 @@
+SELECT variable_value FROM variables WHERE lower(variable_name) = 'sql_mode';
@@ -0,0 +1,5 @@
+SELECT trigger_schema, event_object_table, action_timing, event_manipulation, COUNT(*)
+FROM triggers
+GROUP BY trigger_schema, event_object_table, action_timing, event_manipulation
+HAVING COUNT(*) > 1
+ORDER BY trigger_schema, event_object_table, action_timing, event_manipulation;
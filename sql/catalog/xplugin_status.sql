@@ -0,0 +1,3 @@
+SELECT plugin_name, plugin_status
+FROM plugins
+WHERE plugin_name = 'mysqlx';
@@ -1,6 +0,0 @@
-SELECT tc.CONSTRAINT_SCHEMA, tc.TABLE_NAME, tc.CONSTRAINT_NAME, cc.CHECK_CLAUSE 
-FROM INFORMATION_SCHEMA.CHECK_CONSTRAINTS cc
-JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc 
-  ON cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME 
-  AND cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
-WHERE tc.CONSTRAINT_SCHEMA NOT IN ('mysql','information_schema','performance_schema','sys');
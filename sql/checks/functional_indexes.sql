@@ -1,4 +0,0 @@
-SELECT TABLE_SCHEMA, TABLE_NAME, INDEX_NAME 
-FROM INFORMATION_SCHEMA.STATISTICS 
-WHERE EXPRESSION IS NOT NULL 
-  AND TABLE_SCHEMA NOT IN ('mysql','information_schema','performance_schema','sys');
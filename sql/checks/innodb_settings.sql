@@ -1 +0,0 @@
-SELECT @@innodb_file_per_table, @@innodb_fast_shutdown;
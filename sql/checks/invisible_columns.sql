@@ -1,4 +0,0 @@
-SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME 
-FROM INFORMATION_SCHEMA.COLUMNS 
-WHERE EXTRA LIKE '%INVISIBLE%' 
-  AND TABLE_SCHEMA NOT IN ('mysql','information_schema','performance_schema','sys');
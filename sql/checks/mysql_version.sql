@@ -1 +0,0 @@
-SELECT VERSION();
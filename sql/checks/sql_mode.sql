@@ -1 +0,0 @@
-SELECT @@sql_mode;
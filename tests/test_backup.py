@@ -0,0 +1,90 @@
+import pytest
+
+from orchestrator import backup
+from orchestrator.dbclient import Endpoint
+
+
+class FakeProc:
+    def __init__(self, pid, rc=None):
+        self.pid = pid
+        self.rc = rc
+
+    def poll(self):
+        return self.rc
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Record snapshot queries; answer with the next queued count (or raise it)."""
+    seen = []
+    answers = []
+
+    def query_value(ep, sql):
+        seen.append(sql)
+        answer = answers.pop(0) if answers else "0"
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(backup, "query_value", query_value)
+    monkeypatch.setattr(backup.time, "sleep", lambda _s: None)
+    return seen, answers
+
+
+EP = Endpoint(host="src", port="3306")
+
+
+def test_all_workers_in_snapshot(queries):
+    seen, answers = queries
+    answers.append("2")
+    assert backup._wait_for_snapshots(EP, 100, [FakeProc(11), FakeProc(12)], 5)
+    assert "a.PROCESSLIST_ID > 100" in seen[0]
+    assert "IN ('11', '12')" in seen[0]
+
+
+def test_finished_workers_count_and_are_not_queried(queries):
+    seen, answers = queries
+    answers.append("1")
+    assert backup._wait_for_snapshots(EP, 100, [FakeProc(11, rc=0), FakeProc(12)], 5)
+    assert "IN ('12')" in seen[0]
+
+
+def test_all_workers_finished_needs_no_query(queries):
+    seen, _answers = queries
+    assert backup._wait_for_snapshots(EP, 100, [FakeProc(11, rc=0), FakeProc(12, rc=0)], 5)
+    assert seen == []
+
+
+def test_failed_worker(queries):
+    assert not backup._wait_for_snapshots(EP, 100, [FakeProc(11, rc=2), FakeProc(12)], 5)
+
+
+def test_waits_until_every_worker_opened(queries):
+    seen, answers = queries
+    answers.extend(["0", "1", "2"])
+    assert backup._wait_for_snapshots(EP, 100, [FakeProc(11), FakeProc(12)], 5)
+    assert len(seen) == 3
+
+
+def test_query_error_gives_up_with_warning(queries):
+    _seen, answers = queries
+    answers.append(RuntimeError("performance_schema is disabled"))
+    logged = []
+    assert not backup._wait_for_snapshots(EP, 100, [FakeProc(11)], 5, log=logged.append)
+    assert "performance_schema" in logged[0]
+
+
+def test_timeout(queries, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(backup.time, "time", lambda: float(next(clock)))
+    assert not backup._wait_for_snapshots(EP, 100, [FakeProc(11)], 3)
+
+
+def test_restore_order_puts_triggers_last():
+    names = ["schema.sql.zst", "mysql.sql.zst", "data.001.sql.zst", "data.002.sql.zst", "triggers.sql.zst"]
+    assert backup._restore_order(list(reversed(names))) == [
+        ["schema.sql.zst"], ["mysql.sql.zst"], ["data.002.sql.zst", "data.001.sql.zst"], ["triggers.sql.zst"],
+    ]
+    assert backup._restore_order(["schema.sql.gz", "data.001.sql.gz", "triggers.sql.gz"]) == [
+        ["schema.sql.gz"], ["data.001.sql.gz"], ["triggers.sql.gz"],
+    ]
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+import pytest
+
+from orchestrator.dbclient import Endpoint
+from orchestrator.fanout import CHUNK_BYTES, _Sink
+
+CHUNK = 256 << 10
+
+
+@pytest.fixture
+def client(tmp_path):
+    """A stand-in restore client that holds off reading until `go` exists, then copies stdin to `out`."""
+    script = tmp_path / "client.sh"
+    script.write_text(
+        "#!/bin/sh\n"
+        f"while [ ! -e '{tmp_path}/go' ]; do sleep 0.05; done\n"
+        f"cat > '{tmp_path}/out'\n"
+    )
+    os.chmod(script, 0o755)
+    spill = tmp_path / "spill"
+    spill.mkdir()
+    return Endpoint(host="tgt", client_bin=str(script)), spill, tmp_path
+
+
+def _payload(n):
+    return [bytes([i % 251]) * CHUNK for i in range(n)]
+
+
+def _wait_for(cond, timeout=10.0):
+    deadline = time.time() + timeout
+    while not cond():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_spills_to_rotating_segments_and_replays_in_order(client):
+    ep, spill, root = client
+    sink = _Sink(ep, [], mem_cap=CHUNK_BYTES, spill_cap=16 << 20, spill_dir=spill)
+    chunks = _payload(32)
+    for c in chunks:
+        sink.put(c)
+    # 8 MB against a 1 MB memory queue: the rest sits in 2 MB segments on disk.
+    assert sink.segment_bytes == 2 << 20
+    assert len(sink.segments) >= 3
+    assert len(list(spill.iterdir())) == len(sink.segments)
+    assert all(size <= sink.segment_bytes for _path, size in sink.segments)
+
+    (root / "go").touch()
+    sink.close()
+    sink.join()
+    result = sink.result()
+    assert result["ok"], result
+    assert result["bytes"] == len(chunks) * CHUNK
+    assert result["max_spilled_bytes"] >= 6 << 20
+    assert (root / "out").read_bytes() == b"".join(chunks)
+    assert list(spill.iterdir()) == []
+
+
+def test_spill_cap_blocks_the_producer(client):
+    ep, spill, root = client
+    sink = _Sink(ep, [], mem_cap=CHUNK_BYTES, spill_cap=2 << 20, spill_dir=spill)
+    chunks = _payload(24)
+    producer = threading.Thread(target=lambda: [sink.put(c) for c in chunks])
+    producer.start()
+    _wait_for(lambda: sink.spool_disk >= (2 << 20) - CHUNK)
+    time.sleep(0.2)
+    assert producer.is_alive()
+    assert sink.spool_disk <= sink.spill_cap
+
+    (root / "go").touch()
+    producer.join(timeout=30)
+    assert not producer.is_alive()
+    sink.close()
+    sink.join()
+    result = sink.result()
+    assert result["ok"], result
+    assert result["max_spilled_bytes"] <= sink.spill_cap
+    assert result["stalled_s"] > 0
+    assert (root / "out").read_bytes() == b"".join(chunks)
+    assert list(spill.iterdir()) == []
+
+
+def test_failed_client_drops_the_spool(tmp_path):
+    script = tmp_path / "client.sh"
+    script.write_text("#!/bin/sh\necho 'ERROR 1045: access denied' >&2\nexit 1\n")
+    os.chmod(script, 0o755)
+    sink = _Sink(Endpoint(host="tgt", client_bin=str(script)), [], CHUNK_BYTES, 4 << 20, tmp_path)
+    _wait_for(lambda: sink.proc.poll() is not None)
+    for c in _payload(8):
+        sink.put(c)
+    _wait_for(lambda: sink.failed)
+    sink.put(b"after the failure")
+    sink.close()
+    sink.join()
+    result = sink.result()
+    assert not result["ok"]
+    assert "access denied" in result["stderr_tail"][-1]
+    assert not list(tmp_path.glob("fanout_*"))
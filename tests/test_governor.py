@@ -0,0 +1,93 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from orchestrator import governor
+from orchestrator.governor import TokenBucket, _insert_rows, summarize_events
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(governor.time, "sleep", slept.append)
+    return slept
+
+
+def test_token_bucket_allows_one_second_burst(sleeps):
+    bucket = TokenBucket(100)
+    assert bucket.consume(100) == 0.0
+    assert sleeps == []
+
+
+def test_token_bucket_sleeps_off_debt(sleeps):
+    bucket = TokenBucket(100)
+    bucket.consume(100)
+    waited = bucket.consume(50)
+    assert waited == pytest.approx(0.5, abs=0.05)
+    assert sleeps == [waited]
+
+
+def test_token_bucket_disabled_or_empty(sleeps):
+    assert TokenBucket(0).consume(10 ** 9) == 0.0
+    assert TokenBucket(100).consume(0) == 0.0
+    assert sleeps == []
+
+
+def test_token_bucket_slow_factor_halves_rate(sleeps):
+    bucket = TokenBucket(100)
+    bucket.consume(100)
+    assert bucket.consume(50, factor=0.5) == pytest.approx(1.0, abs=0.05)
+
+
+def test_token_bucket_shared_between_threads_splits_rate(sleeps):
+    bucket = TokenBucket(100)
+    bucket.consume(100)
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(bucket.consume(50))) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(waits) == [pytest.approx(0.5, abs=0.05), pytest.approx(1.0, abs=0.05)]
+
+
+def test_insert_rows_ignores_separators_in_strings():
+    line = b"INSERT INTO `t` VALUES (1,'a'),(2,'b),(c'),(3,'it\\'s),('),(4,'x\\\\'),(5,'');\n"
+    assert _insert_rows(line) == 5
+    assert _insert_rows(b"INSERT INTO `t` VALUES (1,0xAB),(2,NULL);\n") == 2
+
+
+def _event(ts, name, **details):
+    return json.dumps({"ts": ts.isoformat(), "reader": "dump", "event": name, **details})
+
+
+def test_summarize_events_counts_only_since(tmp_path):
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(hours=1)
+    path = tmp_path / "governor_events.jsonl"
+    path.write_text("\n".join([
+        _event(old, "start"),
+        _event(old, "pause", reason="threads_running=90>=80"),
+        _event(old, "stop", paused_s=30.0, throttled_s=2.0),
+        _event(now, "start"),
+        _event(now, "slow", reason="history_length=800>=750"),
+        _event(now, "pause", reason="threads_running=85>=80"),
+        "not json",
+        _event(now, "stop", paused_s=4.5, throttled_s=1.25),
+    ]) + "\n", encoding="utf-8")
+
+    summary = summarize_events(path, since=(now - timedelta(seconds=1)).timestamp())
+    assert summary["pauses"] == 1
+    assert summary["slowdowns"] == 1
+    assert summary["paused_s"] == 4.5
+    assert summary["throttled_s"] == pytest.approx(1.2, abs=0.05)
+    assert [e["event"] for e in summary["events"]] == ["slow", "pause", "stop"]
+
+    assert summarize_events(path)["pauses"] == 2
+
+
+def test_summarize_events_missing_file(tmp_path):
+    summary = summarize_events(tmp_path / "none.jsonl")
+    assert summary["pauses"] == 0 and summary["events"] == []
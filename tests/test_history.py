@@ -0,0 +1,71 @@
+import pytest
+
+from orchestrator.history import RunHistory
+
+
+def _report(day, steps, playbook="logical_small", success=True):
+    started = f"2026-01-{day:02d}T00:00:00+00:00"
+    return {
+        "run_id": f"run-{day}",
+        "mode": "run",
+        "plan": {"mode": playbook},
+        "started_at": started,
+        "finished_at": f"2026-01-{day:02d}T01:00:00+00:00",
+        "success": success,
+        "steps": [
+            {
+                "id": step_id,
+                "name": step_id,
+                "status": "DONE",
+                "details": {"started_at": started, "duration_s": seconds, "data": {"rows": rows, "bytes": rows * 100}},
+            }
+            for step_id, seconds, rows in steps
+        ],
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    h = RunHistory(tmp_path / "history.sqlite")
+    for day, dump_s in ((1, 100.0), (2, 110.0), (3, 90.0)):
+        h.index_report(_report(day, [("dump", dump_s, 10000), ("load", 50.0, 10000)]), tmp_path / f"r{day}" / "report.json")
+    # Failed runs and other playbooks never count towards the baseline.
+    h.index_report(_report(4, [("dump", 1.0, 10000)], success=False), tmp_path / "r4" / "report.json")
+    h.index_report(_report(5, [("dump", 1.0, 10000)], playbook="physical_large"), tmp_path / "r5" / "report.json")
+    return h
+
+
+def test_regressions_against_median(history, tmp_path):
+    history.index_report(
+        _report(6, [("dump", 150.0, 10000), ("load", 52.0, 10000)]), tmp_path / "r6" / "report.json"
+    )
+    result = history.regressions("run-6")
+    assert result["run"]["run_id"] == "run-6"
+    assert len(result["baseline_runs"]) == 3
+    by_metric = {(r["step_id"], r["metric"]): r for r in result["regressions"]}
+    assert set(by_metric) == {("dump", "duration_s"), ("dump", "bytes_per_s"), ("dump", "rows_per_s")}
+    assert by_metric[("dump", "duration_s")]["baseline"] == 100.0
+    assert by_metric[("dump", "duration_s")]["change_pct"] == 50.0
+    assert by_metric[("dump", "rows_per_s")]["baseline"] == 100.0
+    assert by_metric[("dump", "rows_per_s")]["value"] == pytest.approx(66.7)
+
+
+def test_small_slowdowns_are_ignored(history, tmp_path):
+    # Same throughput, slightly longer steps.
+    history.index_report(_report(6, [("dump", 104.0, 10400), ("load", 54.0, 10800)]), tmp_path / "r6" / "report.json")
+    assert history.regressions()["regressions"] == []
+    # Over the threshold but under min_seconds.
+    assert history.regressions(threshold=0.05, min_seconds=5.0)["regressions"] == []
+    found = history.regressions(threshold=0.05, min_seconds=3.0)["regressions"]
+    assert [(r["step_id"], r["metric"]) for r in found] == [("load", "duration_s")]
+
+
+def test_regressions_baseline_limit(history, tmp_path):
+    history.index_report(_report(6, [("dump", 100.0, 10000)]), tmp_path / "r6" / "report.json")
+    result = history.regressions(baseline=2)
+    assert [history.resolve(str(i))["run_id"] for i in result["baseline_runs"]] == ["run-3", "run-2"]
+
+
+def test_regressions_without_runs(tmp_path):
+    with pytest.raises(KeyError):
+        RunHistory(tmp_path / "history.sqlite").regressions()
@@ -0,0 +1,101 @@
+import hashlib
+import json
+
+import pytest
+
+from orchestrator.schemadiff import SchemaObject, _clause, _collation, _column_type, _default, _expr, diff_objects
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("utf8_general_ci", "utf8mb3_general_ci"),
+    ("UTF8MB4_0900_AI_CI", "utf8mb4_0900_ai_ci"),
+    (None, ""),
+])
+def test_collation(value, expected):
+    assert _collation(value) == expected
+
+
+def test_expr_drops_quoting_introducers_and_layout():
+    assert _expr("SELECT `a`,\n  _utf8mb4'x'  FROM `t`") == "select a, 'x' from t"
+    assert _expr("CURRENT_TIMESTAMP()") == "current_timestamp"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("((`qty` > 0))", "qty > 0"),
+    ("(`a` > 0) and (`b` > 0)", "(a > 0) and (b > 0)"),
+    ("`qty` > 0", "qty > 0"),
+])
+def test_clause_strips_only_enclosing_parens(value, expected):
+    assert _clause(value) == expected
+
+
+@pytest.mark.parametrize("value, mariadb, expected", [
+    ("'abc'", True, "abc"),
+    ("'it''s'", True, "it's"),
+    ("NULL", True, None),
+    ("abc", False, "abc"),
+    (None, False, None),
+    ("CURRENT_TIMESTAMP", False, "current_timestamp"),
+    ("current_timestamp()", True, "current_timestamp"),
+])
+def test_default(value, mariadb, expected):
+    assert _default(value, mariadb) == expected
+
+
+def test_column_type_drops_integer_display_width():
+    assert _column_type("INT(11) UNSIGNED") == "int unsigned"
+    assert _column_type("varchar(20)") == "varchar(20)"
+
+
+def _obj(kind, schema, table, name, **fields):
+    obj = SchemaObject(kind, schema, table, name, fields)
+    obj.digest = hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+    return obj
+
+
+def _index(*objs):
+    return {o.key(): o for o in objs}
+
+
+def test_diff_excuses_known_rewrites():
+    src = _index(
+        _obj("table", "app", "", "t", engine="innodb", collation="utf8mb4_0900_ai_ci"),
+        _obj("column", "app", "t", "doc", type="json", nullable="YES", collation=None),
+    )
+    tgt = _index(
+        _obj("table", "app", "", "t", engine="innodb", collation="utf8mb4_uca1400_ai_ci"),
+        _obj("column", "app", "t", "doc", type="longtext", nullable="YES", collation="utf8mb4_bin"),
+        _obj("check", "app", "t", "doc", clause="json_valid(doc)"),
+    )
+    result = diff_objects(src, tgt)
+    assert result["ok"]
+    assert result["matched"] == 2
+    assert result["normalised"] == {
+        "collation utf8mb4_0900_ai_ci -> utf8mb4_uca1400_ai_ci": 1,
+        "json -> longtext": 1,
+        "json_valid check": 1,
+    }
+
+
+def test_diff_reports_real_differences():
+    src = _index(
+        _obj("table", "app", "", "t", engine="innodb", collation="utf8mb4_0900_ai_ci"),
+        _obj("column", "app", "t", "name", type="varchar(20)", nullable="NO"),
+        _obj("index", "app", "t", "ix_name", columns=["name"], unique=False),
+    )
+    tgt = _index(
+        _obj("table", "app", "", "t", engine="innodb", collation="latin1_swedish_ci"),
+        _obj("column", "app", "t", "name", type="varchar(20)", nullable="NO"),
+        _obj("check", "app", "t", "name", clause="json_valid(name)"),
+    )
+    result = diff_objects(src, tgt)
+    assert not result["ok"]
+    assert result["missing"] == [{"kind": "index", "object": "app.t.ix_name"}]
+    # A json_valid() check is only expected on columns that were JSON on the source.
+    assert result["extra"] == [{"kind": "check", "object": "app.t.name"}]
+    assert result["differing"] == [{
+        "kind": "table",
+        "object": "app.t",
+        "fields": {"collation": {"source": "utf8mb4_0900_ai_ci", "target": "latin1_swedish_ci"}},
+    }]
+    assert result["by_kind"]["missing"] == {"index": 1}
@@ -0,0 +1,76 @@
+import base64
+import json
+
+import pytest
+
+from orchestrator.stats import MAX_BUCKETS, convert_histogram
+
+
+def _b64(s):
+    return "base64:type254:" + base64.b64encode(s.encode("utf-8")).decode("ascii")
+
+
+def test_singleton_int_histogram():
+    hist = {
+        "data-type": "int",
+        "histogram-type": "singleton",
+        "null-values": 0.2,
+        "last-updated": "2026-01-01 00:00:00.000000",
+        "buckets": [[1, 0.2], [2, 0.6], [3, 0.8]],
+    }
+    row = convert_histogram(hist, rows=1000)
+    assert row["min_value"] == "1" and row["max_value"] == "3"
+    assert row["nulls_ratio"] == 0.2
+    assert row["hist_size"] == 3
+    # 800 non-NULL rows over 3 distinct values
+    assert row["avg_frequency"] == pytest.approx(266.6667)
+    hb = json.loads(row["histogram"])
+    assert hb["collected_by"] == "MySQL"
+    # cumulative over all rows -> share of the non-NULL rows per bucket
+    assert [b["size"] for b in hb["histogram_hb"]] == [0.25, 0.5, 0.25]
+    assert [b["start"] for b in hb["histogram_hb"]] == ["1", "2", "3"]
+    assert hb["histogram_hb"][-1]["end"] == "3"
+    assert "end" not in hb["histogram_hb"][0]
+
+
+def test_equi_height_string_histogram():
+    hist = {
+        "data-type": "string",
+        "histogram-type": "equi-height",
+        "null-values": 0.0,
+        "buckets": [[_b64("apple"), _b64("kiwi"), 0.5, 10], [_b64("lemon"), _b64("zucchini"), 1.0, 30]],
+    }
+    row = convert_histogram(hist, rows=400)
+    assert (row["min_value"], row["max_value"]) == ("apple", "zucchini")
+    hb = json.loads(row["histogram"])["histogram_hb"]
+    assert hb == [
+        {"start": "apple", "size": 0.5, "ndv": 10},
+        {"start": "lemon", "size": 0.5, "ndv": 30, "end": "zucchini"},
+    ]
+    assert row["avg_frequency"] == 10.0
+
+
+def test_buckets_are_merged_to_the_mariadb_limit():
+    n = MAX_BUCKETS * 2
+    hist = {
+        "data-type": "int",
+        "histogram-type": "equi-height",
+        "buckets": [[i, i, (i + 1) / n, 1] for i in range(n)],
+    }
+    row = convert_histogram(hist, rows=n)
+    hb = json.loads(row["histogram"])["histogram_hb"]
+    assert row["hist_size"] == len(hb) == MAX_BUCKETS
+    assert sum(b["ndv"] for b in hb) == n
+    assert sum(b["size"] for b in hb) == pytest.approx(1.0, abs=1e-3)
+    assert (row["min_value"], row["max_value"]) == ("0", str(n - 1))
+
+
+@pytest.mark.parametrize("hist", [
+    {"data-type": "int", "histogram-type": "singleton", "buckets": []},
+    {"data-type": "enum", "histogram-type": "singleton", "buckets": [[1, 1.0]]},
+    {"data-type": "int", "histogram-type": "unknown", "buckets": [[1, 1.0]]},
+    {"data-type": "string", "histogram-type": "singleton", "buckets": [["plain", 1.0]]},
+])
+def test_unconvertible_histograms(hist):
+    with pytest.raises(ValueError):
+        convert_histogram(hist, rows=10)